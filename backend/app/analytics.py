@@ -0,0 +1,73 @@
+"""
+Program analytics for department dashboards.
+
+Status counts, per-requirement completion histograms and the completed
+credits histogram are read straight from ProgramAnalyticsCounter, which the
+progress store updates by delta on every write; credit quantiles are walked
+off the histogram. A request looks up the program, reads its counters in one
+query and never audits, counts or fills the population.
+"""
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.audit_store import BANDS
+from app.models import Program, ProgramAnalyticsCounter
+from app.program_rules import get_program_rules
+from app.schemas import ProgramAnalytics, RequirementHistogram
+
+STATUSES = ("completed", "on_track", "at_risk")
+
+# Reported credit quantiles: name -> fraction of the cohort at or below
+QUANTILES = {"min": 0.0, "p25": 0.25, "median": 0.5, "p75": 0.75, "p90": 0.9, "max": 1.0}
+
+
+def credit_quantiles(histogram: Dict[str, int], student_count: int) -> Dict[str, float]:
+    """
+    Nearest-rank quantiles of completed credits from the "credits" histogram
+    (bucket: credits in hundredths -> students).
+    """
+    buckets: List[Tuple[int, int]] = sorted(
+        (int(bucket), count) for bucket, count in histogram.items() if count
+    )
+    quantiles: Dict[str, float] = {}
+    for name, fraction in QUANTILES.items():
+        rank = round(fraction * (student_count - 1))
+        seen = 0
+        for bucket, count in buckets:
+            seen += count
+            if seen > rank:
+                quantiles[name] = bucket / 100
+                break
+    return quantiles
+
+
+def program_analytics(db: Session, program_id: int) -> ProgramAnalytics:
+    if db.query(Program.id).filter(Program.id == program_id).first() is None:
+        raise ValueError(f"Program with id {program_id} not found")
+
+    counts: Dict[str, Dict[str, int]] = {}
+    for metric, bucket, count in db.query(
+        ProgramAnalyticsCounter.metric, ProgramAnalyticsCounter.bucket, ProgramAnalyticsCounter.count
+    ).filter(ProgramAnalyticsCounter.program_id == program_id):
+        counts.setdefault(metric, {})[bucket] = count
+
+    status_counts = {status: counts.get("status", {}).get(status, 0) for status in STATUSES}
+    student_count = sum(status_counts.values())
+
+    requirements = [
+        RequirementHistogram(
+            requirement_id=requirement.id,
+            requirement_name=requirement.name,
+            bands={band: counts.get(f"requirement:{requirement.id}", {}).get(band, 0) for band in BANDS},
+        )
+        for requirement in get_program_rules(db, program_id).requirements
+    ]
+
+    return ProgramAnalytics(
+        program_id=program_id,
+        student_count=student_count,
+        status_counts=status_counts,
+        requirements=requirements,
+        credit_quantiles=credit_quantiles(counts.get("credits", {}), student_count) if student_count else {},
+    )
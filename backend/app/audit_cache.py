@@ -0,0 +1,158 @@
+"""
+Fingerprinted LRU+TTL cache of audit results.
+
+Entries are keyed by a fingerprint of everything an audit depends on: the
+student, their completed enrollments, their approved substitutions, the
+program rule version and the catalog version. Any relevant write changes the
+fingerprint, so entries never need explicit invalidation; the TTL only bounds
+how long unused fingerprints linger. The fingerprint doubles as the audit's ETag.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.audit_engine import AuditEngine
+from app.audit_store import StoredReportInputs, build_stored_report, load_stored_report
+from app.catalog import get_catalog
+from app.config import get_settings
+from app.models import Student, Program, Enrollment, Substitution
+from app.program_rules import get_program_rules
+from app.schemas import AuditReport
+from app.serialization import encode_audit_report
+
+settings = get_settings()
+
+
+class CachedAudit(NamedTuple):
+    report: AuditReport
+    body: bytes
+
+
+class AuditCache:
+    """
+    Thread-safe LRU cache whose entries also expire after ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, CachedAudit]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedAudit]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: CachedAudit) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard_students(self, student_ids: Iterable[int]) -> int:
+        """
+        Drop every entry for the given students in one pass and return how
+        many were dropped. Writes already change the fingerprint; this just
+        frees entries a bulk write has made unreachable.
+        """
+        student_ids = set(student_ids)
+        with self._lock:
+            stale = [
+                key for key, (_, value) in self._entries.items()
+                if value.report.student.id in student_ids
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+audit_cache = AuditCache(settings.AUDIT_CACHE_MAX_ENTRIES, settings.AUDIT_CACHE_TTL_SECONDS)
+
+
+def audit_fingerprint(db: Session, student_id: int) -> Optional[str]:
+    """
+    Hash the inputs of a student's audit, or return None if the student
+    does not exist.
+    """
+    student = db.query(
+        Student.id, Student.student_id, Student.name, Student.email,
+        Program.id, Program.name, Program.code, Program.total_credits_required
+    ).join(Program, Program.id == Student.program_id).filter(Student.id == student_id).first()
+    if student is None:
+        return None
+
+    enrollments = db.query(Enrollment.id, Enrollment.course_id).filter(
+        Enrollment.student_id == student_id,
+        Enrollment.completed == True
+    ).order_by(Enrollment.id).all()
+    substitutions = db.query(
+        Substitution.id, Substitution.original_course_id, Substitution.substitute_course_id
+    ).filter(
+        Substitution.student_id == student_id,
+        Substitution.approved == True
+    ).order_by(Substitution.id).all()
+    rules = get_program_rules(db, student[4])
+    catalog = get_catalog(db)
+
+    digest = hashlib.sha256()
+    digest.update(repr((tuple(student), rules.version, catalog.version)).encode())
+    digest.update(repr([tuple(row) for row in enrollments]).encode())
+    digest.update(repr([tuple(row) for row in substitutions]).encode())
+    return digest.hexdigest()
+
+
+async def get_cached_audit(db: AsyncSession, student_id: int) -> Tuple[str, CachedAudit]:
+    """
+    Return the audit fingerprint and the cached (report, JSON body), computing
+    and caching them on a miss. Only the queries run inside run_sync; building
+    and encoding the report run in a threadpool worker.
+    """
+    fingerprint, cached, inputs = await db.run_sync(_load_cached_audit, student_id)
+    if cached is None:
+        cached = await run_in_threadpool(_build_cached_audit, AuditEngine(db.sync_session), inputs)
+        audit_cache.put(fingerprint, cached)
+    return fingerprint, cached
+
+
+def _load_cached_audit(
+    db: Session, student_id: int
+) -> Tuple[str, Optional[CachedAudit], Optional[StoredReportInputs]]:
+    fingerprint = audit_fingerprint(db, student_id)
+    if fingerprint is None:
+        raise ValueError(f"Student with id {student_id} not found")
+    cached = audit_cache.get(fingerprint)
+    return fingerprint, cached, load_stored_report(db, student_id) if cached is None else None
+
+
+def _build_cached_audit(engine: AuditEngine, inputs: StoredReportInputs) -> CachedAudit:
+    report = build_stored_report(engine, inputs)
+    return CachedAudit(report, encode_audit_report(report))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag (RFC 9110).
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
@@ -1,7 +1,24 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Dict, Set
-from app.models import Student, Course, Requirement, Enrollment, Substitution, RequirementCourse
-from app.schemas import AuditReport, RequirementProgress, Course as CourseSchema
+from starlette.concurrency import run_in_threadpool
+from typing import List, Set, Iterable, Mapping, NamedTuple, Optional, Sequence, Tuple
+from app.audit_loader import ProgramRecord, StudentRecord, Transcript, load_students, load_transcripts
+from app.catalog import get_catalog
+from app.instrumentation import phase
+from app.program_rules import CompiledRequirement, get_program_rules
+from app.substitutions import SubstitutionResolver
+from app.schemas import AuditReport, AuditSimulationRequest, RequirementProgress, Course as CourseSchema
+
+
+class AuditInputs(NamedTuple):
+    """
+    Everything the evaluation of a cohort needs, loaded up front.
+    """
+    student_ids: List[int]
+    students: Mapping[int, StudentRecord]
+    transcripts: Mapping[int, Transcript]
+    rules_by_program: Mapping[int, Sequence[CompiledRequirement]]
+    courses_by_id: Mapping[int, CourseSchema]
 
 
 class AuditEngine:
@@ -16,48 +33,238 @@ class AuditEngine:
         """
         Main audit function that processes student data and generates complete audit report.
         """
-        # Load student data
-        student = self.db.query(Student).filter(Student.id == student_id).first()
-        if not student:
-            raise ValueError(f"Student with id {student_id} not found")
-
-        program = student.program
-        
-        # Get all student enrollments
-        enrollments = self.db.query(Enrollment).filter(
-            Enrollment.student_id == student_id,
-            Enrollment.completed == True
-        ).all()
-
-        # Get approved substitutions
-        substitutions = self.db.query(Substitution).filter(
-            Substitution.student_id == student_id,
-            Substitution.approved == True
-        ).all()
-
-        # Build substitution map: original_course_id -> substitute_course_id
-        substitution_map = {sub.original_course_id: sub.substitute_course_id for sub in substitutions}
-
-        # Get all program requirements
-        requirements = self.db.query(Requirement).filter(
-            Requirement.program_id == program.id
-        ).all()
+        student, transcript = self._load_student(student_id)
 
-        # Calculate requirement progress
-        requirement_progress_list = []
-        total_credits_completed = 0.0
+        # Get all program requirements (compiled once per program and shared)
+        requirements = get_program_rules(self.db, student.program_id).requirements
+        courses_by_id = self._course_lookup(requirements, transcript.course_ids)
 
-        for requirement in requirements:
-            progress = self._calculate_requirement_progress(
-                requirement, enrollments, substitution_map
+        return self._build_report(student, student.program, requirements, transcript, courses_by_id)
+
+    def calculate_progress(
+        self,
+        student_id: int,
+        requirement_ids: Optional[Set[int]] = None
+    ) -> Tuple[StudentRecord, List[RequirementProgress]]:
+        """
+        Evaluate one student against a subset of program requirements
+        (all of them when requirement_ids is None), in program order.
+        """
+        student, transcript = self._load_student(student_id)
+        requirements = [
+            requirement for requirement in get_program_rules(self.db, student.program_id).requirements
+            if requirement_ids is None or requirement.id in requirement_ids
+        ]
+        courses_by_id = self._course_lookup(requirements, transcript.course_ids)
+        resolver = SubstitutionResolver(transcript.substitution_pairs())
+        with phase("evaluate", len(requirements)):
+            progress_list = [
+                self._calculate_requirement_progress(requirement, transcript.course_ids, resolver, courses_by_id)
+                for requirement in requirements
+            ]
+        return student, progress_list
+
+    def simulate_audit(self, student_id: int, scenario: AuditSimulationRequest) -> AuditReport:
+        """
+        Return the audit that would result from a what-if scenario.
+        """
+        return self.simulate_audits(student_id, [scenario])[0]
+
+    def simulate_audits(self, student_id: int, scenarios: Sequence[AuditSimulationRequest]) -> List[AuditReport]:
+        """
+        Return the audit that would result from each what-if scenario.
+
+        The student's real data is loaded once for all scenarios and each one
+        is applied to an in-memory copy, so extra scenarios cost no queries
+        and nothing is ever written to the database.
+        """
+        return self.evaluate_scenarios(self.load_scenarios(student_id, scenarios), scenarios)
+
+    def load_scenarios(self, student_id: int, scenarios: Sequence[AuditSimulationRequest]) -> AuditInputs:
+        """
+        Load the inputs of simulate_audits, checking that every added course exists.
+        """
+        add_course_ids = {course_id for scenario in scenarios for course_id in scenario.add_course_ids}
+        inputs = self.load_audits([student_id], add_course_ids)
+        unknown_ids = sorted(cid for cid in add_course_ids if cid not in inputs.courses_by_id)
+        if unknown_ids:
+            raise ValueError(f"Courses with ids {unknown_ids} not found")
+        return inputs
+
+    def evaluate_scenarios(self, inputs: AuditInputs, scenarios: Sequence[AuditSimulationRequest]) -> List[AuditReport]:
+        student_id, = inputs.student_ids
+        student = inputs.students[student_id]
+        requirements = inputs.rules_by_program[student.program_id]
+        transcript = inputs.transcripts[student_id]
+        return [
+            self._build_report(
+                student, student.program, requirements, self._apply_scenario(transcript, scenario), inputs.courses_by_id
             )
-            requirement_progress_list.append(progress)
+            for scenario in scenarios
+        ]
+
+    def _apply_scenario(self, transcript: Transcript, scenario: AuditSimulationRequest) -> Transcript:
+        simulated = Transcript()
+        dropped_course_ids = set(scenario.drop_course_ids)
+        simulated.course_ids.extend(
+            course_id for course_id in transcript.course_ids if course_id not in dropped_course_ids
+        )
+        simulated.course_ids.extend(scenario.add_course_ids)
+
+        dropped_substitution_ids = set(scenario.drop_substitution_ids)
+        for substitution_id, original_id, substitute_id in zip(
+            transcript.substitution_ids, transcript.original_course_ids, transcript.substitute_course_ids
+        ):
+            if substitution_id not in dropped_substitution_ids:
+                simulated.add_substitution(substitution_id, original_id, substitute_id)
+        for sub in scenario.add_substitutions:
+            # Hypothetical substitutions have no row yet; 0 is never a real id.
+            simulated.add_substitution(0, sub.original_course_id, sub.substitute_course_id)
+        return simulated
+
+    def run_audits(self, student_ids: List[int]) -> List[AuditReport]:
+        """
+        Audit a cohort of students with set-based loading.
+
+        Students, enrollments and substitutions are each fetched once for the
+        whole cohort as plain column tuples, so neither the query count nor
+        ORM bookkeeping grows with the number of students.
+        """
+        return self.evaluate_audits(self.load_audits(student_ids))
+
+    def load_audits(self, student_ids: Iterable[int], extra_course_ids: Iterable[int] = ()) -> AuditInputs:
+        """
+        Load everything run_audits needs for a cohort: students, transcripts,
+        compiled rules and the catalog courses involved (plus extra_course_ids).
+        """
+        student_ids = list(dict.fromkeys(student_ids))
+        if not student_ids:
+            return AuditInputs([], {}, {}, {}, {})
+
+        with phase("load", len(student_ids)):
+            students_by_id = load_students(self.db, student_ids)
+            missing_ids = [sid for sid in student_ids if sid not in students_by_id]
+            if missing_ids:
+                raise ValueError(f"Students with ids {missing_ids} not found")
+            transcripts = load_transcripts(self.db, student_ids)
+
+        rules_by_program = {
+            program_id: get_program_rules(self.db, program_id).requirements
+            for program_id in {student.program_id for student in students_by_id.values()}
+        }
+        course_ids = set(extra_course_ids)
+        for transcript in transcripts.values():
+            course_ids.update(transcript.course_ids)
+        courses_by_id = self._course_lookup(
+            [requirement for requirements in rules_by_program.values() for requirement in requirements],
+            course_ids
+        )
+        return AuditInputs(student_ids, students_by_id, transcripts, rules_by_program, courses_by_id)
+
+    def evaluate_audits(self, inputs: AuditInputs) -> List[AuditReport]:
+        """
+        Evaluate loaded inputs, in student_ids order. Uses neither the
+        session nor the shared caches, so it can run in a worker thread.
+        """
+        reports = []
+        for student_id in inputs.student_ids:
+            student = inputs.students[student_id]
+            reports.append(self._build_report(
+                student,
+                student.program,
+                inputs.rules_by_program[student.program_id],
+                inputs.transcripts[student_id],
+                inputs.courses_by_id,
+            ))
+        return reports
+
+    def _load_student(self, student_id: int) -> Tuple[StudentRecord, Transcript]:
+        """
+        Load a student with their completed enrollments and approved substitutions.
+        """
+        with phase("load"):
+            student = load_students(self.db, [student_id]).get(student_id)
+            if not student:
+                raise ValueError(f"Student with id {student_id} not found")
+            return student, load_transcripts(self.db, [student_id])[student_id]
+
+    def _course_lookup(
+        self,
+        requirements: Iterable[CompiledRequirement],
+        course_ids: Iterable[int]
+    ) -> Mapping[int, CourseSchema]:
+        """
+        Resolve courses from the in-process catalog snapshot, making sure it
+        knows every course the audit will reference.
+        """
+        course_ids = set(course_ids)
+        for requirement in requirements:
+            course_ids |= requirement.course_ids
+        return get_catalog(self.db, course_ids).courses
+
+    def _build_report(
+        self,
+        student: StudentRecord,
+        program: ProgramRecord,
+        requirements: Sequence[CompiledRequirement],
+        transcript: Transcript,
+        courses_by_id: Mapping[int, CourseSchema]
+    ) -> AuditReport:
+        """
+        Evaluate already-loaded student data against compiled program rules.
+        """
+        # Index substitutions once: original <-> substitute multi-maps
+        resolver = SubstitutionResolver(transcript.substitution_pairs())
+
+        # Calculate requirement progress
+        with phase("evaluate", len(requirements)):
+            requirement_progress_list = [
+                self._calculate_requirement_progress(requirement, transcript.course_ids, resolver, courses_by_id)
+                for requirement in requirements
+            ]
+        return self.assemble_report(student, program, requirement_progress_list)
+
+    def assemble_report(
+        self,
+        student: StudentRecord,
+        program: ProgramRecord,
+        requirement_progress_list: List[RequirementProgress]
+    ) -> AuditReport:
+        """
+        Derive totals, status and eligibility from per-requirement progress.
+        """
+        total_credits_completed, overall_percentage, graduation_eligible, status = self.summarize(
+            program.total_credits_required, requirement_progress_list
+        )
+        return AuditReport(
+            student=student,
+            program=program,
+            total_credits_required=program.total_credits_required,
+            total_credits_completed=total_credits_completed,
+            overall_percentage=overall_percentage,
+            status=status,
+            requirements=requirement_progress_list,
+            graduation_eligible=graduation_eligible
+        )
+
+    def summarize(
+        self,
+        total_credits_required: float,
+        requirement_progress_list: Sequence
+    ) -> Tuple[float, float, bool, str]:
+        """
+        Total credits, overall percentage, eligibility and status from
+        per-requirement progress, in program order. Items only need
+        credits_completed and is_met, so stored progress rows work too.
+        """
+        total_credits_completed = 0.0
+        for progress in requirement_progress_list:
             total_credits_completed += progress.credits_completed
 
         # Determine status
         overall_percentage = (
-            (total_credits_completed / program.total_credits_required * 100)
-            if program.total_credits_required > 0
+            (total_credits_completed / total_credits_required * 100)
+            if total_credits_required > 0
             else 0
         )
         # Graduation eligibility is determined strictly by requirements for this MVP.
@@ -67,58 +274,42 @@ class AuditEngine:
             overall_percentage = 100.0
 
         status = self._determine_status(overall_percentage, requirement_progress_list)
-        
-        return AuditReport(
-            student=student,
-            program=program,
-            total_credits_required=program.total_credits_required,
-            total_credits_completed=total_credits_completed,
-            overall_percentage=round(overall_percentage, 2),
-            status=status,
-            requirements=requirement_progress_list,
-            graduation_eligible=graduation_eligible
-        )
+        return total_credits_completed, round(overall_percentage, 2), graduation_eligible, status
 
     def _calculate_requirement_progress(
         self,
-        requirement: Requirement,
-        enrollments: List[Enrollment],
-        substitution_map: Dict[int, int]
+        requirement: CompiledRequirement,
+        course_ids: Sequence[int],
+        resolver: SubstitutionResolver,
+        courses_by_id: Mapping[int, CourseSchema]
     ) -> RequirementProgress:
         """
         Calculate progress for a single requirement.
         """
-        # Get all courses that satisfy this requirement
-        requirement_courses = self.db.query(RequirementCourse).filter(
-            RequirementCourse.requirement_id == requirement.id
-        ).all()
-        
-        required_course_ids = {rc.course_id for rc in requirement_courses}
+        required_course_ids = requirement.course_ids
 
         # Track completed courses for this requirement
         completed_course_ids: Set[int] = set()
-        completed_courses: List[Course] = []
+        completed_courses: List[CourseSchema] = []
         credits_completed = 0.0
 
-        for enrollment in enrollments:
-            course_id = enrollment.course_id
-            
+        for course_id in course_ids:
             # Check if this course (or its substitute) satisfies the requirement
             if course_id in required_course_ids:
                 completed_course_ids.add(course_id)
-                completed_courses.append(enrollment.course)
-                credits_completed += enrollment.course.credits
-            elif course_id in substitution_map.values():
+                completed_courses.append(courses_by_id[course_id])
+                credits_completed += courses_by_id[course_id].credits
+            elif resolver:
                 # Check if this is a substitute for a required course
-                original_id = next((k for k, v in substitution_map.items() if v == course_id), None)
-                if original_id and original_id in required_course_ids:
+                original_id = resolver.credited_original(course_id, required_course_ids, completed_course_ids)
+                if original_id is not None:
                     completed_course_ids.add(original_id)
-                    completed_courses.append(enrollment.course)
-                    credits_completed += enrollment.course.credits
+                    completed_courses.append(courses_by_id[course_id])
+                    credits_completed += courses_by_id[course_id].credits
 
         # Get missing courses
         missing_course_ids = required_course_ids - completed_course_ids
-        missing_courses = self.db.query(Course).filter(Course.id.in_(missing_course_ids)).all() if missing_course_ids else []
+        missing_courses = [courses_by_id[course_id] for course_id in sorted(missing_course_ids)]
 
         # Calculate percentage
         percentage = (credits_completed / requirement.credits_required * 100) if requirement.credits_required > 0 else 0
@@ -127,13 +318,13 @@ class AuditEngine:
         return RequirementProgress(
             requirement_id=requirement.id,
             requirement_name=requirement.name,
-            requirement_type=requirement.requirement_type.value,
+            requirement_type=requirement.requirement_type,
             credits_required=requirement.credits_required,
             credits_completed=round(credits_completed, 2),
             percentage=round(percentage, 2),
             is_met=is_met,
-            completed_courses=[CourseSchema.from_orm(c) for c in completed_courses],
-            missing_courses=[CourseSchema.from_orm(c) for c in missing_courses]
+            completed_courses=completed_courses,
+            missing_courses=missing_courses
         )
 
     def _determine_status(self, overall_percentage: float, requirements: List[RequirementProgress]) -> str:
@@ -149,3 +340,31 @@ class AuditEngine:
             return "on_track"
         else:
             return "at_risk"
+
+
+class AsyncAuditEngine:
+    """
+    Async variant of AuditEngine for the request path.
+
+    Inputs are loaded inside AsyncSession.run_sync, so the queries go through
+    the async driver, and the CPU-bound evaluation runs in a threadpool
+    worker so a large batch does not stall the event loop.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def run_audits(self, student_ids: List[int]) -> List[AuditReport]:
+        engine = AuditEngine(self.db.sync_session)
+        inputs = await self.db.run_sync(lambda _: engine.load_audits(student_ids))
+        return await run_in_threadpool(engine.evaluate_audits, inputs)
+
+    async def simulate_audit(self, student_id: int, scenario: AuditSimulationRequest) -> AuditReport:
+        return (await self.simulate_audits(student_id, [scenario]))[0]
+
+    async def simulate_audits(
+        self, student_id: int, scenarios: Sequence[AuditSimulationRequest]
+    ) -> List[AuditReport]:
+        engine = AuditEngine(self.db.sync_session)
+        inputs = await self.db.run_sync(lambda _: engine.load_scenarios(student_id, scenarios))
+        return await run_in_threadpool(engine.evaluate_scenarios, inputs, scenarios)
@@ -0,0 +1,81 @@
+"""
+Streaming export of audit summaries, one row per student.
+
+Student ids are read through a server-side cursor (yield_per) and audited
+chunk by chunk with AsyncAuditEngine.run_audits, and each chunk is encoded
+(in a worker thread, like the evaluation) and handed to the response before
+the next is fetched, so memory depends on the chunk size, not on the number
+of students.
+"""
+import csv
+import io
+from typing import AsyncIterator, Dict, List, Optional
+
+import orjson
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from app.audit_engine import AsyncAuditEngine
+from app.database import read_session
+from app.models import Student
+from app.schemas import AuditReport
+
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_COLUMNS = (
+    "student_id", "student_number", "name", "email", "program_code",
+    "status", "total_credits_completed", "total_credits_required", "overall_percentage",
+    "requirements_met", "requirements_total", "graduation_eligible",
+)
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def summary_row(report: AuditReport) -> Dict[str, object]:
+    return {
+        "student_id": report.student.id,
+        "student_number": report.student.student_id,
+        "name": report.student.name,
+        "email": report.student.email,
+        "program_code": report.program.code,
+        "status": report.status,
+        "total_credits_completed": report.total_credits_completed,
+        "total_credits_required": report.total_credits_required,
+        "overall_percentage": report.overall_percentage,
+        "requirements_met": sum(1 for progress in report.requirements if progress.is_met),
+        "requirements_total": len(report.requirements),
+        "graduation_eligible": report.graduation_eligible,
+    }
+
+
+def encode_rows(rows: List[Dict[str, object]], format: str) -> bytes:
+    if format == "ndjson":
+        return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows([row[column] for column in EXPORT_COLUMNS] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def encode_reports(reports: List[AuditReport], format: str) -> bytes:
+    return encode_rows([summary_row(report) for report in reports], format)
+
+
+async def stream_audit_export(
+    program_id: Optional[int], format: str, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    Yield the encoded export (CSV header first) chunk by chunk. Opens its own
+    read session, since the body is produced after the route has returned.
+    """
+    if format == "csv":
+        yield encode_rows([dict(zip(EXPORT_COLUMNS, EXPORT_COLUMNS))], "csv")
+
+    async with read_session() as db:
+        query = select(Student.id).order_by(Student.id)
+        if program_id is not None:
+            query = query.where(Student.program_id == program_id)
+        result = await db.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            student_ids = [student_id for student_id, in partition]
+            reports = await AsyncAuditEngine(db).run_audits(student_ids)
+            yield await run_in_threadpool(encode_reports, reports, format)
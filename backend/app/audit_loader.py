@@ -0,0 +1,155 @@
+"""
+Lean, ORM-free loading of audit inputs.
+
+An audit only needs a few columns of the student, their program, their
+completed enrollments and their approved substitutions. They are fetched as
+plain result tuples (no identity map, no lazy loads) into __slots__ records,
+with course ids packed into arrays, and AuditReport is built from those
+records directly.
+"""
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Student, Program, Enrollment, Substitution
+
+
+# Ids per IN list, well below the drivers' bind parameter limits (32767 for
+# asyncpg), however many students a caller loads.
+LOAD_CHUNK_SIZE = 500
+
+
+class ProgramRecord:
+    __slots__ = ("id", "name", "code", "total_credits_required")
+
+    def __init__(self, id: int, name: str, code: str, total_credits_required: float):
+        self.id = id
+        self.name = name
+        self.code = code
+        self.total_credits_required = total_credits_required
+
+
+class StudentRecord:
+    __slots__ = ("id", "student_id", "name", "email", "program_id", "program")
+
+    def __init__(self, id: int, student_id: str, name: str, email: str, program: ProgramRecord):
+        self.id = id
+        self.student_id = student_id
+        self.name = name
+        self.email = email
+        self.program_id = program.id
+        self.program = program
+
+
+class Transcript:
+    """
+    Completed course ids in enrollment order, and approved substitutions as
+    parallel (id, original, substitute) arrays in substitution order.
+    """
+
+    __slots__ = ("course_ids", "substitution_ids", "original_course_ids", "substitute_course_ids")
+
+    def __init__(self):
+        self.course_ids = array("l")
+        self.substitution_ids = array("l")
+        self.original_course_ids = array("l")
+        self.substitute_course_ids = array("l")
+
+    def add_substitution(self, substitution_id: int, original_course_id: int, substitute_course_id: int) -> None:
+        self.substitution_ids.append(substitution_id)
+        self.original_course_ids.append(original_course_id)
+        self.substitute_course_ids.append(substitute_course_id)
+
+    def substitution_pairs(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.original_course_ids, self.substitute_course_ids)
+
+
+_STUDENT_COLUMNS = (
+    Student.id, Student.student_id, Student.name, Student.email,
+    Program.id, Program.name, Program.code, Program.total_credits_required,
+)
+
+
+def load_students(db: Session, student_ids: Iterable[int]) -> Dict[int, StudentRecord]:
+    """
+    Load students with their programs; unknown ids are simply absent.
+    """
+    student_ids = list(student_ids)
+    if not student_ids:
+        return {}
+    records: Dict[int, StudentRecord] = {}
+    for chunk in _chunks(student_ids):
+        rows = db.execute(
+            select(*_STUDENT_COLUMNS).join(Program, Program.id == Student.program_id).where(Student.id.in_(chunk))
+        )
+        records.update((record.id, record) for record in _student_records(rows))
+    return records
+
+
+def load_program_students(db: Session, program_id: int) -> List[StudentRecord]:
+    """
+    Load every student in a program, ordered by id.
+    """
+    rows = db.execute(
+        select(*_STUDENT_COLUMNS).join(Program, Program.id == Student.program_id).where(
+            Student.program_id == program_id
+        ).order_by(Student.id)
+    )
+    return list(_student_records(rows))
+
+
+def load_program(db: Session, program_id: int) -> Optional[ProgramRecord]:
+    row = db.execute(
+        select(Program.id, Program.name, Program.code, Program.total_credits_required).where(Program.id == program_id)
+    ).first()
+    return ProgramRecord(*row) if row is not None else None
+
+
+def load_transcripts(db: Session, student_ids: Iterable[int]) -> Dict[int, Transcript]:
+    """
+    Load completed course ids and approved substitutions for each student.
+    Every requested id gets a transcript, possibly empty.
+    """
+    transcripts = {student_id: Transcript() for student_id in student_ids}
+    if not transcripts:
+        return transcripts
+    for ids in _chunks(list(transcripts)):
+        rows = db.execute(
+            select(Enrollment.student_id, Enrollment.course_id).where(
+                Enrollment.student_id.in_(ids),
+                Enrollment.completed == True
+            ).order_by(Enrollment.id)
+        )
+        for student_id, course_id in rows:
+            transcripts[student_id].course_ids.append(course_id)
+
+        rows = db.execute(
+            select(
+                Substitution.student_id, Substitution.id,
+                Substitution.original_course_id, Substitution.substitute_course_id
+            ).where(
+                Substitution.student_id.in_(ids),
+                Substitution.approved == True
+            ).order_by(Substitution.id)
+        )
+        for student_id, substitution_id, original_id, substitute_id in rows:
+            transcripts[student_id].add_substitution(substitution_id, original_id, substitute_id)
+
+    return transcripts
+
+
+def _chunks(ids: List[int]) -> Iterator[List[int]]:
+    for start in range(0, len(ids), LOAD_CHUNK_SIZE):
+        yield ids[start:start + LOAD_CHUNK_SIZE]
+
+
+def _student_records(rows: Iterable[tuple]) -> Iterator[StudentRecord]:
+    # Students of the same program share one ProgramRecord.
+    programs: Dict[int, ProgramRecord] = {}
+    for id, student_id, name, email, program_id, program_name, code, total_credits_required in rows:
+        program = programs.get(program_id)
+        if program is None:
+            program = programs[program_id] = ProgramRecord(program_id, program_name, code, total_credits_required)
+        yield StudentRecord(id, student_id, name, email, program)
@@ -0,0 +1,484 @@
+"""
+Persisted per-student, per-requirement audit progress.
+
+Enrollment and substitution writes recompute only the requirements the touched
+courses participate in, and audit reads are assembled from the stored rows
+instead of re-running the engine over every requirement. The same writes keep
+StudentMissingCourse, the course -> students demand index, and each student's
+StudentAuditSummary and the program's analytics counters in step.
+
+The store (and each student's transcript bitset) is kept complete by its
+writers, so demand, unmet, cohort and analytics reads only read it: new students are filled when created, a new
+requirement's program is filled by a background task, seed.py and
+generate_data.py fill what they load, and fill_progress.py fills an existing
+database once.
+"""
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.audit_engine import AuditEngine, AuditInputs
+from app.audit_loader import StudentRecord, load_students
+from app.bitsets import fill_transcript_bits
+from app.catalog import get_catalog
+from app.database import SessionLocal, upsert
+from app.instrumentation import phase
+from app.models import (
+    Program, Student, Substitution, StudentRequirementProgress, StudentMissingCourse,
+    StudentAuditSummary, ProgramAnalyticsCounter
+)
+from app.program_rules import CompiledRequirement, get_program_rules
+from app.substitutions import SubstitutionResolver
+from app.schemas import AuditReport, Course, RequirementProgress
+
+
+def refresh_progress(db: Session, student_id: int, course_ids: Iterable[int]) -> None:
+    """
+    Recompute stored progress for the requirements affected by a write that
+    touched course_ids. The caller flushes the write first and commits after.
+    """
+    program_id = db.query(Student.program_id).filter(Student.id == student_id).scalar()
+    if program_id is None:
+        return
+
+    touched = _touched_courses(db, student_id, set(course_ids))
+    requirement_ids = {
+        requirement.id
+        for requirement in get_program_rules(db, program_id).requirements
+        if requirement.course_ids & touched
+    }
+    if not requirement_ids:
+        return
+
+    _, progress_list = AuditEngine(db).calculate_progress(student_id, requirement_ids)
+    _save_progress(db, {student_id: progress_list})
+
+
+class StoredReportInputs(NamedTuple):
+    """
+    Everything build_stored_report needs for one student, loaded up front.
+    """
+    student: StudentRecord
+    requirements: Sequence[CompiledRequirement]
+    # requirement id -> stored progress columns
+    rows: Mapping[int, tuple]
+    courses_by_id: Mapping[int, Course]
+    # Audit inputs for requirements with no stored row yet, if any
+    unstored: Optional[AuditInputs]
+
+
+def get_stored_report(db: Session, student_id: int) -> AuditReport:
+    """
+    Build an AuditReport from stored progress rows. A requirement with no row
+    yet (a new requirement, before its fill completes) is computed in memory
+    but not stored: this is a read path, safe on a replica, and never writes.
+    Rows are written by enrollment and substitution writes and by fills.
+    """
+    engine = AuditEngine(db)
+    return build_stored_report(engine, load_stored_report(db, student_id))
+
+
+def load_stored_report(db: Session, student_id: int) -> StoredReportInputs:
+    """
+    The session half of get_stored_report: load the student, their stored
+    progress rows and the courses those rows reference.
+    """
+    with phase("load"):
+        student = load_students(db, [student_id]).get(student_id)
+        if not student:
+            raise ValueError(f"Student with id {student_id} not found")
+
+        requirements = get_program_rules(db, student.program_id).requirements
+        rows = {
+            row.requirement_id: row
+            for row in db.query(
+                StudentRequirementProgress.requirement_id, StudentRequirementProgress.credits_completed,
+                StudentRequirementProgress.percentage, StudentRequirementProgress.is_met,
+                StudentRequirementProgress.completed_course_ids, StudentRequirementProgress.missing_course_ids
+            ).filter(StudentRequirementProgress.student_id == student_id)
+        }
+
+    unstored = None
+    if any(requirement.id not in rows for requirement in requirements):
+        unstored = AuditEngine(db).load_audits([student_id])
+
+    course_ids = set()
+    for row in rows.values():
+        course_ids.update(_split_ids(row.completed_course_ids))
+        course_ids.update(_split_ids(row.missing_course_ids))
+    courses_by_id = get_catalog(db, course_ids).courses
+    return StoredReportInputs(student, requirements, rows, courses_by_id, unstored)
+
+
+def build_stored_report(engine: AuditEngine, inputs: StoredReportInputs) -> AuditReport:
+    """
+    The CPU half of get_stored_report. Uses neither the session nor the
+    shared caches, so it can run in a worker thread.
+    """
+    progress_by_requirement: Dict[int, RequirementProgress] = {}
+    if inputs.unstored is not None:
+        report, = engine.evaluate_audits(inputs.unstored)
+        progress_by_requirement.update(
+            (progress.requirement_id, progress) for progress in report.requirements
+            if progress.requirement_id not in inputs.rows
+        )
+
+    for requirement in inputs.requirements:
+        row = inputs.rows.get(requirement.id)
+        if row is None:
+            continue
+        progress_by_requirement[requirement.id] = RequirementProgress(
+            requirement_id=requirement.id,
+            requirement_name=requirement.name,
+            requirement_type=requirement.requirement_type,
+            credits_required=requirement.credits_required,
+            credits_completed=row.credits_completed,
+            percentage=row.percentage,
+            is_met=row.is_met,
+            completed_courses=[inputs.courses_by_id[cid] for cid in _split_ids(row.completed_course_ids)],
+            missing_courses=[inputs.courses_by_id[cid] for cid in _split_ids(row.missing_course_ids)],
+        )
+
+    return engine.assemble_report(
+        inputs.student,
+        inputs.student.program,
+        [progress_by_requirement[requirement.id] for requirement in inputs.requirements],
+    )
+
+
+def store_progress(db: Session, reports: Iterable[AuditReport]) -> None:
+    """
+    Store the progress of reports audited elsewhere (e.g. in a worker
+    thread). The caller commits.
+    """
+    _save_progress(db, {report.student.id: report.requirements for report in reports})
+
+
+def fill_progress(db: Session, student_ids: Iterable[int], chunk_size: int = 500) -> None:
+    """
+    Compute and store progress for every student in student_ids that has no
+    row yet for some requirement of their program, auditing them in batches.
+    Commits if anything was stored.
+    """
+    student_ids = list(student_ids)
+    stored_any = False
+    for start in range(0, len(student_ids), chunk_size):
+        chunk = student_ids[start:start + chunk_size]
+        stored: Dict[int, Set[int]] = defaultdict(set)
+        for student_id, requirement_id in db.query(
+            StudentRequirementProgress.student_id, StudentRequirementProgress.requirement_id
+        ).filter(StudentRequirementProgress.student_id.in_(chunk)):
+            stored[student_id].add(requirement_id)
+
+        incomplete_ids = [
+            student_id
+            for student_id, program_id in db.query(Student.id, Student.program_id).filter(Student.id.in_(chunk))
+            if any(
+                requirement.id not in stored[student_id]
+                for requirement in get_program_rules(db, program_id).requirements
+            )
+        ]
+        reports = AuditEngine(db).run_audits(incomplete_ids)
+        store_progress(db, reports)
+        stored_any = stored_any or bool(reports)
+    if stored_any:
+        db.commit()
+
+
+def recompute_progress(db: Session, student_ids: Iterable[int], chunk_size: int = 500) -> None:
+    """
+    Re-audit students whose inputs changed in bulk and store every
+    requirement's progress, auditing and writing them in batches (a constant
+    number of statements per batch). The caller commits.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    for start in range(0, len(student_ids), chunk_size):
+        reports = AuditEngine(db).run_audits(student_ids[start:start + chunk_size])
+        _save_progress(db, {report.student.id: report.requirements for report in reports})
+
+
+def fill_program_progress(db: Session, program_id: int) -> None:
+    """
+    Make sure every student in a program has a stored row for every
+    requirement and a stored transcript bitset. Rows are unique per (student,
+    requirement), so comparing two counts is enough to skip the fill in the
+    common, complete case.
+    """
+    fill_transcript_bits(db, program_id)
+    db.commit()
+    requirement_count = len(get_program_rules(db, program_id).requirements)
+    student_count = db.query(func.count(Student.id)).filter(Student.program_id == program_id).scalar()
+    stored_count = db.query(func.count(StudentRequirementProgress.id)).join(
+        Student, Student.id == StudentRequirementProgress.student_id
+    ).filter(Student.program_id == program_id).scalar()
+    if stored_count < student_count * requirement_count:
+        fill_progress(db, [
+            student_id for student_id, in db.query(Student.id).filter(Student.program_id == program_id)
+        ])
+
+    summarized_count = db.query(func.count(StudentAuditSummary.id)).filter(
+        StudentAuditSummary.program_id == program_id
+    ).scalar()
+    if summarized_count < student_count:
+        unsummarized = [
+            student_id for student_id, in db.query(Student.id).outerjoin(
+                StudentAuditSummary, StudentAuditSummary.student_id == Student.id
+            ).filter(Student.program_id == program_id, StudentAuditSummary.id == None)
+        ]
+        for start in range(0, len(unsummarized), WRITE_CHUNK_SIZE):
+            _save_summaries(db, unsummarized[start:start + WRITE_CHUNK_SIZE])
+        db.commit()
+
+
+def fill_all_progress(db: Session, program_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    fill_program_progress for every program (or the given ones).
+    """
+    if program_ids is None:
+        program_ids = [program_id for program_id, in db.query(Program.id).order_by(Program.id)]
+    for program_id in program_ids:
+        fill_program_progress(db, program_id)
+
+
+# Background fills of one process run one at a time.
+_fill_lock = threading.Lock()
+
+
+def fill_program_progress_task(program_id: int) -> None:
+    """
+    fill_program_progress in its own session, as a background task after a
+    requirement is added (Starlette runs sync tasks in a worker thread).
+    """
+    with _fill_lock:
+        db = SessionLocal()
+        try:
+            fill_program_progress(db, program_id)
+        finally:
+            db.close()
+
+
+def _touched_courses(db: Session, student_id: int, course_ids: Set[int]) -> Set[int]:
+    """
+    Expand touched courses with the originals they stand in for through the
+    student's approved substitutions.
+    """
+    resolver = SubstitutionResolver(db.query(
+        Substitution.original_course_id, Substitution.substitute_course_id
+    ).filter(
+        Substitution.student_id == student_id,
+        Substitution.approved == True
+    ).all())
+    touched = set(course_ids)
+    for course_id in course_ids:
+        touched.update(resolver.originals_for(course_id))
+    return touched
+
+
+# Rows per multi-row INSERT of the set-based writes
+WRITE_CHUNK_SIZE = 500
+
+
+def _save_progress(db: Session, progress_by_student: Dict[int, List[RequirementProgress]]) -> None:
+    """
+    Store requirement progress of many students with set-based statements: one
+    multi-row upsert of the progress rows per WRITE_CHUNK_SIZE, one read, delete
+    and insert for the demand index, then _save_summaries. Rows are written
+    with Core, so store objects already loaded in the session are expired.
+    """
+    if not progress_by_student:
+        return
+    rows = [
+        {
+            "student_id": student_id,
+            "requirement_id": progress.requirement_id,
+            "credits_completed": progress.credits_completed,
+            "percentage": progress.percentage,
+            "is_met": progress.is_met,
+            "completed_course_ids": _join_ids(course.id for course in progress.completed_courses),
+            "missing_course_ids": _join_ids(course.id for course in progress.missing_courses),
+        }
+        for student_id, progress_list in progress_by_student.items()
+        for progress in progress_list
+    ]
+    table = StudentRequirementProgress.__table__
+    for start in range(0, len(rows), WRITE_CHUNK_SIZE):
+        stmt = upsert(db, table).values(rows[start:start + WRITE_CHUNK_SIZE])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["student_id", "requirement_id"],
+            set_={
+                column: stmt.excluded[column]
+                for column in ("credits_completed", "percentage", "is_met", "completed_course_ids", "missing_course_ids")
+            },
+        ))
+
+    # Demand index: missing courses of unmet requirements only. Every student
+    # is written for their own program's requirements, so the pairs below are
+    # exactly the (student, requirement) pairs being saved.
+    student_ids = list(progress_by_student)
+    requirement_ids = {row["requirement_id"] for row in rows}
+    needed = {
+        (student_id, progress.requirement_id, course.id)
+        for student_id, progress_list in progress_by_student.items()
+        for progress in progress_list if not progress.is_met
+        for course in progress.missing_courses
+    }
+    stale_ids = []
+    for row_id, *key in db.query(
+        StudentMissingCourse.id, StudentMissingCourse.student_id,
+        StudentMissingCourse.requirement_id, StudentMissingCourse.course_id
+    ).filter(
+        StudentMissingCourse.student_id.in_(student_ids),
+        StudentMissingCourse.requirement_id.in_(requirement_ids)
+    ):
+        key = tuple(key)
+        if key in needed:
+            needed.discard(key)
+        else:
+            stale_ids.append(row_id)
+    for start in range(0, len(stale_ids), WRITE_CHUNK_SIZE):
+        db.query(StudentMissingCourse).filter(
+            StudentMissingCourse.id.in_(stale_ids[start:start + WRITE_CHUNK_SIZE])
+        ).delete(synchronize_session=False)
+    needed_rows = [
+        {"student_id": student_id, "requirement_id": requirement_id, "course_id": course_id}
+        for student_id, requirement_id, course_id in sorted(needed)
+    ]
+    for start in range(0, len(needed_rows), WRITE_CHUNK_SIZE):
+        db.execute(StudentMissingCourse.__table__.insert().values(needed_rows[start:start + WRITE_CHUNK_SIZE]))
+
+    _expire_stored(db)
+    _save_summaries(db, student_ids)
+
+
+def _expire_stored(db: Session) -> None:
+    for instance in list(db.identity_map.values()):
+        if isinstance(instance, (StudentRequirementProgress, StudentMissingCourse, StudentAuditSummary)):
+            db.expire(instance)
+
+
+# Completion bands of the per-requirement analytics histogram
+BANDS = ("0-25", "25-50", "50-75", "75-100", "met")
+
+
+def completion_band(percentage: float, is_met: bool) -> str:
+    if is_met:
+        return "met"
+    return BANDS[min(int(percentage // 25), 3)]
+
+
+def credits_bucket(total_credits_completed: float) -> str:
+    """
+    Bucket of the "credits" histogram: completed credits in hundredths, so
+    every distinct total keeps its own bucket.
+    """
+    return str(round(total_credits_completed * 100))
+
+
+def _save_summaries(db: Session, student_ids: Iterable[int]) -> None:
+    """
+    Recompute the summaries of many students from their stored progress rows
+    and apply the differences to the programs' analytics counters: one read
+    each of students, progress rows and summaries, one summary upsert per
+    WRITE_CHUNK_SIZE and one counter upsert. Students with rows missing are
+    left alone until a fill completes them.
+    """
+    students = load_students(db, student_ids)
+    if not students:
+        return
+    # The counters are moved by (new - previous), so the previous summaries are
+    # locked until commit: a concurrent writer waits and then reads ours. They
+    # are locked in id order, and before the progress rows are read.
+    previous = {
+        summary.student_id: summary
+        for summary in db.query(
+            StudentAuditSummary.student_id, StudentAuditSummary.program_id, StudentAuditSummary.status,
+            StudentAuditSummary.total_credits_completed, StudentAuditSummary.requirement_bands
+        ).filter(
+            StudentAuditSummary.student_id.in_(list(students))
+        ).order_by(StudentAuditSummary.student_id).with_for_update()
+    }
+    rows: Dict[int, Dict[int, tuple]] = defaultdict(dict)
+    for row in db.query(
+        StudentRequirementProgress.student_id, StudentRequirementProgress.requirement_id,
+        StudentRequirementProgress.credits_completed, StudentRequirementProgress.percentage,
+        StudentRequirementProgress.is_met
+    ).filter(StudentRequirementProgress.student_id.in_(list(students))):
+        rows[row.student_id][row.requirement_id] = row
+
+    engine = AuditEngine(db)
+    summaries = []
+    deltas: Counter = Counter()
+    for student_id, student in students.items():
+        requirements = get_program_rules(db, student.program_id).requirements
+        stored = rows[student_id]
+        if any(requirement.id not in stored for requirement in requirements):
+            continue
+        ordered = [stored[requirement.id] for requirement in requirements]
+        total_credits_completed, _, _, status = engine.summarize(student.program.total_credits_required, ordered)
+        bands = [(row.requirement_id, completion_band(row.percentage, row.is_met)) for row in ordered]
+
+        summary = previous.get(student_id)
+        if summary is not None:
+            deltas[(summary.program_id, "status", summary.status)] -= 1
+            deltas[(summary.program_id, "credits", credits_bucket(summary.total_credits_completed))] -= 1
+            for requirement_id, band in _split_bands(summary.requirement_bands):
+                deltas[(summary.program_id, f"requirement:{requirement_id}", band)] -= 1
+        deltas[(student.program_id, "status", status)] += 1
+        deltas[(student.program_id, "credits", credits_bucket(total_credits_completed))] += 1
+        for requirement_id, band in bands:
+            deltas[(student.program_id, f"requirement:{requirement_id}", band)] += 1
+        summaries.append({
+            "student_id": student_id,
+            "program_id": student.program_id,
+            "status": status,
+            "total_credits_completed": total_credits_completed,
+            "requirement_bands": ",".join(f"{requirement_id}:{band}" for requirement_id, band in bands),
+        })
+
+    table = StudentAuditSummary.__table__
+    for start in range(0, len(summaries), WRITE_CHUNK_SIZE):
+        stmt = upsert(db, table).values(summaries[start:start + WRITE_CHUNK_SIZE])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["student_id"],
+            set_={
+                column: stmt.excluded[column]
+                for column in ("program_id", "status", "total_credits_completed", "requirement_bands")
+            },
+        ))
+    _bump_counters(db, {key: delta for key, delta in deltas.items() if delta})
+
+
+def _bump_counters(db: Session, deltas: Dict[Tuple[int, str, str], int]) -> None:
+    """
+    Add deltas keyed (program_id, metric, bucket) to the analytics counters.
+    """
+    if not deltas:
+        return
+    stmt = upsert(db, ProgramAnalyticsCounter.__table__).values([
+        {"program_id": program_id, "metric": metric, "bucket": bucket, "count": delta}
+        for (program_id, metric, bucket), delta in sorted(deltas.items())
+    ])
+    # Increment in SQL so concurrent writers never overwrite each other's counts.
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["program_id", "metric", "bucket"],
+        set_={"count": ProgramAnalyticsCounter.__table__.c["count"] + stmt.excluded["count"]},
+    ))
+
+
+def _split_bands(value: str) -> List[Tuple[int, str]]:
+    pairs = []
+    for pair in value.split(",") if value else []:
+        requirement_id, band = pair.split(":")
+        pairs.append((int(requirement_id), band))
+    return pairs
+
+
+def _join_ids(ids: Iterable[int]) -> str:
+    return ",".join(str(i) for i in ids)
+
+
+def _split_ids(value: str) -> List[int]:
+    return [int(i) for i in value.split(",")] if value else []
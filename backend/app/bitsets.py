@@ -0,0 +1,233 @@
+"""
+Bitset transcripts for cohort-scale queries.
+
+Each student's completed courses are one integer bitset (bit n set <=> course
+id n completed), persisted in student_transcript_bits by the writers of
+students and enrollments; reads build a missing bitset in memory from
+Enrollment without storing it. Cohort questions ("who is missing
+CS180", "who has met Core but not Math") load a program's bitsets as one
+student x byte matrix and answer them with numpy column operations, so no
+step loops over students in Python; the result is a bitset of students (bit n
+set <=> student id n).
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.catalog import get_catalog
+from app.database import upsert
+from app.models import Student, Program, Enrollment, StudentRequirementProgress, StudentTranscriptBits
+from app.program_rules import get_program_rules
+
+
+def to_mask(ids: Iterable[int]) -> int:
+    ids = np.fromiter(ids, dtype=np.int64)
+    if not len(ids):
+        return 0
+    flags = np.zeros(int(ids.max()) + 1, dtype=np.uint8)
+    flags[ids] = 1
+    return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+
+
+def bit_positions(mask: int) -> np.ndarray:
+    """
+    Positions of the set bits of mask, in ascending order.
+    """
+    if not mask:
+        return np.empty(0, dtype=np.int64)
+    raw = np.frombuffer(mask.to_bytes((mask.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little"))
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """
+    Yield the positions of the set bits of mask, in ascending order.
+    """
+    return iter(bit_positions(mask).tolist())
+
+
+def popcount(mask: int) -> int:
+    return mask.bit_count()
+
+
+def page_of_bits(mask: int, after: Optional[int], limit: int) -> Tuple[List[int], Optional[int]]:
+    """
+    Up to limit set-bit positions greater than after, and the position to
+    pass as after for the next page (None on the last page).
+    """
+    start = after + 1 if after is not None else 0
+    positions = bit_positions(mask >> start)[:limit + 1] + start
+    if len(positions) > limit:
+        return positions[:limit].tolist(), int(positions[limit - 1])
+    return positions.tolist(), None
+
+
+def refresh_transcript_bits(db: Session, student_id: int) -> None:
+    """
+    Rebuild a student's stored bitset from Enrollment. The caller flushes the
+    enrollment write first and commits after.
+    """
+    bits = _completed_bits(db, [student_id]).get(student_id, 0)
+    row = db.query(StudentTranscriptBits).filter(StudentTranscriptBits.student_id == student_id).first()
+    if row is None:
+        row = StudentTranscriptBits(student_id=student_id)
+        db.add(row)
+    row.completed_courses = _to_bytes(bits)
+
+
+def rebuild_transcript_bits(db: Session, student_ids: Iterable[int], chunk_size: int = 500) -> None:
+    """
+    refresh_transcript_bits for many students at once, as set-based upserts.
+    The caller commits.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    table = StudentTranscriptBits.__table__
+    for start in range(0, len(student_ids), chunk_size):
+        chunk = student_ids[start:start + chunk_size]
+        bits = _completed_bits(db, chunk)
+        stmt = upsert(db, table).values([
+            {"student_id": student_id, "completed_courses": _to_bytes(bits.get(student_id, 0))}
+            for student_id in chunk
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["student_id"],
+            set_={"completed_courses": stmt.excluded["completed_courses"]},
+        ))
+
+
+def fill_transcript_bits(db: Session, program_id: int) -> None:
+    """
+    Store the bitsets of a program's students that have none yet. The caller
+    commits.
+    """
+    rebuild_transcript_bits(db, [
+        student_id for student_id, in db.query(Student.id).outerjoin(
+            StudentTranscriptBits, StudentTranscriptBits.student_id == Student.id
+        ).filter(Student.program_id == program_id, StudentTranscriptBits.id == None)
+    ])
+
+
+def load_transcript_bits(db: Session, program_id: int) -> Dict[int, int]:
+    """
+    Return {student id: completed course bitset} for every student in a
+    program, building the bitsets that are missing in memory.
+    """
+    return {student_id: _from_bytes(value) for student_id, value in _load_transcript_bytes(db, program_id).items()}
+
+
+def load_transcript_matrix(db: Session, program_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Student ids of a program (ascending) and their bitsets as a uint8 matrix,
+    one row per student (byte k of a row holds course ids 8k..8k+7).
+    """
+    transcripts = _load_transcript_bytes(db, program_id)
+    student_ids = np.fromiter(transcripts, dtype=np.int64, count=len(transcripts))
+    order = np.argsort(student_ids)
+    width = max((len(value) for value in transcripts.values()), default=0)
+    raw = b"".join(value.ljust(width, b"\0") for value in transcripts.values())
+    matrix = np.frombuffer(raw, dtype=np.uint8).reshape(len(transcripts), width)
+    return student_ids[order], matrix[order]
+
+
+def _load_transcript_bytes(db: Session, program_id: int) -> Dict[int, bytes]:
+    transcripts = dict(
+        db.query(Student.id, StudentTranscriptBits.completed_courses).outerjoin(
+            StudentTranscriptBits, StudentTranscriptBits.student_id == Student.id
+        ).filter(Student.program_id == program_id)
+    )
+    unbuilt_ids = [student_id for student_id, value in transcripts.items() if value is None]
+    # A read never writes: concurrent reads would race to insert the same row.
+    built = _completed_bits(db, unbuilt_ids)
+    for student_id in unbuilt_ids:
+        transcripts[student_id] = _to_bytes(built.get(student_id, 0))
+    return transcripts
+
+
+def query_cohort(
+    db: Session,
+    program_id: int,
+    completed: Iterable[int] = (),
+    missing: Iterable[int] = (),
+    met: Iterable[int] = (),
+    unmet: Iterable[int] = (),
+) -> int:
+    """
+    Bitset of the students in a program who completed every course in completed,
+    none of the courses in missing, met every requirement in met and none of
+    the requirements in unmet.
+    """
+    if db.query(Program.id).filter(Program.id == program_id).first() is None:
+        raise ValueError(f"Program with id {program_id} not found")
+    completed, missing, met, unmet = list(completed), list(missing), list(met), list(unmet)
+
+    catalog = get_catalog(db, completed + missing).courses
+    unknown_courses = [cid for cid in completed + missing if cid not in catalog]
+    if unknown_courses:
+        raise ValueError(f"Courses with ids {unknown_courses} not found")
+    requirement_ids = {requirement.id for requirement in get_program_rules(db, program_id).requirements}
+    unknown_requirements = [rid for rid in met + unmet if rid not in requirement_ids]
+    if unknown_requirements:
+        raise ValueError(f"Requirements with ids {unknown_requirements} not found in program {program_id}")
+
+    student_ids, matrix = load_transcript_matrix(db, program_id)
+    keep = np.ones(len(student_ids), dtype=bool)
+    for course_id in completed:
+        keep &= _course_column(matrix, course_id)
+    for course_id in missing:
+        keep &= ~_course_column(matrix, course_id)
+
+    if keep.any() and (met or unmet):
+        met_students = _met_students(db, set(met + unmet))
+        empty = np.empty(0, dtype=np.int64)
+        for requirement_id in met:
+            keep &= np.isin(student_ids, met_students.get(requirement_id, empty))
+        for requirement_id in unmet:
+            keep &= ~np.isin(student_ids, met_students.get(requirement_id, empty))
+
+    return to_mask(student_ids[keep])
+
+
+def _course_column(matrix: np.ndarray, course_id: int) -> np.ndarray:
+    """
+    Boolean column: which rows of a transcript matrix have course_id completed.
+    """
+    byte, bit = divmod(course_id, 8)
+    if byte >= matrix.shape[1]:
+        return np.zeros(matrix.shape[0], dtype=bool)
+    return (matrix[:, byte] >> bit & 1).astype(bool)
+
+
+def _met_students(db: Session, requirement_ids: Iterable[int]) -> Dict[int, np.ndarray]:
+    """
+    {requirement id: ids of students who met it}, from stored progress.
+    """
+    rows = np.array(db.query(
+        StudentRequirementProgress.requirement_id, StudentRequirementProgress.student_id
+    ).filter(
+        StudentRequirementProgress.requirement_id.in_(list(requirement_ids)),
+        StudentRequirementProgress.is_met == True
+    ).all(), dtype=np.int64).reshape(-1, 2)
+    return {
+        int(requirement_id): rows[rows[:, 0] == requirement_id, 1]
+        for requirement_id in np.unique(rows[:, 0])
+    }
+
+
+def _completed_bits(db: Session, student_ids: List[int]) -> Dict[int, int]:
+    bits: Dict[int, int] = {}
+    for start in range(0, len(student_ids), 500):
+        for student_id, course_id in db.query(Enrollment.student_id, Enrollment.course_id).filter(
+            Enrollment.student_id.in_(student_ids[start:start + 500]),
+            Enrollment.completed == True
+        ):
+            bits[student_id] = bits.get(student_id, 0) | (1 << course_id)
+    return bits
+
+
+def _to_bytes(bits: int) -> bytes:
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def _from_bytes(value: bytes) -> int:
+    return int.from_bytes(value, "little")
@@ -0,0 +1,264 @@
+"""
+Bulk enrollment loading (term-end grade loads).
+
+Rows arrive as NDJSON or CSV, one record per line, and are processed in
+batches: each batch is validated, de-duplicated on the enrollment key
+(student, course, semester, year) and upserted in one statement, so loading
+the same file twice leaves the table unchanged. On PostgreSQL a batch is
+COPYed into a temporary staging table and merged with a single
+INSERT ... SELECT ... ON CONFLICT; other backends use multi-row upserts.
+Stored progress, transcript bitsets and summaries of the affected students
+are recomputed once, after the last batch.
+"""
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+from app.audit_store import recompute_progress
+from app.bitsets import rebuild_transcript_bits
+from app.catalog import get_catalog
+from app.database import upsert
+from app.models import Student, Enrollment
+from app.schemas import EnrollmentCreate, BulkEnrollmentError, BulkEnrollmentResult
+
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+ENROLLMENT_KEY = ("student_id", "course_id", "semester", "year")
+ENROLLMENT_COLUMNS = ("student_id", "course_id", "grade", "semester", "year", "completed")
+UPSERT_CHUNK_SIZE = 500
+
+CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+
+def bulk_format(content_type: Optional[str]) -> Optional[str]:
+    """
+    Map a request Content-Type to "ndjson" or "csv" (None if unsupported).
+    """
+    if not content_type:
+        return None
+    return CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+async def numbered_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Split a byte stream into (1-based line number, line) pairs without
+    holding more than one chunk plus a partial line in memory.
+    """
+    pending = b""
+    number = 0
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, line.rstrip(b"\r")
+    if pending:
+        yield number + 1, pending.rstrip(b"\r")
+
+
+class LoadReport:
+    """
+    Counts and per-line errors of one load, shared by its pipeline stages.
+    Only the first MAX_REPORTED_ERRORS errors are kept.
+    """
+
+    def __init__(self):
+        self.received = 0
+        # Rows written, counted per batch: a key repeated within a batch is one
+        # row, one repeated in a later batch is written (and counted) again.
+        self.loaded = 0
+        self.failed = 0
+        self.errors: List[BulkEnrollmentError] = []
+        self.student_ids: Set[int] = set()
+
+    def fail(self, line_number: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(BulkEnrollmentError(line=line_number, error=error))
+
+    def result(self) -> BulkEnrollmentResult:
+        return BulkEnrollmentResult(
+            received=self.received,
+            loaded=self.loaded,
+            failed=self.failed,
+            students_affected=len(self.student_ids),
+            errors=sorted(self.errors, key=lambda error: error.line),
+        )
+
+
+class RecordParser:
+    """
+    Turns numbered NDJSON/CSV lines into (line number, dict) records. Keeps
+    the CSV header between calls, so a stream can be parsed in pieces.
+    """
+
+    def __init__(self, format: str, report: LoadReport):
+        if format not in ("ndjson", "csv"):
+            raise ValueError(f"Unsupported bulk format {format!r}")
+        self.format = format
+        self.report = report
+        self.header: Optional[List[str]] = None
+
+    def parse(self, lines: Iterable[Tuple[int, bytes]]) -> Iterator[Tuple[int, dict]]:
+        for line_number, line in lines:
+            if not line.strip():
+                continue
+            if self.format == "csv" and self.header is None:
+                self.header = [name.strip() for name in next(csv.reader([line.decode("utf-8-sig")]))]
+                continue
+            self.report.received += 1
+            try:
+                yield line_number, self._parse_line(line)
+            except ValueError as e:
+                self.report.fail(line_number, f"Malformed {self.format} line: {e}")
+
+    def _parse_line(self, line: bytes) -> dict:
+        if self.format == "ndjson":
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            return record
+        values = next(csv.reader([line.decode("utf-8")]))
+        if len(values) != len(self.header):
+            raise ValueError(f"expected {len(self.header)} columns, found {len(values)}")
+        # Empty cells fall back to the field defaults.
+        return {name: value for name, value in zip(self.header, values) if value != ""}
+
+
+def validate_records(db: Session, records: List[Tuple[int, dict]], report: LoadReport) -> List[dict]:
+    """
+    Validate a batch of records as EnrollmentCreate against existing students
+    and catalog courses. Returns the valid rows, unique on the enrollment key
+    (later lines win, as they would if loaded one by one).
+    """
+    validated = []
+    for line_number, record in records:
+        try:
+            validated.append((line_number, EnrollmentCreate.model_validate(record).model_dump()))
+        except ValidationError as e:
+            report.fail(line_number, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+
+    student_ids = {row["student_id"] for _, row in validated}
+    known_students = {
+        student_id for student_id, in db.query(Student.id).filter(Student.id.in_(student_ids))
+    } if student_ids else set()
+    known_courses = get_catalog(db, {row["course_id"] for _, row in validated}).courses
+    rows: Dict[Tuple, dict] = {}
+    for line_number, row in validated:
+        if row["student_id"] not in known_students:
+            report.fail(line_number, f"Student with id {row['student_id']} not found")
+        elif row["course_id"] not in known_courses:
+            report.fail(line_number, f"Course with id {row['course_id']} not found")
+        else:
+            rows[tuple(row[column] for column in ENROLLMENT_KEY)] = row
+            report.student_ids.add(row["student_id"])
+    report.loaded += len(rows)
+    return list(rows.values())
+
+
+class EnrollmentBulkLoader:
+    """
+    Loads numbered NDJSON/CSV lines batch by batch into one open transaction.
+
+    Call load_lines(db, lines) per batch, then finish(db) once; the caller
+    commits. Invalid rows are skipped and reported, valid rows are loaded.
+    """
+
+    def __init__(self, format: str):
+        self.report = LoadReport()
+        self.parser = RecordParser(format, self.report)
+
+    @property
+    def student_ids(self) -> Set[int]:
+        return self.report.student_ids
+
+    def load_lines(self, db: Session, lines: List[Tuple[int, bytes]]) -> None:
+        rows = validate_records(db, list(self.parser.parse(lines)), self.report)
+        if rows:
+            upsert_enrollments(db, rows)
+
+    def finish(self, db: Session) -> BulkEnrollmentResult:
+        """
+        Bring stored progress, summaries and transcript bitsets of every
+        affected student up to date, in batches.
+        """
+        if self.student_ids:
+            recompute_progress(db, sorted(self.student_ids))
+            rebuild_transcript_bits(db, sorted(self.student_ids))
+        return self.report.result()
+
+
+def upsert_enrollments(db: Session, rows: List[dict]) -> None:
+    """
+    Insert or update enrollments keyed on (student, course, semester, year).
+    rows must be unique on that key.
+    """
+    if db.get_bind().dialect.name == "postgresql" and _copy_into_staging(db, rows):
+        columns = ", ".join(ENROLLMENT_COLUMNS)
+        db.connection().exec_driver_sql(
+            f"INSERT INTO enrollments ({columns}) SELECT {columns} FROM enrollment_staging "
+            f"ON CONFLICT ({', '.join(ENROLLMENT_KEY)}) "
+            "DO UPDATE SET grade = EXCLUDED.grade, completed = EXCLUDED.completed"
+        )
+        return
+
+    table = Enrollment.__table__
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = upsert(db, table).values([
+            {column: row[column] for column in ENROLLMENT_COLUMNS}
+            for row in rows[start:start + UPSERT_CHUNK_SIZE]
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=list(ENROLLMENT_KEY),
+            set_={"grade": stmt.excluded.grade, "completed": stmt.excluded.completed},
+        ))
+
+
+def _copy_into_staging(db: Session, rows: List[dict]) -> bool:
+    """
+    COPY rows into a transaction-scoped staging table. Returns False if the
+    driver has no COPY support, leaving the caller to upsert directly.
+    """
+    connection = db.connection()
+    driver = connection.dialect.driver
+    if driver not in ("asyncpg", "psycopg2"):
+        return False
+
+    connection.exec_driver_sql(
+        "CREATE TEMPORARY TABLE IF NOT EXISTS enrollment_staging ("
+        "student_id integer, course_id integer, grade varchar, semester varchar, year integer, completed boolean"
+        ") ON COMMIT DROP"
+    )
+    connection.exec_driver_sql("TRUNCATE enrollment_staging")
+    records = [tuple(row[column] for column in ENROLLMENT_COLUMNS) for row in rows]
+    driver_connection = connection.connection.driver_connection
+    if driver == "asyncpg":
+        # The sync Session runs inside the async engine's greenlet.
+        await_only(driver_connection.copy_records_to_table(
+            "enrollment_staging", records=records, columns=list(ENROLLMENT_COLUMNS)
+        ))
+    else:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in records:
+            writer.writerow(["\\N" if value is None else value for value in record])
+        buffer.seek(0)
+        with driver_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY enrollment_staging ({', '.join(ENROLLMENT_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+    return True
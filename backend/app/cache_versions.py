@@ -0,0 +1,68 @@
+"""
+Cross-process invalidation of the in-process caches.
+
+Compiled program rules (app.program_rules) and the catalog snapshot
+(app.catalog) are held by every worker process. Writes that change them bump
+a counter in cache_versions inside the same transaction, and each process
+re-reads the (small) table at most every CACHE_VERSION_CHECK_SECONDS, so a
+requirement or course created through one worker reaches the others within
+that interval. The writing process expires its copy immediately.
+
+A cache's version is its own counter plus the "all" counter, which reloads
+(seed.py, generate_data.py) bump to invalidate everything at once.
+"""
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import primary_reads, upsert
+from app.models import CacheVersion
+
+settings = get_settings()
+
+ALL_KEY = "all"
+CATALOG_KEY = "catalog"
+
+_lock = threading.Lock()
+_versions: Dict[str, int] = {}
+_checked_at = float("-inf")
+
+
+def program_key(program_id: int) -> str:
+    return f"program:{program_id}"
+
+
+def bump_version(db: Session, key: str) -> None:
+    """
+    Increment a cache's version as part of the caller's transaction.
+    """
+    table = CacheVersion.__table__
+    stmt = upsert(db, table).values(key=key, version=1)
+    db.execute(stmt.on_conflict_do_update(index_elements=["key"], set_={"version": table.c.version + 1}))
+
+
+def cache_version(db: Session, key: str) -> int:
+    """
+    The shared version of one cache, as of the last check (re-read from the
+    primary when older than CACHE_VERSION_CHECK_SECONDS).
+    """
+    global _versions, _checked_at
+    if time.monotonic() - _checked_at >= settings.CACHE_VERSION_CHECK_SECONDS:
+        with primary_reads(db):
+            versions = dict(db.query(CacheVersion.key, CacheVersion.version))
+        with _lock:
+            _versions, _checked_at = versions, time.monotonic()
+    versions = _versions
+    return versions.get(ALL_KEY, 0) + versions.get(key, 0)
+
+
+def expire_versions() -> None:
+    """
+    Re-read the versions on next use, e.g. right after committing a bump.
+    """
+    global _checked_at
+    with _lock:
+        _checked_at = float("-inf")
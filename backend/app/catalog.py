@@ -0,0 +1,112 @@
+"""
+Versioned, immutable in-process snapshot of the course catalog.
+
+Audits resolve completed and missing courses from the snapshot instead of
+querying Course and re-serializing the same rows on every request; each
+course is also kept pre-encoded as JSON for splicing into responses. The
+snapshot is rebuilt and swapped in as a whole when the catalog's shared
+version (app.cache_versions) moves, so readers always see one consistent
+version. Its version is a digest of its contents: it only changes when the
+catalog does, and is the same in every process.
+"""
+import hashlib
+import threading
+from types import MappingProxyType
+from typing import Iterable, Mapping, NamedTuple, Optional, Set
+
+import orjson
+from sqlalchemy.orm import Session
+
+from app.cache_versions import CATALOG_KEY, cache_version
+from app.database import primary_reads
+from app.models import Course
+from app.schemas import Course as CourseSchema
+
+# Bound on remembered unknown course ids (see get_catalog)
+MAX_MISSING_IDS = 10000
+
+
+class CatalogSnapshot(NamedTuple):
+    # Digest of the catalog's contents
+    version: str
+    # Shared version (app.cache_versions) the snapshot was built at
+    shared_version: int
+    courses: Mapping[int, CourseSchema]
+    fragments: Mapping[int, bytes]
+    # course_code -> course id
+    codes: Mapping[str, int]
+
+
+_lock = threading.Lock()
+_snapshot: Optional[CatalogSnapshot] = None
+# Course ids known not to exist as of the current snapshot
+_missing_ids: Set[int] = set()
+
+
+def get_catalog(db: Session, course_ids: Iterable[int] = ()) -> CatalogSnapshot:
+    """
+    Return the current snapshot, building it on first use or when the shared
+    catalog version has moved on. Ids the snapshot does not know are checked
+    with one existence query and remembered as missing, so a bogus id never
+    forces a rebuild; only a course that exists but is not in the snapshot
+    yet (created by another process within CACHE_VERSION_CHECK_SECONDS) does.
+    """
+    snapshot = _snapshot
+    if snapshot is None or snapshot.shared_version != cache_version(db, CATALOG_KEY):
+        return refresh_catalog(db)
+
+    unknown_ids = {
+        course_id for course_id in course_ids
+        if course_id not in snapshot.courses and course_id not in _missing_ids
+    }
+    if unknown_ids:
+        with primary_reads(db):
+            exists = db.query(Course.id).filter(Course.id.in_(unknown_ids)).first() is not None
+        if exists:
+            return refresh_catalog(db)
+        with _lock:
+            if len(_missing_ids) + len(unknown_ids) > MAX_MISSING_IDS:
+                _missing_ids.clear()
+            _missing_ids.update(unknown_ids)
+    return snapshot
+
+
+def current_catalog() -> Optional[CatalogSnapshot]:
+    """
+    Return the current snapshot without building or refreshing it.
+    """
+    return _snapshot
+
+
+def refresh_catalog(db: Session) -> CatalogSnapshot:
+    """
+    Rebuild the snapshot from the database and swap it in atomically. If the
+    contents did not change, the current snapshot (and version) is kept.
+    """
+    global _snapshot
+    with primary_reads(db):
+        # Read the shared version first: a write committed after it is
+        # caught by the next version check.
+        shared_version = cache_version(db, CATALOG_KEY)
+        courses = db.query(Course).order_by(Course.id).all()
+    schemas = {course.id: CourseSchema.from_orm(course) for course in courses}
+    fragments = {course_id: orjson.dumps(schema.model_dump()) for course_id, schema in schemas.items()}
+    digest = hashlib.sha256()
+    for fragment in fragments.values():
+        digest.update(fragment)
+        digest.update(b"\n")
+    version = digest.hexdigest()[:16]
+
+    with _lock:
+        if _snapshot is not None and _snapshot.version == version:
+            _snapshot = _snapshot._replace(shared_version=shared_version)
+        else:
+            _snapshot = CatalogSnapshot(
+                version,
+                shared_version,
+                MappingProxyType(schemas),
+                MappingProxyType(fragments),
+                MappingProxyType({schema.course_code: course_id for course_id, schema in schemas.items()}),
+            )
+        _missing_ids.clear()
+        return _snapshot
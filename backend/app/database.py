@@ -1,15 +1,144 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.concurrency import run_in_threadpool
 from app.config import get_settings
+from app.instrumentation import instrument_engine
 
 settings = get_settings()
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# asyncio drivers used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Derive an asyncio URL from a sync DATABASE_URL by swapping the driver.
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()!r}")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def engine_options(url: str) -> dict:
+    """
+    Pool and timeout options from Settings for an engine on url. SQLite has
+    no server-side pool or statement timeout, so it only gets pre-ping.
+    """
+    parsed = make_url(url)
+    options: dict = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if parsed.get_backend_name() != "postgresql":
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if parsed.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica engine in info["replica"], when
+    one is set, and flushes and INSERT/UPDATE/DELETE statements to the
+    primary it is bound to.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is None or self._flushing or isinstance(clause, UpdateBase):
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        return replica
+
+
+@contextmanager
+def primary_reads(db: Session):
+    """
+    Temporarily read from the primary, e.g. to build process-wide caches that
+    must never be populated from a lagging replica.
+    """
+    replica = db.info.pop("replica", None)
+    try:
+        yield db
+    finally:
+        if replica is not None:
+            db.info["replica"] = replica
+
+
+# Sync engine: scripts, jobs and table creation.
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
+
+# Async engine: the request path. Objects stay usable after commit so routes
+# never trigger lazy IO outside the event loop.
+_async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, sync_session_class=RoutingSession
+)
+
+# Read replicas for read-only routes (see get_async_read_db).
+async_replica_engines: List[AsyncEngine] = [
+    create_async_engine(async_database_url(url), **engine_options(async_database_url(url)))
+    for url in (url.strip() for url in settings.DATABASE_REPLICA_URLS.split(","))
+    if url
+]
+_replica_cycle = itertools.cycle(async_replica_engines)
+
+# Per-request query counts and timings (app.instrumentation)
+for _engine in (engine, async_engine.sync_engine, *(replica.sync_engine for replica in async_replica_engines)):
+    instrument_engine(_engine)
+# engine -> (checked at, usable)
+_replica_health: Dict[AsyncEngine, Tuple[float, bool]] = {}
+
+# Seconds of replay lag on a Postgres standby; 0 when it has replayed
+# everything it received, NULL (treated as 0) when it is not a standby.
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
 
 Base = declarative_base()
 
+# insert() constructs that support ON CONFLICT, per backend
+UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def upsert(db: Session, table):
+    """
+    Return an INSERT for table that supports on_conflict_do_update /
+    on_conflict_do_nothing on the session's backend.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_DIALECTS:
+        raise ValueError(f"Upserts are not supported on {dialect!r}")
+    return UPSERT_DIALECTS[dialect](table)
+
 
 def get_db():
     db = SessionLocal()
@@ -17,3 +146,78 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def worker_session() -> AsyncIterator[Session]:
+    """
+    Sync Session for ORM- and CPU-heavy work a route hands to threadpool
+    workers (run_in_threadpool(fn, db, ...)), keeping it off the event loop.
+    Calls must not overlap: a Session is not safe for concurrent use.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def get_async_read_db():
+    """
+    Session for read-only routes: reads go to a fresh replica when one is
+    available, otherwise to the primary. Writes always go to the primary.
+    """
+    async with read_session() as db:
+        yield db
+
+
+@asynccontextmanager
+async def read_session():
+    """
+    get_async_read_db as a context manager, for work that outlives the
+    request's dependencies (e.g. streaming response bodies).
+    """
+    async with AsyncSessionLocal() as db:
+        replica = await fresh_replica()
+        if replica is not None:
+            db.info["replica"] = replica.sync_engine
+        yield db
+
+
+async def fresh_replica() -> Optional[AsyncEngine]:
+    """
+    Next replica (round robin) whose lag is within REPLICA_MAX_LAG_SECONDS.
+    Each replica's health is checked at most once per
+    REPLICA_CHECK_INTERVAL_SECONDS.
+    """
+    for _ in range(len(async_replica_engines)):
+        replica = next(_replica_cycle)
+        checked_at, usable = _replica_health.get(replica, (float("-inf"), False))
+        if time.monotonic() - checked_at >= settings.REPLICA_CHECK_INTERVAL_SECONDS:
+            usable = await _replica_is_fresh(replica)
+            _replica_health[replica] = (time.monotonic(), usable)
+        if usable:
+            return replica
+    return None
+
+
+async def _replica_is_fresh(replica: AsyncEngine) -> bool:
+    try:
+        lag = await asyncio.wait_for(_replica_lag(replica), settings.REPLICA_CHECK_TIMEOUT_SECONDS)
+    except Exception:
+        return False
+    return lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+
+async def _replica_lag(replica: AsyncEngine) -> float:
+    async with replica.connect() as conn:
+        if replica.dialect.name != "postgresql":
+            # No replication to measure (e.g. a second local database).
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+        return float(await conn.scalar(REPLICA_LAG_SQL) or 0)
@@ -0,0 +1,45 @@
+"""
+Course demand and unmet-requirement queries for capacity planning.
+
+Both are answered from indexes the progress store keeps current on every
+enrollment and substitution write: StudentMissingCourse (course -> students
+who still need it for an unmet requirement) and StudentRequirementProgress
+(requirement -> students who have not met it). Each is a single indexed
+query; nothing is filled or recomputed on read (see app.audit_store).
+"""
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from app.catalog import get_catalog
+from app.models import Requirement, StudentMissingCourse, StudentRequirementProgress
+
+
+def course_demand(db: Session, course_id: int) -> List[int]:
+    """
+    Ids of students who still need a course for some requirement they have
+    not met, ordered by id.
+    """
+    if course_id not in get_catalog(db, [course_id]).courses:
+        raise ValueError(f"Course with id {course_id} not found")
+
+    return [
+        student_id for student_id, in db.query(StudentMissingCourse.student_id).filter(
+            StudentMissingCourse.course_id == course_id
+        ).distinct().order_by(StudentMissingCourse.student_id)
+    ]
+
+
+def unmet_students(db: Session, requirement_id: int) -> List[int]:
+    """
+    Ids of students in the requirement's program who have not met it, ordered by id.
+    """
+    if db.query(Requirement.id).filter(Requirement.id == requirement_id).first() is None:
+        raise ValueError(f"Requirement with id {requirement_id} not found")
+
+    return [
+        student_id for student_id, in db.query(StudentRequirementProgress.student_id).filter(
+            StudentRequirementProgress.requirement_id == requirement_id,
+            StudentRequirementProgress.is_met == False
+        ).order_by(StudentRequirementProgress.student_id)
+    ]
@@ -0,0 +1,252 @@
+"""
+Per-request SQL and audit-phase instrumentation.
+
+RequestMetricsMiddleware opens a RequestStats for every HTTP request in a
+context variable, which follows the request into run_sync greenlets and
+threadpool workers. Cursor hooks on every engine add each statement's count
+and duration to it, and phase() timers in the audit path add load, evaluate
+and serialize time. When the response starts, the totals so far are sent as
+a Server-Timing header (for a streamed body that is the time to first byte);
+when it finishes, one JSON line goes to the "app.requests" logger and the
+request is folded into per-route aggregates. A statement repeated within one
+request REPEATED_QUERY_THRESHOLD or more times -- the signature of an N+1
+loop -- is logged as a warning.
+
+Outside a request (CLI jobs, tests) the hooks find no RequestStats and cost
+one context variable lookup.
+"""
+import json
+import logging
+import statistics
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Deque, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+REPEATED_QUERY_THRESHOLD = 10
+# Request durations kept per route for percentiles
+ROUTE_SAMPLE_SIZE = 1000
+
+logger = logging.getLogger("app.requests")
+
+
+class RequestStats:
+    """
+    Queries, database time and phase timings of one request.
+    """
+
+    __slots__ = ("queries", "db_seconds", "phases", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        # phase -> [seconds, count]
+        self.phases: Dict[str, List] = {}
+        self.statements: Counter = Counter()
+
+    def add_query(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        self.statements[statement] += 1
+
+    def add_phase(self, name: str, seconds: float, count: int = 1) -> None:
+        totals = self.phases.get(name)
+        if totals is None:
+            self.phases[name] = [seconds, count]
+        else:
+            totals[0] += seconds
+            totals[1] += count
+
+    def repeated_statements(self) -> Dict[str, int]:
+        return {
+            statement: count for statement, count in self.statements.items()
+            if count >= REPEATED_QUERY_THRESHOLD
+        }
+
+    def server_timing(self, total_seconds: float) -> str:
+        metrics = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"']
+        metrics.extend(
+            f'{name};dur={seconds * 1000:.2f};desc="{count}x"' for name, (seconds, count) in self.phases.items()
+        )
+        metrics.append(f"total;dur={total_seconds * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def phase(name: str, count: int = 1) -> Iterator[None]:
+    """
+    Time a block as one phase of the current request (count items, e.g.
+    requirements evaluated). A no-op outside a request.
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_phase(name, perf_counter() - started, count)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_stats.get() is not None:
+        context._instrumentation_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = getattr(context, "_instrumentation_started", None)
+    if stats is not None and started is not None:
+        stats.add_query(statement, perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Attach the query hooks to a sync engine (for an AsyncEngine, pass its
+    sync_engine).
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RouteStats:
+    """
+    Aggregates of every request to one route.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_seconds = 0.0
+        self.phase_seconds: Counter = Counter()
+        self.durations: Deque[float] = deque(maxlen=ROUTE_SAMPLE_SIZE)
+
+    def record(self, status: int, seconds: float, stats: RequestStats) -> None:
+        self.requests += 1
+        self.errors += status >= 500
+        self.total_seconds += seconds
+        self.queries += stats.queries
+        self.max_queries = max(self.max_queries, stats.queries)
+        self.db_seconds += stats.db_seconds
+        for name, (phase_seconds, _) in stats.phases.items():
+            self.phase_seconds[name] += phase_seconds
+        self.durations.append(seconds)
+
+    def summary(self) -> dict:
+        durations = list(self.durations)
+        cuts = statistics.quantiles(durations, n=100, method="inclusive") if len(durations) > 1 else durations * 99
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "mean_ms": round(self.total_seconds / self.requests * 1000, 3),
+            "p50_ms": round(cuts[49] * 1000, 3),
+            "p99_ms": round(cuts[98] * 1000, 3),
+            "queries_per_request": round(self.queries / self.requests, 2),
+            "max_queries": self.max_queries,
+            "db_ms_per_request": round(self.db_seconds / self.requests * 1000, 3),
+            "phase_ms_per_request": {
+                name: round(seconds / self.requests * 1000, 3) for name, seconds in self.phase_seconds.items()
+            },
+        }
+
+
+# (method, route path) -> aggregates, for the life of the process
+route_stats: Dict[tuple, RouteStats] = {}
+
+
+def route_metrics() -> List[dict]:
+    return [
+        {"method": method, "route": route, **stats.summary()}
+        for (method, route), stats in sorted(route_stats.items(), key=lambda item: (item[0][1], item[0][0]))
+    ]
+
+
+def _route_path(scope) -> str:
+    # FastAPI leaves the matched route in the scope; a template keeps ids out of the key.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware: per-request stats, Server-Timing header, request log and
+    per-route aggregates.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            seconds = perf_counter() - started
+            method, route = scope["method"], _route_path(scope)
+            route_stats.setdefault((method, route), RouteStats()).record(status, seconds, stats)
+            _log_request(method, route, scope["path"], status, seconds, stats)
+
+
+def _log_request(method: str, route: str, path: str, status: int, seconds: float, stats: RequestStats) -> None:
+    repeated = stats.repeated_statements()
+    level = logging.WARNING if repeated else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    record = {
+        "method": method,
+        "route": route,
+        "path": path,
+        "status": status,
+        "duration_ms": round(seconds * 1000, 3),
+        "queries": stats.queries,
+        "db_ms": round(stats.db_seconds * 1000, 3),
+        "phases_ms": {name: round(phase_seconds * 1000, 3) for name, (phase_seconds, _) in stats.phases.items()},
+    }
+    if repeated:
+        record["repeated_queries"] = [
+            {"count": count, "statement": " ".join(statement.split())[:300]}
+            for statement, count in sorted(repeated.items(), key=lambda item: -item[1])
+        ]
+    logger.log(level, json.dumps(record))
+
+
+def configure_request_log(level: str = "INFO") -> None:
+    """
+    Send request log lines (bare JSON, one per line) to stderr.
+    """
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level.upper())
+    logger.propagate = False
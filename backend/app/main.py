@@ -1,31 +1,63 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from sqlalchemy.orm import Session
-from typing import List
-
-from app.database import get_db, engine, Base
-from app.models import Student, Course, Requirement, Enrollment, Substitution, Program
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
+
+from app.database import get_async_db, get_async_read_db, worker_session
+from app.models import Student, Course, Requirement, RequirementCourse, Enrollment, Substitution, Program, StudentTranscriptBits
 from app.schemas import (
     StudentCreate, Student as StudentSchema,
     CourseCreate, Course as CourseSchema,
-    RequirementCreate, Requirement as RequirementSchema,
-    EnrollmentCreate, Enrollment as EnrollmentSchema,
+    RequirementCreate, Requirement as RequirementSchema, RequirementTypeEnum,
+    EnrollmentCreate, Enrollment as EnrollmentSchema, BulkEnrollmentResult,
     SubstitutionCreate, SubstitutionUpdate, Substitution as SubstitutionSchema,
     ProgramCreate, Program as ProgramSchema,
-    AuditReport
+    AuditReport, BatchAuditRequest, AuditSimulationRequest, BatchSimulationRequest,
+    GraduationPlan, CohortQueryResult,
+    CourseDemand, UnmetStudents, ProgramAnalytics, Page, RouteMetrics
 )
 from app.auth import get_password_hash
-from app.audit_engine import AuditEngine
+from app.audit_engine import AsyncAuditEngine
+from app.audit_store import refresh_progress, store_progress, fill_program_progress_task
+from app.audit_cache import audit_cache, get_cached_audit, etag_matches
+from app.demand import course_demand, unmet_students
+from app.analytics import program_analytics
+from app.audit_export import MEDIA_TYPES, stream_audit_export
+from app.bulk_enrollments import BATCH_SIZE, EnrollmentBulkLoader, bulk_format, numbered_lines
+from app.registrar_import import TranscriptImporter
+from app.bitsets import page_of_bits, popcount, query_cohort, refresh_transcript_bits
+from app.program_rules import invalidate_program_rules
+from app.cache_versions import CATALOG_KEY, bump_version, expire_versions, program_key
+from app.catalog import refresh_catalog
+from app.planner import plan_remaining_courses
+from app.serialization import encode_audit_report, encode_audit_reports
 from app.pdf_generator import generate_audit_pdf
+from app.pagination import MAX_PAGE_SIZE, PageParams, paginate
+from app.instrumentation import RequestMetricsMiddleware, configure_request_log, phase, route_metrics
 from app.config import get_settings
 
 settings = get_settings()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Sort keys accepted by each list endpoint (NOT NULL columns only; see app.pagination).
+STUDENT_SORTS = {"id": Student.id, "student_id": Student.student_id, "name": Student.name, "email": Student.email}
+PROGRAM_SORTS = {"id": Program.id, "code": Program.code, "name": Program.name}
+COURSE_SORTS = {"id": Course.id, "course_code": Course.course_code, "name": Course.name, "credits": Course.credits}
+REQUIREMENT_SORTS = {"id": Requirement.id, "name": Requirement.name, "credits_required": Requirement.credits_required}
+ENROLLMENT_SORTS = {"id": Enrollment.id, "year": Enrollment.year}
+SUBSTITUTION_SORTS = {"id": Substitution.id}
+
+
+async def _page(db: AsyncSession, query, model, sortable, params: PageParams):
+    try:
+        return await paginate(db, query, model, sortable, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-app = FastAPI(title="Ironclad Degree Auditor API")
+app = FastAPI(title="Ironclad Degree Auditor API", default_response_class=ORJSONResponse)
 
 # CORS configuration
 app.add_middleware(
@@ -34,72 +66,188 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Query counts, DB time and audit phases per request (Server-Timing, request log, /api/metrics/routes)
+app.add_middleware(RequestMetricsMiddleware)
+configure_request_log(settings.REQUEST_LOG_LEVEL)
 
 # Student endpoints
 @app.post("/api/students", response_model=StudentSchema)
-def create_student(student: StudentCreate, db: Session = Depends(get_db)):
+async def create_student(student: StudentCreate, db: AsyncSession = Depends(get_async_db)):
     db_student = Student(
         student_id=student.student_id,
         name=student.name,
         email=student.email,
-        password_hash=get_password_hash(student.password),
+        # Password hashing is deliberately slow; keep it off the event loop.
+        password_hash=await run_in_threadpool(get_password_hash, student.password),
         program_id=student.program_id
     )
     db.add(db_student)
-    db.commit()
-    db.refresh(db_student)
+    await db.flush()
+    # A new student has no completed courses yet: an empty transcript bitset.
+    db.add(StudentTranscriptBits(student_id=db_student.id, completed_courses=b""))
+    await db.commit()
+    await db.refresh(db_student)
+    # Store the new student's (empty) progress so demand indexes stay complete.
+    reports = await AsyncAuditEngine(db).run_audits([db_student.id])
+    await db.run_sync(store_progress, reports)
+    await db.commit()
     return db_student
 
 
 @app.get("/api/students/{student_id}", response_model=StudentSchema)
-def get_student(student_id: int, db: Session = Depends(get_db)):
-    student = db.query(Student).filter(Student.id == student_id).first()
+async def get_student(student_id: int, db: AsyncSession = Depends(get_async_db)):
+    student = await db.get(Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     return student
 
 
-@app.get("/api/students", response_model=List[StudentSchema])
-def list_students(db: Session = Depends(get_db)):
-    return db.query(Student).all()
+@app.get("/api/students", response_model=Page[StudentSchema])
+async def list_students(
+    program_id: Optional[int] = None,
+    search: Optional[str] = None,
+    ids: Optional[List[int]] = Query(None),
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Students, one page at a time. `search` matches name, email or student ID
+    (case-insensitive substring); `ids` (repeatable) picks students by id.
+    """
+    query = select(Student)
+    if ids:
+        query = query.where(Student.id.in_(ids))
+    if program_id is not None:
+        query = query.where(Student.program_id == program_id)
+    if search:
+        query = query.where(or_(
+            Student.name.icontains(search, autoescape=True),
+            Student.email.icontains(search, autoescape=True),
+            Student.student_id.icontains(search, autoescape=True)
+        ))
+    return await _page(db, query, Student, STUDENT_SORTS, params)
 
 
 # Program endpoints
 @app.post("/api/programs", response_model=ProgramSchema)
-def create_program(program: ProgramCreate, db: Session = Depends(get_db)):
+async def create_program(program: ProgramCreate, db: AsyncSession = Depends(get_async_db)):
     db_program = Program(**program.dict())
     db.add(db_program)
-    db.commit()
-    db.refresh(db_program)
+    await db.commit()
+    await db.refresh(db_program)
     return db_program
 
 
-@app.get("/api/programs", response_model=List[ProgramSchema])
-def list_programs(db: Session = Depends(get_db)):
-    return db.query(Program).all()
+@app.get("/api/programs", response_model=Page[ProgramSchema])
+async def list_programs(
+    search: Optional[str] = None,
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    query = select(Program)
+    if search:
+        query = query.where(or_(
+            Program.name.icontains(search, autoescape=True),
+            Program.code.icontains(search, autoescape=True)
+        ))
+    return await _page(db, query, Program, PROGRAM_SORTS, params)
+
+
+@app.get("/api/programs/{program_id}/analytics", response_model=ProgramAnalytics)
+async def get_program_analytics(program_id: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await db.run_sync(program_analytics, program_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.get("/api/programs/{program_id}/cohort", response_model=CohortQueryResult)
+async def query_program_cohort(
+    program_id: int,
+    completed: List[int] = Query([]),
+    missing: List[int] = Query([]),
+    met: List[int] = Query([]),
+    unmet: List[int] = Query([]),
+    after: Optional[int] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Students who completed every `completed` course, none of the `missing`
+    courses, met every `met` requirement and none of the `unmet` ones.
+    `count` is the whole cohort; `student_ids` holds up to `limit` ids after
+    `after` (pass `next_after` back as ?after= for the next page).
+    """
+    try:
+        cohort = await db.run_sync(query_cohort, program_id, completed, missing, met, unmet)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    student_ids, next_after = await run_in_threadpool(page_of_bits, cohort, after, limit)
+    return CohortQueryResult(
+        program_id=program_id, count=popcount(cohort), student_ids=student_ids, next_after=next_after
+    )
 
 
 # Course endpoints
 @app.post("/api/courses", response_model=CourseSchema)
-def create_course(course: CourseCreate, db: Session = Depends(get_db)):
+async def create_course(course: CourseCreate, db: AsyncSession = Depends(get_async_db)):
     db_course = Course(**course.dict())
     db.add(db_course)
-    db.commit()
-    db.refresh(db_course)
+    await db.run_sync(bump_version, CATALOG_KEY)
+    await db.commit()
+    await db.refresh(db_course)
+    # Catalog changed: swap in a new snapshot here; other processes follow the shared version.
+    expire_versions()
+    await db.run_sync(refresh_catalog)
     return db_course
 
 
-@app.get("/api/courses", response_model=List[CourseSchema])
-def list_courses(db: Session = Depends(get_db)):
-    return db.query(Course).all()
+@app.get("/api/courses", response_model=Page[CourseSchema])
+async def list_courses(
+    search: Optional[str] = None,
+    min_credits: Optional[float] = None,
+    max_credits: Optional[float] = None,
+    ids: Optional[List[int]] = Query(None),
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Courses, one page at a time. `search` matches code or name
+    (case-insensitive substring); `ids` (repeatable) picks courses by id.
+    """
+    query = select(Course)
+    if ids:
+        query = query.where(Course.id.in_(ids))
+    if search:
+        query = query.where(or_(
+            Course.course_code.icontains(search, autoescape=True),
+            Course.name.icontains(search, autoescape=True)
+        ))
+    if min_credits is not None:
+        query = query.where(Course.credits >= min_credits)
+    if max_credits is not None:
+        query = query.where(Course.credits <= max_credits)
+    return await _page(db, query, Course, COURSE_SORTS, params)
+
+
+@app.get("/api/courses/{course_id}/demand", response_model=CourseDemand)
+async def get_course_demand(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        student_ids = await db.run_sync(course_demand, course_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return CourseDemand(course_id=course_id, count=len(student_ids), student_ids=student_ids)
 
 
 # Requirement endpoints
 @app.post("/api/requirements", response_model=RequirementSchema)
-def create_requirement(requirement: RequirementCreate, db: Session = Depends(get_db)):
-    from app.models import RequirementCourse
-    
+async def create_requirement(
+    requirement: RequirementCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
     db_requirement = Requirement(
         program_id=requirement.program_id,
         name=requirement.name,
@@ -108,8 +256,7 @@ def create_requirement(requirement: RequirementCreate, db: Session = Depends(get
         description=requirement.description
     )
     db.add(db_requirement)
-    db.commit()
-    db.refresh(db_requirement)
+    await db.flush()
     
     # Add course associations
     for course_id in requirement.course_ids:
@@ -119,69 +266,192 @@ def create_requirement(requirement: RequirementCreate, db: Session = Depends(get
         )
         db.add(req_course)
     
-    db.commit()
+    await db.run_sync(bump_version, program_key(db_requirement.program_id))
+    await db.commit()
+    invalidate_program_rules(db_requirement.program_id)
+    # Every student in the program needs a stored row for the new requirement.
+    background_tasks.add_task(fill_program_progress_task, db_requirement.program_id)
     return db_requirement
 
 
-@app.get("/api/requirements", response_model=List[RequirementSchema])
-def list_requirements(program_id: int = None, db: Session = Depends(get_db)):
-    query = db.query(Requirement)
-    if program_id:
-        query = query.filter(Requirement.program_id == program_id)
-    return query.all()
+@app.get("/api/requirements", response_model=Page[RequirementSchema])
+async def list_requirements(
+    program_id: Optional[int] = None,
+    requirement_type: Optional[RequirementTypeEnum] = None,
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    query = select(Requirement)
+    if program_id is not None:
+        query = query.where(Requirement.program_id == program_id)
+    if requirement_type is not None:
+        query = query.where(Requirement.requirement_type == requirement_type.value)
+    return await _page(db, query, Requirement, REQUIREMENT_SORTS, params)
+
+
+@app.get("/api/requirements/{requirement_id}/unmet-students", response_model=UnmetStudents)
+async def get_unmet_students(requirement_id: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        student_ids = await db.run_sync(unmet_students, requirement_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return UnmetStudents(requirement_id=requirement_id, count=len(student_ids), student_ids=student_ids)
 
 
 # Enrollment endpoints
 @app.post("/api/enrollments", response_model=EnrollmentSchema)
-def create_enrollment(enrollment: EnrollmentCreate, db: Session = Depends(get_db)):
+async def create_enrollment(enrollment: EnrollmentCreate, db: AsyncSession = Depends(get_async_db)):
     db_enrollment = Enrollment(**enrollment.dict())
     db.add(db_enrollment)
-    db.commit()
-    db.refresh(db_enrollment)
+    try:
+        await db.flush()
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Enrollment for this course and term already exists")
+    if db_enrollment.completed:
+        await db.run_sync(refresh_progress, db_enrollment.student_id, {db_enrollment.course_id})
+        await db.run_sync(refresh_transcript_bits, db_enrollment.student_id)
+    await db.commit()
+    await db.refresh(db_enrollment)
     return db_enrollment
 
 
-@app.get("/api/enrollments", response_model=List[EnrollmentSchema])
-def list_enrollments(student_id: int = None, db: Session = Depends(get_db)):
-    query = db.query(Enrollment)
-    if student_id:
-        query = query.filter(Enrollment.student_id == student_id)
-    return query.all()
+@app.post("/api/enrollments/bulk", response_model=BulkEnrollmentResult)
+async def bulk_load_enrollments(request: Request, format: Optional[Literal["ndjson", "csv"]] = None):
+    """
+    Load NDJSON or CSV enrollments (one record per line, EnrollmentCreate
+    fields; CSV needs a header row) in a single transaction. Rows are upserted
+    on (student_id, course_id, semester, year), so re-sending a file is safe.
+    Invalid rows are skipped and reported by line number. The format comes
+    from `format` or the Content-Type (application/x-ndjson, text/csv).
+    """
+    format = format or bulk_format(request.headers.get("content-type"))
+    if format is None:
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson or text/csv, or pass ?format=")
+
+    loader = EnrollmentBulkLoader(format)
+    # Validation, upserts and the progress recompute run in worker threads.
+    async with worker_session() as db:
+        batch = []
+        async for line in numbered_lines(request.stream()):
+            batch.append(line)
+            if len(batch) >= BATCH_SIZE:
+                await run_in_threadpool(loader.load_lines, db, batch)
+                batch = []
+        if batch:
+            await run_in_threadpool(loader.load_lines, db, batch)
+        result = await run_in_threadpool(loader.finish, db)
+        await run_in_threadpool(db.commit)
+    audit_cache.discard_students(loader.student_ids)
+    return result
+
+
+@app.post("/api/enrollments/import", response_model=BulkEnrollmentResult)
+async def import_transcripts(request: Request, format: Optional[Literal["ndjson", "csv"]] = None):
+    """
+    Stream a registrar transcript export (student number, course_code,
+    semester, year, grade[, completed]) into enrollments, committing one
+    batch at a time; see app.registrar_import. The upload is only read as
+    fast as batches are written. Re-sending an export is safe.
+    """
+    format = format or bulk_format(request.headers.get("content-type"))
+    if format is None:
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson or text/csv, or pass ?format=")
+
+    importer = TranscriptImporter(format)
+    async with worker_session() as db:
+        batch = []
+        async for line in numbered_lines(request.stream()):
+            batch.append(line)
+            if len(batch) >= BATCH_SIZE:
+                await run_in_threadpool(importer.import_lines, db, batch)
+                batch = []
+        if batch:
+            await run_in_threadpool(importer.import_lines, db, batch)
+    audit_cache.discard_students(importer.report.student_ids)
+    return importer.result()
+
+
+@app.get("/api/enrollments", response_model=Page[EnrollmentSchema])
+async def list_enrollments(
+    student_id: Optional[int] = None,
+    course_id: Optional[int] = None,
+    completed: Optional[bool] = None,
+    semester: Optional[str] = None,
+    year: Optional[int] = None,
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    query = select(Enrollment)
+    if student_id is not None:
+        query = query.where(Enrollment.student_id == student_id)
+    if course_id is not None:
+        query = query.where(Enrollment.course_id == course_id)
+    if completed is not None:
+        query = query.where(Enrollment.completed == completed)
+    if semester is not None:
+        query = query.where(Enrollment.semester == semester)
+    if year is not None:
+        query = query.where(Enrollment.year == year)
+    return await _page(db, query, Enrollment, ENROLLMENT_SORTS, params)
 
 
 # Substitution endpoints (CRUD for admin)
 @app.post("/api/substitutions", response_model=SubstitutionSchema)
-def create_substitution(substitution: SubstitutionCreate, db: Session = Depends(get_db)):
+async def create_substitution(substitution: SubstitutionCreate, db: AsyncSession = Depends(get_async_db)):
     db_substitution = Substitution(**substitution.dict())
     db.add(db_substitution)
-    db.commit()
-    db.refresh(db_substitution)
+    await db.flush()
+    if db_substitution.approved:
+        await db.run_sync(
+            refresh_progress,
+            db_substitution.student_id,
+            {db_substitution.original_course_id, db_substitution.substitute_course_id}
+        )
+    await db.commit()
+    await db.refresh(db_substitution)
     return db_substitution
 
 
-@app.get("/api/substitutions", response_model=List[SubstitutionSchema])
-def list_substitutions(student_id: int = None, db: Session = Depends(get_db)):
-    query = db.query(Substitution)
-    if student_id:
-        query = query.filter(Substitution.student_id == student_id)
-    return query.all()
+@app.get("/api/substitutions", response_model=Page[SubstitutionSchema])
+async def list_substitutions(
+    student_id: Optional[int] = None,
+    approved: Optional[bool] = None,
+    course_id: Optional[int] = None,
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Substitutions, one page at a time. `course_id` matches either the
+    original or the substitute course.
+    """
+    query = select(Substitution)
+    if student_id is not None:
+        query = query.where(Substitution.student_id == student_id)
+    if approved is not None:
+        query = query.where(Substitution.approved == approved)
+    if course_id is not None:
+        query = query.where(or_(
+            Substitution.original_course_id == course_id,
+            Substitution.substitute_course_id == course_id
+        ))
+    return await _page(db, query, Substitution, SUBSTITUTION_SORTS, params)
 
 
 @app.get("/api/substitutions/{substitution_id}", response_model=SubstitutionSchema)
-def get_substitution(substitution_id: int, db: Session = Depends(get_db)):
-    substitution = db.query(Substitution).filter(Substitution.id == substitution_id).first()
+async def get_substitution(substitution_id: int, db: AsyncSession = Depends(get_async_db)):
+    substitution = await db.get(Substitution, substitution_id)
     if not substitution:
         raise HTTPException(status_code=404, detail="Substitution not found")
     return substitution
 
 
 @app.put("/api/substitutions/{substitution_id}", response_model=SubstitutionSchema)
-def update_substitution(
+async def update_substitution(
     substitution_id: int,
     substitution_update: SubstitutionUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_substitution = db.query(Substitution).filter(Substitution.id == substitution_id).first()
+    db_substitution = await db.get(Substitution, substitution_id)
     if not db_substitution:
         raise HTTPException(status_code=404, detail="Substitution not found")
     
@@ -189,39 +459,140 @@ def update_substitution(
     for key, value in update_data.items():
         setattr(db_substitution, key, value)
     
-    db.commit()
-    db.refresh(db_substitution)
+    await db.flush()
+    await db.run_sync(
+        refresh_progress,
+        db_substitution.student_id,
+        {db_substitution.original_course_id, db_substitution.substitute_course_id}
+    )
+    await db.commit()
+    await db.refresh(db_substitution)
     return db_substitution
 
 
 @app.delete("/api/substitutions/{substitution_id}")
-def delete_substitution(substitution_id: int, db: Session = Depends(get_db)):
-    db_substitution = db.query(Substitution).filter(Substitution.id == substitution_id).first()
+async def delete_substitution(substitution_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_substitution = await db.get(Substitution, substitution_id)
     if not db_substitution:
         raise HTTPException(status_code=404, detail="Substitution not found")
     
-    db.delete(db_substitution)
-    db.commit()
+    student_id = db_substitution.student_id
+    course_ids = {db_substitution.original_course_id, db_substitution.substitute_course_id}
+    was_approved = db_substitution.approved
+    await db.delete(db_substitution)
+    await db.flush()
+    if was_approved:
+        await db.run_sync(refresh_progress, student_id, course_ids)
+    await db.commit()
     return {"message": "Substitution deleted successfully"}
 
 
 # Audit endpoint
+@app.get("/api/audit/export")
+async def export_audits(
+    program_id: Optional[int] = None,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    One audit summary row per student (all students, or one program's),
+    streamed as NDJSON or CSV. Declared before /api/audit/{student_id} so
+    "export" is not taken for a student id.
+    """
+    if program_id is not None and await db.get(Program, program_id) is None:
+        raise HTTPException(status_code=404, detail=f"Program with id {program_id} not found")
+    filename = f"audits-{program_id if program_id is not None else 'all'}.{format}"
+    return StreamingResponse(
+        stream_audit_export(program_id, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.post("/api/audit/batch", response_model=List[AuditReport])
+async def get_batch_audit_reports(request: BatchAuditRequest, db: AsyncSession = Depends(get_async_db)):
+    engine = AsyncAuditEngine(db)
+    try:
+        reports = await engine.run_audits(request.student_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    content = await run_in_threadpool(encode_audit_reports, reports)
+    return Response(content=content, media_type="application/json")
+
+
 @app.get("/api/audit/{student_id}", response_model=AuditReport)
-def get_audit_report(student_id: int, db: Session = Depends(get_db)):
-    engine = AuditEngine(db)
+async def get_audit_report(
+    student_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    try:
+        fingerprint, cached = await get_cached_audit(db, student_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    etag = f'"{fingerprint}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=cached.body, media_type="application/json", headers={"ETag": etag})
+
+
+@app.post("/api/audit/{student_id}/simulate", response_model=AuditReport)
+async def simulate_audit_report(
+    student_id: int,
+    scenario: AuditSimulationRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    engine = AsyncAuditEngine(db)
     try:
-        report = engine.run_audit(student_id)
-        return report
+        report = await engine.simulate_audit(student_id, scenario)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    return Response(content=encode_audit_report(report), media_type="application/json")
+
+
+@app.post("/api/audit/{student_id}/simulate/batch", response_model=List[AuditReport])
+async def simulate_audit_reports(
+    student_id: int,
+    request: BatchSimulationRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    One simulated audit per scenario, in order. The student is loaded once,
+    so a planner trying many scenarios pays for the queries only once.
+    """
+    engine = AsyncAuditEngine(db)
+    try:
+        reports = await engine.simulate_audits(student_id, request.scenarios)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    content = await run_in_threadpool(encode_audit_reports, reports)
+    return Response(content=content, media_type="application/json")
+
+
+@app.get("/api/audit/{student_id}/plan", response_model=GraduationPlan)
+async def get_graduation_plan(
+    student_id: int,
+    objective: Literal["credits", "courses"] = "credits",
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    try:
+        _, cached = await get_cached_audit(db, student_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    # The search is CPU-bound for up to its time budget; keep it off the event loop.
+    return await run_in_threadpool(
+        plan_remaining_courses, cached.report, objective, settings.PLANNER_TIME_BUDGET_MS / 1000
+    )
 
 
 @app.get("/api/audit/{student_id}/pdf")
-def get_audit_pdf(student_id: int, db: Session = Depends(get_db)):
-    engine = AuditEngine(db)
+async def get_audit_pdf(student_id: int, db: AsyncSession = Depends(get_async_read_db)):
     try:
-        report = engine.run_audit(student_id)
-        pdf_bytes = generate_audit_pdf(report)
+        _, cached = await get_cached_audit(db, student_id)
+        report = cached.report
+        with phase("pdf"):
+            pdf_bytes = await run_in_threadpool(generate_audit_pdf, report)
         return Response(
             content=pdf_bytes,
             media_type="application/pdf",
@@ -233,6 +604,11 @@ def get_audit_pdf(student_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@app.get("/api/metrics/routes", response_model=List[RouteMetrics])
+async def get_route_metrics():
+    return route_metrics()
+
+
 @app.get("/api/health")
-def health_check():
+async def health_check():
     return {"status": "healthy"}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, Text, Enum, Index, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -13,6 +13,11 @@ class RequirementType(str, enum.Enum):
 
 class Student(Base):
     __tablename__ = "students"
+    # Keyset pages of the student list: per program, and sorted by name.
+    __table_args__ = (
+        Index("ix_students_program_id", "program_id", "id"),
+        Index("ix_students_name_id", "name", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(String, unique=True, index=True, nullable=False)
@@ -66,6 +71,7 @@ class Requirement(Base):
 
 class RequirementCourse(Base):
     __tablename__ = "requirement_courses"
+    __table_args__ = (Index("ix_requirement_courses_requirement", "requirement_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     requirement_id = Column(Integer, ForeignKey("requirements.id"), nullable=False)
@@ -77,6 +83,12 @@ class RequirementCourse(Base):
 
 class Enrollment(Base):
     __tablename__ = "enrollments"
+    __table_args__ = (
+        # Audits load a student's completed enrollments.
+        Index("ix_enrollments_student_completed", "student_id", "completed"),
+        # One row per course attempt; bulk loads upsert on this key.
+        UniqueConstraint("student_id", "course_id", "semester", "year", name="uq_enrollments_student_course_term"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
@@ -92,6 +104,8 @@ class Enrollment(Base):
 
 class Substitution(Base):
     __tablename__ = "substitutions"
+    # Audits load a student's approved substitutions.
+    __table_args__ = (Index("ix_substitutions_student_approved", "student_id", "approved"),)
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
@@ -103,3 +117,101 @@ class Substitution(Base):
     student = relationship("Student", foreign_keys=[student_id])
     original_course = relationship("Course", foreign_keys=[original_course_id])
     substitute_course = relationship("Course", foreign_keys=[substitute_course_id])
+
+
+class StudentRequirementProgress(Base):
+    """
+    Precomputed audit progress for one student and one requirement.
+    Maintained by app.audit_store as enrollments and substitutions change.
+    """
+    __tablename__ = "student_requirement_progress"
+    __table_args__ = (
+        UniqueConstraint("student_id", "requirement_id"),
+        Index("ix_student_requirement_progress_requirement_met", "requirement_id", "is_met"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False, index=True)
+    requirement_id = Column(Integer, ForeignKey("requirements.id"), nullable=False)
+    credits_completed = Column(Float, nullable=False)
+    percentage = Column(Float, nullable=False)
+    is_met = Column(Boolean, nullable=False)
+    # Comma-separated course ids, in the order the audit lists them.
+    completed_course_ids = Column(Text, nullable=False, default="")
+    missing_course_ids = Column(Text, nullable=False, default="")
+
+
+class StudentAuditSummary(Base):
+    """
+    A student's overall audit outcome, derived from their stored progress
+    rows. Maintained by app.audit_store; backs program analytics.
+    """
+    __tablename__ = "student_audit_summaries"
+    __table_args__ = (
+        Index("ix_student_audit_summaries_program_credits", "program_id", "total_credits_completed"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False, unique=True, index=True)
+    program_id = Column(Integer, ForeignKey("programs.id"), nullable=False)
+    status = Column(String, nullable=False)
+    total_credits_completed = Column(Float, nullable=False)
+    # Comma-separated "requirement_id:band" pairs last counted in the analytics.
+    requirement_bands = Column(Text, nullable=False, default="")
+
+
+class ProgramAnalyticsCounter(Base):
+    """
+    Incrementally maintained per-program counts: students per status
+    (metric "status"), per completion band of each requirement
+    (metric "requirement:<id>") and per completed-credits total in
+    hundredths (metric "credits", the histogram behind credit quantiles).
+    """
+    __tablename__ = "program_analytics_counters"
+    __table_args__ = (UniqueConstraint("program_id", "metric", "bucket"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    program_id = Column(Integer, ForeignKey("programs.id"), nullable=False)
+    metric = Column(String, nullable=False)
+    bucket = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class StudentMissingCourse(Base):
+    """
+    Inverted index of demand: a course a student still needs for a
+    requirement they have not met. Maintained by app.audit_store alongside
+    StudentRequirementProgress.
+    """
+    __tablename__ = "student_missing_courses"
+    __table_args__ = (UniqueConstraint("student_id", "requirement_id", "course_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    requirement_id = Column(Integer, ForeignKey("requirements.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False, index=True)
+
+
+class StudentTranscriptBits(Base):
+    """
+    A student's completed courses as a bitset (bit n set <=> course id n).
+    Maintained by app.bitsets as enrollments change.
+    """
+    __tablename__ = "student_transcript_bits"
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False, unique=True, index=True)
+    # Little-endian bytes of the bitset integer.
+    completed_courses = Column(LargeBinary, nullable=False, default=b"")
+
+
+class CacheVersion(Base):
+    """
+    Version counters of the per-process caches (compiled program rules, the
+    catalog snapshot), bumped by the writes that change them. See
+    app.cache_versions.
+    """
+    __tablename__ = "cache_versions"
+
+    key = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
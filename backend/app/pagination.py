@@ -0,0 +1,105 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+A page is ordered by one sort column with the primary key as tie-breaker, and
+the cursor is the (sort value, id) of the last row returned, so each page is
+an index range scan starting after that row rather than an OFFSET that reads
+and discards every earlier row. Cursors are opaque base64url JSON and are only
+valid for the sort they were issued under.
+"""
+import base64
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Query
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class PageParams:
+    """
+    Query parameters shared by every list endpoint (use as Depends()).
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        sort: str = "id",
+        include_total: bool = False,
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+        self.include_total = include_total
+
+
+def encode_cursor(sort: str, value: Any, row_id: int) -> str:
+    payload = json.dumps([sort, value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    """
+    Return the (sort value, id) a cursor points after. Raises ValueError for a
+    malformed cursor or one issued under a different sort.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, row_id = json.loads(payload)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(row_id, int):
+        raise ValueError(f"Cursor was not issued for sort '{sort}'")
+    return value, row_id
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    model,
+    sortable: Dict[str, Any],
+    params: PageParams,
+) -> Dict[str, Any]:
+    """
+    Run one page of a filtered select over model.
+
+    sortable maps the accepted sort keys to columns (every key must be NOT
+    NULL); params.sort may be prefixed with '-' for descending order. Returns
+    {"items", "next_cursor", "total"}; total is only counted when asked for.
+    Raises ValueError for an unknown sort key or a bad cursor.
+    """
+    sort, limit = params.sort, params.limit
+    descending = sort.startswith("-")
+    key = sort[1:] if descending else sort
+    if key not in sortable:
+        raise ValueError(f"Cannot sort by '{key}'; expected one of {sorted(sortable)}")
+    column, id_column = sortable[key], model.id
+
+    total = None
+    if params.include_total:
+        total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+    page = query
+    if params.cursor is not None:
+        value, row_id = decode_cursor(params.cursor, sort)
+        if column is id_column:
+            page = page.where(id_column < row_id if descending else id_column > row_id)
+        else:
+            position = tuple_(column, id_column)
+            page = page.where(position < tuple_(value, row_id) if descending else position > tuple_(value, row_id))
+    order = [column.desc(), id_column.desc()] if descending else [column, id_column]
+    if column is id_column:
+        order = order[:1]
+
+    # One extra row tells us whether another page follows.
+    items = (await db.scalars(page.order_by(*order).limit(limit + 1))).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(sort, getattr(last, column.key), last.id)
+    return {"items": items, "next_cursor": next_cursor, "total": total}
@@ -0,0 +1,193 @@
+"""
+Remaining-course planner for graduation.
+
+Finds the smallest set of additional courses (by credits or by course count)
+that would make every requirement in an AuditReport met. A course counts
+toward every requirement that lists it, so this is a weighted multi-cover
+problem. It is solved with branch-and-bound seeded by a greedy plan, with
+memoized search states and a hard time budget. When the budget runs out, the
+best plan found so far is returned and marked as not proven optimal.
+"""
+import math
+import time
+from typing import Dict, List, Tuple
+
+from app.schemas import AuditReport, GraduationPlan
+
+EPSILON = 1e-9
+
+
+def plan_remaining_courses(report: AuditReport, objective: str = "credits", time_budget: float = 0.2) -> GraduationPlan:
+    """
+    Plan the cheapest set of missing courses that makes graduation_eligible true.
+    """
+    unmet = [req for req in report.requirements if not req.is_met]
+    deficits = tuple(req.credits_required - req.credits_completed for req in unmet)
+
+    courses = {}
+    covers: Dict[int, int] = {}
+    for index, req in enumerate(unmet):
+        for course in req.missing_courses:
+            courses[course.id] = course
+            covers[course.id] = covers.get(course.id, 0) | (1 << index)
+
+    blocked_ids = [
+        req.requirement_id
+        for index, req in enumerate(unmet)
+        if sum(course.credits for course in req.missing_courses) + EPSILON < deficits[index]
+    ]
+    if blocked_ids:
+        return GraduationPlan(
+            student_id=report.student.id,
+            objective=objective,
+            feasible=False,
+            optimal=True,
+            courses=[],
+            total_credits=0.0,
+            blocked_requirement_ids=blocked_ids,
+        )
+
+    candidate_ids = sorted(courses)
+    solver = _BranchAndBound(
+        deficits=deficits,
+        credits=[courses[cid].credits for cid in candidate_ids],
+        costs=[courses[cid].credits if objective == "credits" else 1.0 for cid in candidate_ids],
+        covers=[covers[cid] for cid in candidate_ids],
+        deadline=time.perf_counter() + time_budget,
+    )
+    chosen, optimal = solver.solve()
+
+    planned = [courses[candidate_ids[i]] for i in chosen]
+    return GraduationPlan(
+        student_id=report.student.id,
+        objective=objective,
+        feasible=True,
+        optimal=optimal,
+        courses=planned,
+        total_credits=round(sum(course.credits for course in planned), 2),
+        blocked_requirement_ids=[],
+    )
+
+
+class _BranchAndBound:
+    """
+    Candidates are indexed 0..n-1 and sets of candidates are int bitmasks.
+    """
+
+    def __init__(
+        self,
+        deficits: Tuple[float, ...],
+        credits: List[float],
+        costs: List[float],
+        covers: List[int],
+        deadline: float,
+    ):
+        self.deficits = deficits
+        self.credits = credits
+        self.costs = costs
+        self.covers = covers
+        self.deadline = deadline
+        self.integral_costs = all(float(cost).is_integer() for cost in costs)
+        self.covering = [
+            [c for c in range(len(credits)) if covers[c] >> r & 1] for r in range(len(deficits))
+        ]
+        self.best_cost = float("inf")
+        self.best_mask = 0
+        self.timed_out = False
+        # (remaining deficits, available candidates) -> cheapest cost seen there
+        self.seen: Dict[Tuple[Tuple[float, ...], int], float] = {}
+
+    def solve(self) -> Tuple[List[int], bool]:
+        self.best_mask, self.best_cost = self._greedy()
+        available = (1 << len(self.credits)) - 1
+        self._search(self.deficits, available, 0, 0.0)
+        chosen = [c for c in range(len(self.credits)) if self.best_mask >> c & 1]
+        return chosen, not self.timed_out
+
+    def _take(self, remaining: Tuple[float, ...], c: int) -> Tuple[float, ...]:
+        return tuple(
+            max(0.0, deficit - self.credits[c]) if self.covers[c] >> r & 1 else deficit
+            for r, deficit in enumerate(remaining)
+        )
+
+    def _greedy(self) -> Tuple[int, float]:
+        remaining, mask, cost = self.deficits, 0, 0.0
+        while any(deficit > EPSILON for deficit in remaining):
+            def value(c: int) -> float:
+                gain = sum(
+                    min(self.credits[c], deficit)
+                    for r, deficit in enumerate(remaining)
+                    if self.covers[c] >> r & 1
+                )
+                if self.costs[c] > 0:
+                    return gain / self.costs[c]
+                return float("inf") if gain > 0 else 0.0
+
+            c = max((c for c in range(len(self.credits)) if not mask >> c & 1), key=value)
+            mask |= 1 << c
+            cost += self.costs[c]
+            remaining = self._take(remaining, c)
+        return mask, cost
+
+    def _lower_bound(self, remaining: Tuple[float, ...], available: int) -> float:
+        """
+        Cost to close the single hardest requirement on its own.
+        """
+        bound = 0.0
+        for r, deficit in enumerate(remaining):
+            if deficit <= EPSILON:
+                continue
+            # Cheapest way to reach the deficit: best credits-per-cost first.
+            options = sorted(
+                (c for c in self.covering[r] if available >> c & 1),
+                key=lambda c: -self.credits[c] / self.costs[c] if self.costs[c] > 0 else float("-inf"),
+            )
+            need, cost = deficit, 0.0
+            for c in options:
+                if need <= EPSILON:
+                    break
+                used = min(self.credits[c], need)
+                # Fractional relaxation: pay only for the credits actually needed.
+                cost += self.costs[c] * used / self.credits[c] if self.credits[c] > 0 else 0.0
+                need -= used
+            if need > EPSILON:
+                return float("inf")
+            bound = max(bound, cost)
+        if self.integral_costs:
+            bound = math.ceil(bound - EPSILON)
+        return bound
+
+    def _search(self, remaining: Tuple[float, ...], available: int, chosen: int, cost: float) -> None:
+        if time.perf_counter() > self.deadline:
+            self.timed_out = True
+            return
+
+        open_requirements = [r for r, deficit in enumerate(remaining) if deficit > EPSILON]
+        if not open_requirements:
+            if cost < self.best_cost - EPSILON:
+                self.best_cost, self.best_mask = cost, chosen
+            return
+
+        if cost + self._lower_bound(remaining, available) >= self.best_cost - EPSILON:
+            return
+
+        key = (tuple(round(deficit, 9) for deficit in remaining), available)
+        if self.seen.get(key, float("inf")) <= cost + EPSILON:
+            return
+        self.seen[key] = cost
+
+        # Branch on the requirement with the least slack; candidate k is taken
+        # while candidates before it are excluded, so no set is visited twice.
+        def slack(r: int) -> float:
+            return sum(self.credits[c] for c in self.covering[r] if available >> c & 1) - remaining[r]
+
+        r = min(open_requirements, key=slack)
+        options = sorted(
+            (c for c in self.covering[r] if available >> c & 1),
+            key=lambda c: (self.costs[c] / max(self.credits[c], EPSILON), c),
+        )
+        for c in options:
+            available &= ~(1 << c)
+            self._search(self._take(remaining, c), available, chosen | (1 << c), cost + self.costs[c])
+            if self.timed_out:
+                return
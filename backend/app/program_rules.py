@@ -0,0 +1,102 @@
+"""
+Compiled, in-process program rules shared across audits.
+
+Requirements only change through create_requirement or catalog edits, but they
+are read on every audit. Each program's requirements are compiled once into
+immutable tuples and frozensets and reused while the program's shared version
+(app.cache_versions) is unchanged, so edits made by any process are picked up.
+"""
+import threading
+from typing import Dict, FrozenSet, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.cache_versions import cache_version, expire_versions, program_key
+from app.database import primary_reads
+from app.models import Requirement, RequirementCourse
+
+
+class CompiledRequirement(NamedTuple):
+    id: int
+    name: str
+    requirement_type: str
+    credits_required: float
+    course_ids: FrozenSet[int]
+
+
+class CompiledProgram(NamedTuple):
+    program_id: int
+    # Shared version (app.cache_versions) the rules were compiled at
+    version: int
+    requirements: Tuple[CompiledRequirement, ...]
+
+
+_lock = threading.Lock()
+_compiled: Dict[int, CompiledProgram] = {}
+# Local generation, bumped on every invalidation
+_generation = 0
+
+
+def get_program_rules(db: Session, program_id: int) -> CompiledProgram:
+    """
+    Return the compiled rules for a program, (re)building them on first use
+    or when the program's shared version has moved on.
+    """
+    version = cache_version(db, program_key(program_id))
+    compiled = _compiled.get(program_id)
+    if compiled is not None and compiled.version == version:
+        return compiled
+
+    generation = _generation
+    with primary_reads(db):
+        compiled = _compile_program(db, program_id, version)
+    with _lock:
+        # Only publish if nothing was invalidated while we were compiling.
+        if generation == _generation:
+            _compiled[program_id] = compiled
+    return compiled
+
+
+def invalidate_program_rules(program_id: Optional[int] = None) -> None:
+    """
+    Drop compiled rules for one program, or for every program when the
+    catalog itself changed. Call after committing the write (and its
+    cache_versions bump) so the next read sees the new version.
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        if program_id is None:
+            _compiled.clear()
+        else:
+            _compiled.pop(program_id, None)
+    expire_versions()
+
+
+def _compile_program(db: Session, program_id: int, version: int) -> CompiledProgram:
+    requirements = db.query(Requirement).filter(
+        Requirement.program_id == program_id
+    ).order_by(Requirement.id).all()
+
+    course_ids: Dict[int, set] = {requirement.id: set() for requirement in requirements}
+    if course_ids:
+        rows = db.query(RequirementCourse.requirement_id, RequirementCourse.course_id).filter(
+            RequirementCourse.requirement_id.in_(list(course_ids))
+        ).all()
+        for requirement_id, course_id in rows:
+            course_ids[requirement_id].add(course_id)
+
+    return CompiledProgram(
+        program_id=program_id,
+        version=version,
+        requirements=tuple(
+            CompiledRequirement(
+                id=requirement.id,
+                name=requirement.name,
+                requirement_type=requirement.requirement_type.value,
+                credits_required=requirement.credits_required,
+                course_ids=frozenset(course_ids[requirement.id]),
+            )
+            for requirement in requirements
+        ),
+    )
@@ -0,0 +1,122 @@
+"""
+Streaming import of registrar transcript exports.
+
+A registrar export identifies students by student number and courses by
+course code, one enrollment per line (CSV with a header row, or NDJSON):
+
+    student_id,course_code,semester,year,grade[,completed]
+
+Lines flow through a chain of generators -- parse, resolve course codes
+against the in-memory catalog index, validate, batch -- and each batch is
+upserted and committed on its own, together with the stored progress of the
+students it touched. Only one batch is ever materialized, and since every
+stage pulls from the one before it, input is read no faster than batches are
+written: a file is read line by line, and an HTTP upload is read from the
+socket only when the next batch is needed. Loads are idempotent (see
+app.bulk_enrollments), so an interrupted import can simply be re-run.
+"""
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.audit_store import recompute_progress
+from app.bitsets import rebuild_transcript_bits
+from app.bulk_enrollments import BATCH_SIZE, LoadReport, RecordParser, upsert_enrollments, validate_records
+from app.catalog import get_catalog, refresh_catalog
+from app.models import Student
+from app.schemas import BulkEnrollmentResult
+
+# Grades that do not complete a course, used when a line has no completed column
+NON_COMPLETING_GRADES = {"F", "W", "I", "IP", "NP", "NC", "U"}
+
+
+def batched(records: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class TranscriptImporter:
+    """
+    Runs the import pipeline. Feed it numbered lines with import_lines(db,
+    lines) -- the whole file at once or the stream piece by piece -- and read
+    the totals from result().
+    """
+
+    def __init__(
+        self,
+        format: str,
+        batch_size: int = BATCH_SIZE,
+        on_batch: Optional[Callable[[LoadReport], None]] = None,
+    ):
+        self.report = LoadReport()
+        self.parser = RecordParser(format, self.report)
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self._catalog_refreshed = False
+
+    def import_lines(self, db: Session, lines: Iterable[Tuple[int, bytes]]) -> None:
+        records = self.resolve_courses(db, self.parser.parse(lines))
+        for batch in batched(records, self.batch_size):
+            self.load_batch(db, batch)
+
+    def resolve_courses(
+        self, db: Session, records: Iterable[Tuple[int, dict]]
+    ) -> Iterator[Tuple[int, dict]]:
+        """
+        Replace course_code with the catalog's course id. An unknown code
+        refreshes the catalog once per import before it is reported.
+        """
+        codes = get_catalog(db).codes
+        for line_number, record in records:
+            code = str(record.pop("course_code", "")).strip()
+            course_id = codes.get(code)
+            if course_id is None and not self._catalog_refreshed:
+                self._catalog_refreshed = True
+                codes = refresh_catalog(db).codes
+                course_id = codes.get(code)
+            if course_id is None:
+                self.report.fail(line_number, f"Course with code {code!r} not found")
+                continue
+            record["course_id"] = course_id
+            if "completed" not in record:
+                record["completed"] = _completes(record.get("grade"))
+            yield line_number, record
+
+    def load_batch(self, db: Session, batch: List[Tuple[int, dict]]) -> None:
+        """
+        Resolve student numbers, validate, upsert and refresh the touched
+        students' stored progress, then commit the batch.
+        """
+        numbers = {str(record.get("student_id", "")).strip() for _, record in batch}
+        student_ids = dict(db.query(Student.student_id, Student.id).filter(Student.student_id.in_(numbers)))
+        records = []
+        for line_number, record in batch:
+            number = str(record.get("student_id", "")).strip()
+            if number not in student_ids:
+                self.report.fail(line_number, f"Student with number {number!r} not found")
+                continue
+            records.append((line_number, {**record, "student_id": student_ids[number]}))
+
+        rows = validate_records(db, records, self.report)
+        if rows:
+            upsert_enrollments(db, rows)
+            touched = sorted({row["student_id"] for row in rows})
+            recompute_progress(db, touched)
+            rebuild_transcript_bits(db, touched)
+        db.commit()
+        # Nothing from this batch is needed again; keep the session small.
+        db.expunge_all()
+        if self.on_batch is not None:
+            self.on_batch(self.report)
+
+    def result(self) -> BulkEnrollmentResult:
+        return self.report.result()
+
+
+def _completes(grade: Optional[str]) -> bool:
+    return bool(grade) and str(grade).strip().upper() not in NON_COMPLETING_GRADES
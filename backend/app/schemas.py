@@ -1,8 +1,18 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Dict, Generic, List, Optional, TypeVar
 from enum import Enum
 
 
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """One page of a list endpoint; pass next_cursor back as ?cursor= for the next."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
 class RequirementTypeEnum(str, Enum):
     CORE = "CORE"
     ELECTIVE = "ELECTIVE"
@@ -104,6 +114,20 @@ class Enrollment(EnrollmentBase):
         from_attributes = True
 
 
+class BulkEnrollmentError(BaseModel):
+    line: int
+    error: str
+
+
+class BulkEnrollmentResult(BaseModel):
+    received: int
+    loaded: int
+    failed: int
+    students_affected: int
+    # Capped; `failed` is the full count
+    errors: List[BulkEnrollmentError]
+
+
 class SubstitutionBase(BaseModel):
     original_course_id: int
     substitute_course_id: int
@@ -159,6 +183,30 @@ class RequirementProgress(BaseModel):
     missing_courses: List[Course]
 
 
+# Students per POST /api/audit/batch; larger cohorts go through the export.
+MAX_BATCH_AUDIT_SIZE = 1000
+
+
+class BatchAuditRequest(BaseModel):
+    student_ids: List[int] = Field(..., max_length=MAX_BATCH_AUDIT_SIZE)
+
+
+class SimulatedSubstitution(BaseModel):
+    original_course_id: int
+    substitute_course_id: int
+
+
+class AuditSimulationRequest(BaseModel):
+    add_course_ids: List[int] = []
+    drop_course_ids: List[int] = []
+    add_substitutions: List[SimulatedSubstitution] = []
+    drop_substitution_ids: List[int] = []
+
+
+class BatchSimulationRequest(BaseModel):
+    scenarios: List[AuditSimulationRequest]
+
+
 class AuditReport(BaseModel):
     student: Student
     program: Program
@@ -168,3 +216,61 @@ class AuditReport(BaseModel):
     status: str  # "on_track", "at_risk", "completed"
     requirements: List[RequirementProgress]
     graduation_eligible: bool
+
+
+class GraduationPlan(BaseModel):
+    student_id: int
+    objective: str  # "credits" or "courses"
+    feasible: bool
+    optimal: bool  # False if the time budget ran out before the search finished
+    courses: List[Course]
+    total_credits: float
+    blocked_requirement_ids: List[int]  # requirements the catalog cannot satisfy
+
+
+class CohortQueryResult(BaseModel):
+    """One page of a cohort; pass next_after back as ?after= for the next."""
+    program_id: int
+    count: int
+    student_ids: List[int]
+    next_after: Optional[int] = None
+
+
+class CourseDemand(BaseModel):
+    course_id: int
+    count: int
+    student_ids: List[int]
+
+
+class UnmetStudents(BaseModel):
+    requirement_id: int
+    count: int
+    student_ids: List[int]
+
+
+class RequirementHistogram(BaseModel):
+    requirement_id: int
+    requirement_name: str
+    bands: Dict[str, int]  # students per completion band: "0-25" ... "75-100", "met"
+
+
+class ProgramAnalytics(BaseModel):
+    program_id: int
+    student_count: int
+    status_counts: Dict[str, int]  # "completed", "on_track", "at_risk"
+    requirements: List[RequirementHistogram]
+    credit_quantiles: Dict[str, float]  # "min", "p25", "median", "p75", "p90", "max"
+
+
+class RouteMetrics(BaseModel):
+    method: str
+    route: str
+    requests: int
+    errors: int  # 5xx responses
+    mean_ms: float
+    p50_ms: float  # over the last 1000 requests
+    p99_ms: float
+    queries_per_request: float
+    max_queries: int
+    db_ms_per_request: float
+    phase_ms_per_request: Dict[str, float]  # "load", "evaluate", "serialize", "pdf"
@@ -0,0 +1,75 @@
+"""
+Fast JSON encoding for audit payloads.
+
+Catalog courses make up most of an AuditReport and are identical on every
+call, so the catalog snapshot keeps each course pre-encoded and audit bodies
+are assembled by splicing those bytes in. Everything else is encoded with
+orjson. The output is byte-for-byte what AuditReport.model_dump_json()
+produces.
+"""
+from typing import Iterable, List
+
+import orjson
+
+from app.catalog import current_catalog
+from app.instrumentation import phase
+from app.schemas import AuditReport, Course as CourseSchema
+
+
+def encode_course(course: CourseSchema) -> bytes:
+    return orjson.dumps(course.model_dump())
+
+
+def encode_audit_report(report: AuditReport) -> bytes:
+    """
+    Encode a report, reusing the catalog's pre-encoded course fragments.
+    """
+    with phase("serialize"):
+        return _encode_audit_report(report)
+
+
+def encode_audit_reports(reports: Iterable[AuditReport]) -> bytes:
+    reports = list(reports)
+    with phase("serialize", len(reports)):
+        return b"[" + b",".join(_encode_audit_report(report) for report in reports) + b"]"
+
+
+def _encode_audit_report(report: AuditReport) -> bytes:
+    snapshot = current_catalog()
+    courses, fragments = (snapshot.courses, snapshot.fragments) if snapshot is not None else ({}, {})
+
+    def course_list(items: List[CourseSchema]) -> bytes:
+        # A fragment is only reused for the exact schema object it was encoded
+        # from, so a snapshot swapped in mid-request can never leak into a body.
+        return b"[" + b",".join([
+            fragments[course.id] if courses.get(course.id) is course else encode_course(course)
+            for course in items
+        ]) + b"]"
+
+    parts = [orjson.dumps({
+        "student": report.student.model_dump(),
+        "program": report.program.model_dump(),
+        "total_credits_required": report.total_credits_required,
+        "total_credits_completed": report.total_credits_completed,
+        "overall_percentage": report.overall_percentage,
+        "status": report.status,
+    })[:-1], b',"requirements":[']
+    for index, progress in enumerate(report.requirements):
+        if index:
+            parts.append(b",")
+        parts.append(orjson.dumps({
+            "requirement_id": progress.requirement_id,
+            "requirement_name": progress.requirement_name,
+            "requirement_type": progress.requirement_type,
+            "credits_required": progress.credits_required,
+            "credits_completed": progress.credits_completed,
+            "percentage": progress.percentage,
+            "is_met": progress.is_met,
+        })[:-1])
+        parts.append(b',"completed_courses":')
+        parts.append(course_list(progress.completed_courses))
+        parts.append(b',"missing_courses":')
+        parts.append(course_list(progress.missing_courses))
+        parts.append(b"}")
+    parts.append(b'],"graduation_eligible":true}' if report.graduation_eligible else b'],"graduation_eligible":false}')
+    return b"".join(parts)
@@ -0,0 +1,66 @@
+"""
+Constant-time resolution of approved course substitutions.
+
+A student's approved substitutions are indexed once per audit (or once per
+student in a batch) into forward and reverse multi-maps, so the engine never
+scans the substitution list per enrollment. Both shapes are supported:
+
+- one-to-many: several substitutes approved for the same original course
+- many-to-one: one substitute approved for several original courses
+"""
+from typing import AbstractSet, Dict, Iterable, List, Optional, Tuple
+
+EMPTY: Tuple[int, ...] = ()
+
+
+class SubstitutionResolver:
+    """
+    Forward (original -> substitutes) and reverse (substitute -> originals)
+    multi-maps over a student's approved substitutions.
+    """
+
+    __slots__ = ("forward", "reverse")
+
+    def __init__(self, pairs: Iterable[Tuple[int, int]] = ()):
+        forward: Dict[int, List[int]] = {}
+        reverse: Dict[int, List[int]] = {}
+        for original_id, substitute_id in pairs:
+            substitutes = forward.setdefault(original_id, [])
+            if substitute_id not in substitutes:
+                substitutes.append(substitute_id)
+                reverse.setdefault(substitute_id, []).append(original_id)
+        self.forward: Dict[int, Tuple[int, ...]] = {k: tuple(v) for k, v in forward.items()}
+        self.reverse: Dict[int, Tuple[int, ...]] = {k: tuple(v) for k, v in reverse.items()}
+
+    @classmethod
+    def from_substitutions(cls, substitutions: Iterable) -> "SubstitutionResolver":
+        return cls((sub.original_course_id, sub.substitute_course_id) for sub in substitutions)
+
+    def __bool__(self) -> bool:
+        return bool(self.reverse)
+
+    def substitutes_for(self, original_id: int) -> Tuple[int, ...]:
+        return self.forward.get(original_id, EMPTY)
+
+    def originals_for(self, substitute_id: int) -> Tuple[int, ...]:
+        return self.reverse.get(substitute_id, EMPTY)
+
+    def credited_original(
+        self,
+        substitute_id: int,
+        required_course_ids: AbstractSet[int],
+        completed_course_ids: AbstractSet[int]
+    ) -> Optional[int]:
+        """
+        Pick the required original course a completed substitute counts as.
+        Originals that are still missing are preferred, so one substitute
+        approved for several originals fills the gaps first.
+        """
+        credited = None
+        for original_id in self.reverse.get(substitute_id, EMPTY):
+            if original_id in required_course_ids:
+                if original_id not in completed_course_ids:
+                    return original_id
+                if credited is None:
+                    credited = original_id
+        return credited
@@ -0,0 +1,243 @@
+"""
+Vectorized whole-program audit engine.
+
+Completed enrollments are treated as a sparse student x course credit matrix
+(COO triplets) and requirements as a course x requirement incidence matrix.
+Credits per requirement, is_met, overall percentage and status for every
+student in a program then come out of a handful of NumPy operations. Reports
+are identical to AuditEngine.run_audit.
+"""
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.audit_loader import (
+    ProgramRecord, StudentRecord, load_program, load_program_students, load_students, load_transcripts
+)
+from app.catalog import get_catalog
+from app.models import Student, Enrollment, Substitution
+from app.program_rules import get_program_rules
+from app.substitutions import SubstitutionResolver
+from app.schemas import AuditReport, RequirementProgress
+
+
+class VectorizedAuditEngine:
+    """
+    Alternate engine mode for registrar-wide runs over a whole program.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def run_program(self, program_id: int) -> List[AuditReport]:
+        """
+        Audit every student in a program, ordered by student id.
+        """
+        program = load_program(self.db, program_id)
+        if not program:
+            raise ValueError(f"Program with id {program_id} not found")
+
+        students = load_program_students(self.db, program_id)
+        if not students:
+            return []
+
+        enrollment_rows = self.db.query(Enrollment.student_id, Enrollment.course_id).join(
+            Student, Student.id == Enrollment.student_id
+        ).filter(
+            Student.program_id == program_id,
+            Enrollment.completed == True
+        ).order_by(Enrollment.id).all()
+
+        substitution_rows = self.db.query(
+            Substitution.student_id,
+            Substitution.original_course_id,
+            Substitution.substitute_course_id
+        ).join(
+            Student, Student.id == Substitution.student_id
+        ).filter(
+            Student.program_id == program_id,
+            Substitution.approved == True
+        ).order_by(Substitution.id).all()
+        return self._evaluate(program, students, enrollment_rows, substitution_rows)
+
+    def run_audits(self, student_ids: List[int]) -> List[AuditReport]:
+        """
+        Audit the given students, in student_ids order, with one vectorized
+        pass per program (the drop-in for AuditEngine.run_audits).
+        """
+        student_ids = list(dict.fromkeys(student_ids))
+        students_by_id = load_students(self.db, student_ids)
+        missing_ids = [sid for sid in student_ids if sid not in students_by_id]
+        if missing_ids:
+            raise ValueError(f"Students with ids {missing_ids} not found")
+        transcripts = load_transcripts(self.db, student_ids)
+
+        students_by_program: Dict[int, List[StudentRecord]] = defaultdict(list)
+        for student_id in student_ids:
+            student = students_by_id[student_id]
+            students_by_program[student.program_id].append(student)
+
+        reports: Dict[int, AuditReport] = {}
+        for students in students_by_program.values():
+            enrollment_rows = [
+                (student.id, course_id) for student in students for course_id in transcripts[student.id].course_ids
+            ]
+            substitution_rows = [
+                (student.id, original_id, substitute_id)
+                for student in students
+                for original_id, substitute_id in transcripts[student.id].substitution_pairs()
+            ]
+            for report in self._evaluate(students[0].program, students, enrollment_rows, substitution_rows):
+                reports[report.student.id] = report
+        return [reports[student_id] for student_id in student_ids]
+
+    def _evaluate(
+        self,
+        program: ProgramRecord,
+        students: List[StudentRecord],
+        enrollment_rows: List[Tuple[int, int]],
+        substitution_rows: List[Tuple[int, int, int]],
+    ) -> List[AuditReport]:
+        """
+        Audit students of one program from their completed (student id,
+        course id) rows and approved (student id, original, substitute) rows,
+        each in id order per student. Reports follow the order of students.
+        """
+        requirements = get_program_rules(self.db, program.id).requirements
+
+        # Matrix columns: every course that is required or was taken.
+        course_ids = {course_id for _, course_id in enrollment_rows}
+        for requirement in requirements:
+            course_ids |= requirement.course_ids
+        catalog = get_catalog(self.db, course_ids).courses
+        courses = [catalog[course_id] for course_id in sorted(course_ids)]
+        column = {course.id: index for index, course in enumerate(courses)}
+        credits = np.array([course.credits for course in courses], dtype=np.float64)
+
+        incidence = np.zeros((len(courses), len(requirements)), dtype=bool)
+        for j, requirement in enumerate(requirements):
+            incidence[[column[course_id] for course_id in requirement.course_ids], j] = True
+
+        # Enrollment triplets, grouped by student while keeping enrollment order.
+        row = {student.id: index for index, student in enumerate(students)}
+        count = len(enrollment_rows)
+        e_student = np.fromiter((row[sid] for sid, _ in enrollment_rows), dtype=np.intp, count=count)
+        e_course = np.fromiter((column[cid] for _, cid in enrollment_rows), dtype=np.intp, count=count)
+        order = np.argsort(e_student, kind="stable")
+        e_student, e_course = e_student[order], e_course[order]
+        position = np.empty(count, dtype=np.intp)
+        position[order] = np.arange(count)
+
+        # (enrollment, original course) pairs for completed substitutes.
+        resolvers = self._resolvers(substitution_rows)
+        pair_enrollment, pair_original = [], []
+        for k, (student_id, course_id) in enumerate(enrollment_rows):
+            resolver = resolvers.get(student_id)
+            if resolver:
+                for original_id in resolver.originals_for(course_id):
+                    if original_id in column:
+                        pair_enrollment.append(k)
+                        pair_original.append(column[original_id])
+
+        # A course counts toward a requirement directly, or through any
+        # original course it substitutes for.
+        direct = incidence[e_course]
+        matched = direct.copy()
+        if pair_enrollment:
+            np.logical_or.at(
+                matched,
+                position[np.array(pair_enrollment, dtype=np.intp)],
+                incidence[np.array(pair_original, dtype=np.intp)],
+            )
+
+        earned = np.zeros((len(students), len(requirements)), dtype=np.float64)
+        np.add.at(earned, e_student, matched * credits[e_course][:, None])
+
+        thresholds = np.array([r.credits_required for r in requirements], dtype=np.float64)
+        is_met = earned >= thresholds
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentage = np.where(thresholds > 0, earned / thresholds * 100, 0.0)
+
+        # Totals add the rounded per-requirement credits left to right, as the
+        # per-student engine does.
+        rounded = np.array(
+            [[round(value, 2) for value in values] for values in earned.tolist()],
+            dtype=np.float64,
+        ).reshape(earned.shape)
+        total = np.zeros(len(students), dtype=np.float64)
+        for j in range(len(requirements)):
+            total += rounded[:, j]
+
+        graduation_eligible = is_met.all(axis=1)
+        if program.total_credits_required > 0:
+            overall = total / program.total_credits_required * 100
+        else:
+            overall = np.zeros(len(students), dtype=np.float64)
+        overall[graduation_eligible] = 100.0
+        status = np.select(
+            [graduation_eligible, overall >= 75.0],
+            ["completed", "on_track"],
+            default="at_risk",
+        )
+
+        # Materialize reports from the computed matrices.
+        bounds = np.searchsorted(e_student, np.arange(len(students) + 1))
+        reports = []
+        for i, student in enumerate(students):
+            start, stop = bounds[i], bounds[i + 1]
+            student_courses = e_course[start:stop]
+            student_direct = direct[start:stop]
+            student_matched = matched[start:stop]
+            resolver = resolvers.get(student.id)
+
+            requirement_progress_list = []
+            for j, requirement in enumerate(requirements):
+                completed_course_ids = set()
+                completed_courses = []
+                for k in np.flatnonzero(student_matched[:, j]):
+                    course = courses[student_courses[k]]
+                    if student_direct[k, j]:
+                        completed_course_ids.add(course.id)
+                    else:
+                        completed_course_ids.add(
+                            resolver.credited_original(course.id, requirement.course_ids, completed_course_ids)
+                        )
+                    completed_courses.append(course)
+                missing_course_ids = requirement.course_ids - completed_course_ids
+
+                requirement_progress_list.append(RequirementProgress(
+                    requirement_id=requirement.id,
+                    requirement_name=requirement.name,
+                    requirement_type=requirement.requirement_type,
+                    credits_required=requirement.credits_required,
+                    credits_completed=float(rounded[i, j]),
+                    percentage=round(float(percentage[i, j]), 2),
+                    is_met=bool(is_met[i, j]),
+                    completed_courses=completed_courses,
+                    missing_courses=[
+                        courses[column[course_id]] for course_id in sorted(missing_course_ids)
+                    ],
+                ))
+
+            reports.append(AuditReport(
+                student=student,
+                program=program,
+                total_credits_required=program.total_credits_required,
+                total_credits_completed=float(total[i]),
+                overall_percentage=round(float(overall[i]), 2),
+                status=str(status[i]),
+                requirements=requirement_progress_list,
+                graduation_eligible=bool(graduation_eligible[i]),
+            ))
+        return reports
+
+    def _resolvers(self, substitution_rows: List[Tuple[int, int, int]]) -> Dict[int, SubstitutionResolver]:
+        """
+        Build one substitution resolver per student that has approved substitutions.
+        """
+        pairs: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        for student_id, original_id, substitute_id in substitution_rows:
+            pairs[student_id].append((original_id, substitute_id))
+        return {student_id: SubstitutionResolver(student_pairs) for student_id, student_pairs in pairs.items()}
@@ -0,0 +1,160 @@
+"""
+Full-population audit job.
+Audits every student in one or all programs across all CPU cores and writes
+one AuditReport per line to an NDJSON file.
+
+Students are split into chunks of consecutive ids; each worker process keeps
+its own DB session and audits the ids of a chunk with the selected engine's
+run_audits: AuditEngine (--engine standard, the default) or
+VectorizedAuditEngine (--engine vectorized), whose reports are identical.
+Finished chunks are recorded (as id ranges) in a checkpoint file next to the
+output, so an interrupted run picks up where it stopped with --resume. Chunks
+finish out of order, so a resumed run's chunks can span ranges that are
+already done; workers only ever audit the ids they are sent, never a range.
+
+Usage:
+    python audit_job.py --output audits.ndjson [--program-id 1] [--workers 8] [--chunk-size 500] [--resume]
+                        [--engine vectorized]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+from app.database import SessionLocal, engine
+from app.models import Student
+from app.audit_engine import AuditEngine
+from app.serialization import encode_audit_report
+from app.vectorized_engine import VectorizedAuditEngine
+
+ENGINES = {"standard": AuditEngine, "vectorized": VectorizedAuditEngine}
+
+# Per-worker session and engine class, set by _init_worker in each child process.
+_worker_db = None
+_worker_engine = AuditEngine
+
+
+def _init_worker(engine_name: str = "standard"):
+    global _worker_db, _worker_engine
+    # Connections inherited from the parent must not be shared across processes.
+    engine.dispose(close=False)
+    _worker_db = SessionLocal()
+    _worker_engine = ENGINES[engine_name]
+
+
+def _audit_chunk(student_ids: List[int]) -> Tuple[int, int, List[str]]:
+    reports = _worker_engine(_worker_db).run_audits(student_ids)
+    lines = [encode_audit_report(report).decode() for report in reports]
+    # Keep the identity map from growing across chunks.
+    _worker_db.expunge_all()
+    _worker_db.rollback()
+    return student_ids[0], student_ids[-1], lines
+
+
+def _load_checkpoint(path: str) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Return the finished id ranges and the output size they correspond to.
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    return [tuple(r) for r in checkpoint["done"]], checkpoint["output_bytes"]
+
+
+def _save_checkpoint(path: str, done: List[Tuple[int, int]], output_bytes: int):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"done": done, "output_bytes": output_bytes}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _chunks(student_ids: List[int], chunk_size: int) -> List[List[int]]:
+    return [student_ids[i:i + chunk_size] for i in range(0, len(student_ids), chunk_size)]
+
+
+def run_job(
+    output: str,
+    program_id: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 500,
+    resume: bool = False,
+    engine_name: str = "standard",
+):
+    if engine_name not in ENGINES:
+        raise ValueError(f"Unknown engine {engine_name!r}; choose from {', '.join(ENGINES)}")
+    checkpoint_path = f"{output}.checkpoint"
+    done: List[Tuple[int, int]] = []
+    output_bytes = 0
+    if resume:
+        done, output_bytes = _load_checkpoint(checkpoint_path)
+    elif os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    db = SessionLocal()
+    try:
+        query = db.query(Student.id)
+        if program_id is not None:
+            query = query.filter(Student.program_id == program_id)
+        student_ids = [
+            student_id for (student_id,) in query.order_by(Student.id)
+            if not any(first <= student_id <= last for first, last in done)
+        ]
+    finally:
+        db.close()
+
+    chunks = _chunks(student_ids, chunk_size)
+    total = len(student_ids)
+    print(f"Auditing {total} students in {len(chunks)} chunks"
+          f"{f' (resuming after {len(done)} chunks)' if done else ''}", file=sys.stderr)
+
+    # Drop anything written after the last checkpoint so resumed runs never
+    # duplicate lines.
+    with open(output, "a+b") as f:
+        f.truncate(output_bytes)
+
+    audited = 0
+    started = time.monotonic()
+    with open(output, "ab") as out, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(engine_name,)
+    ) as pool:
+        futures = [pool.submit(_audit_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            first_id, last_id, lines = future.result()
+            if lines:
+                out.write(("\n".join(lines) + "\n").encode())
+            out.flush()
+            os.fsync(out.fileno())
+
+            done.append((first_id, last_id))
+            _save_checkpoint(checkpoint_path, done, out.tell())
+
+            audited += len(lines)
+            elapsed = time.monotonic() - started
+            rate = audited / elapsed if elapsed > 0 else 0.0
+            print(f"  {audited}/{total} students ({rate:.0f}/s)", file=sys.stderr)
+
+    os.remove(checkpoint_path)
+    print(f"✓ Wrote {audited} audits to {output}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit every student across all CPU cores.")
+    parser.add_argument("--output", required=True, help="NDJSON file to write audit reports to")
+    parser.add_argument("--program-id", type=int, help="Only audit students in this program")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Students per chunk")
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    parser.add_argument("--engine", choices=list(ENGINES), default="standard",
+                        help="Audit engine (vectorized audits each program's students in one NumPy pass)")
+    args = parser.parse_args()
+    run_job(args.output, args.program_id, args.workers, args.chunk_size, args.resume, args.engine)
+
+
+if __name__ == "__main__":
+    main()
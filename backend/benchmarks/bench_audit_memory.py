@@ -0,0 +1,116 @@
+"""
+Benchmark: memory and allocations per audit for the cohort loading path.
+
+Compares hydrating full ORM objects (the previous Student/Enrollment/
+Substitution queries with a joined program) against the lean column-tuple
+loader in app.audit_loader, and reports the full AuditEngine.run_audits path
+for reference. For each path it prints wall time, tracemalloc peak and the
+memory blocks still held by the loaded inputs, all per audited student.
+
+Runs against DATABASE_URL; seed it (or generate a larger dataset) first.
+
+Usage:
+    python -m benchmarks.bench_audit_memory [--limit N] [--repeat R]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, List
+
+from sqlalchemy.orm import joinedload
+
+from app.audit_engine import AuditEngine
+from app.audit_loader import load_students, load_transcripts
+from app.database import SessionLocal
+from app.models import Student, Enrollment, Substitution
+
+
+def _orm_load(db, student_ids: List[int]):
+    students = db.query(Student).options(
+        joinedload(Student.program)
+    ).filter(Student.id.in_(student_ids)).all()
+    enrollments = defaultdict(list)
+    for enrollment in db.query(Enrollment).filter(
+        Enrollment.student_id.in_(student_ids),
+        Enrollment.completed == True
+    ).order_by(Enrollment.id):
+        enrollments[enrollment.student_id].append(enrollment)
+    substitutions = defaultdict(list)
+    for substitution in db.query(Substitution).filter(
+        Substitution.student_id.in_(student_ids),
+        Substitution.approved == True
+    ).order_by(Substitution.id):
+        substitutions[substitution.student_id].append(substitution)
+    return students, enrollments, substitutions
+
+
+def _lean_load(db, student_ids: List[int]):
+    return load_students(db, student_ids), load_transcripts(db, student_ids)
+
+
+def _audit(db, student_ids: List[int]):
+    return AuditEngine(db).run_audits(student_ids)
+
+
+def _measure(label: str, fn: Callable, student_ids: List[int], repeat: int) -> None:
+    best_seconds = float("inf")
+    peak = retained_bytes = retained_blocks = 0
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            # Warm the rule and catalog caches outside the measurement.
+            AuditEngine(db).run_audits(student_ids[:1])
+            db.expunge_all()
+            gc.collect()
+
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            started = time.perf_counter()
+            result = fn(db, student_ids)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+            diff = after.compare_to(before, "filename")
+            retained_bytes = sum(stat.size_diff for stat in diff)
+            retained_blocks = sum(stat.count_diff for stat in diff)
+            best_seconds = min(best_seconds, elapsed)
+            del result
+        finally:
+            db.close()
+
+    count = len(student_ids)
+    print(f"{label:<22} {best_seconds / count * 1000:>10.3f} {peak / count / 1024:>14.1f} "
+          f"{retained_bytes / count / 1024:>18.1f} {retained_blocks / count:>12.1f}")
+
+
+def run(limit: int = 0, repeat: int = 3) -> None:
+    db = SessionLocal()
+    try:
+        query = db.query(Student.id).order_by(Student.id)
+        if limit:
+            query = query.limit(limit)
+        student_ids = [student_id for student_id, in query]
+    finally:
+        db.close()
+    if not student_ids:
+        print("No students found; seed the database first.")
+        return
+
+    print(f"{len(student_ids)} students, best of {repeat}")
+    print(f"{'path':<22} {'ms/audit':>10} {'peak KiB/audit':>14} {'retained KiB/audit':>18} "
+          f"{'blocks/audit':>12}")
+    _measure("ORM load", _orm_load, student_ids, repeat)
+    _measure("lean load", _lean_load, student_ids, repeat)
+    _measure("lean run_audits", _audit, student_ids, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, default=0, help="audit at most N students (0 = all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.limit, args.repeat)
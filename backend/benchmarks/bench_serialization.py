@@ -0,0 +1,96 @@
+"""
+Benchmark: CPU time to serialize audit responses.
+
+Compares, per response body:
+  - FastAPI's response_model path (validate, serialize, json.dumps), which the
+    batch and simulate endpoints used before
+  - AuditReport.model_dump_json(), which the cached GET body used before
+  - app.serialization.encode_audit_report, which splices the catalog's
+    pre-encoded course fragments into orjson output
+and, for the list endpoints, the default JSONResponse against ORJSONResponse.
+
+Runs against DATABASE_URL; seed it (or generate a larger dataset) first.
+
+Usage:
+    python -m benchmarks.bench_serialization [--repeat R]
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.audit_engine import AuditEngine
+from app.catalog import get_catalog
+from app.database import SessionLocal
+from app.models import Student
+from app.schemas import AuditReport, Course as CourseSchema
+from app.serialization import encode_audit_report
+
+
+def _cpu_per_call(fn: Callable[[], object], calls: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.process_time() - started)
+    return best / calls * 1e6
+
+
+def _fastapi_render(field, response_class):
+    loop = asyncio.new_event_loop()
+
+    def render(content):
+        serialized = loop.run_until_complete(serialize_response(field=field, response_content=content))
+        return response_class(serialized).body
+
+    return render
+
+
+def run(repeat: int = 5, calls: int = 200) -> None:
+    db = SessionLocal()
+    try:
+        student_ids = [student_id for student_id, in db.query(Student.id).order_by(Student.id)]
+        reports = AuditEngine(db).run_audits(student_ids)
+        courses: List[CourseSchema] = list(get_catalog(db).courses.values())
+    finally:
+        db.close()
+    if not reports:
+        print("No students found; seed the database first.")
+        return
+
+    for report in reports:
+        assert encode_audit_report(report) == report.model_dump_json().encode()
+
+    audit_default = _fastapi_render(create_response_field("audit", AuditReport), JSONResponse)
+    list_field = create_response_field("courses", List[CourseSchema])
+    list_default = _fastapi_render(list_field, JSONResponse)
+    list_orjson = _fastapi_render(list_field, ORJSONResponse)
+
+    def each_report(encode):
+        return lambda: [encode(report) for report in reports]
+
+    per_report = calls // 10 or 1
+    rows = [
+        ("audit: FastAPI response_model", each_report(audit_default), len(reports)),
+        ("audit: model_dump_json", each_report(lambda r: r.model_dump_json().encode()), len(reports)),
+        ("audit: spliced orjson", each_report(encode_audit_report), len(reports)),
+        ("course list: JSONResponse", lambda: list_default(courses), 1),
+        ("course list: ORJSONResponse", lambda: list_orjson(courses), 1),
+    ]
+    print(f"{len(reports)} audits, {len(courses)} catalog courses, best of {repeat}")
+    print(f"{'path':<32} {'CPU us/response':>16}")
+    for label, fn, count in rows:
+        calls_for_row = per_report if count > 1 else calls
+        print(f"{label:<32} {_cpu_per_call(fn, calls_for_row, repeat) / count:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.repeat)
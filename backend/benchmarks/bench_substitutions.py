@@ -0,0 +1,104 @@
+"""
+Benchmark: substitution resolution inside requirement evaluation.
+
+Compares the old per-enrollment scan over a substitution dict
+(`course_id in substitution_map.values()` followed by a linear `next(...)`)
+with SubstitutionResolver's reverse multi-map, on in-memory data only. The
+legacy time grows with the number of substitutions; the resolver time does
+not. The last column is the full per-requirement engine path for reference.
+
+Usage:
+    python -m benchmarks.bench_substitutions
+"""
+import random
+import timeit
+from typing import Dict, List, NamedTuple
+
+from app.audit_engine import AuditEngine
+from app.program_rules import CompiledRequirement
+from app.schemas import Course as CourseSchema
+from app.substitutions import SubstitutionResolver
+
+
+class _Enrollment(NamedTuple):
+    course_id: int
+
+
+def _legacy_credits(requirement: CompiledRequirement, enrollments: List[_Enrollment],
+                    substitution_map: Dict[int, int], credits: Dict[int, float]) -> float:
+    # The pre-resolver matching loop, kept verbatim for comparison.
+    total = 0.0
+    for enrollment in enrollments:
+        course_id = enrollment.course_id
+        if course_id in requirement.course_ids:
+            total += credits[course_id]
+        elif course_id in substitution_map.values():
+            original_id = next((k for k, v in substitution_map.items() if v == course_id), None)
+            if original_id and original_id in requirement.course_ids:
+                total += credits[course_id]
+    return total
+
+
+def _resolver_credits(requirement: CompiledRequirement, enrollments: List[_Enrollment],
+                      resolver: SubstitutionResolver, credits: Dict[int, float]) -> float:
+    # Same loop as AuditEngine._calculate_requirement_progress, minus schema building.
+    total = 0.0
+    completed = set()
+    for enrollment in enrollments:
+        course_id = enrollment.course_id
+        if course_id in requirement.course_ids:
+            completed.add(course_id)
+            total += credits[course_id]
+        elif resolver:
+            original_id = resolver.credited_original(course_id, requirement.course_ids, completed)
+            if original_id is not None:
+                completed.add(original_id)
+                total += credits[course_id]
+    return total
+
+
+def run(enrollment_counts=(20, 50, 100), substitution_counts=(5, 50, 500), requirement_count=8, repeat=5):
+    rng = random.Random(42)
+    course_ids = list(range(1, 2001))
+    catalog = {cid: CourseSchema(id=cid, course_code=f"C{cid}", name=f"Course {cid}", credits=4.0)
+               for cid in course_ids}
+    credits = {cid: course.credits for cid, course in catalog.items()}
+    requirements = [
+        CompiledRequirement(r, f"Requirement {r}", "CORE", 32.0, frozenset(rng.sample(course_ids, 40)))
+        for r in range(requirement_count)
+    ]
+    engine = AuditEngine(db=None)
+
+    print(f"{'enrollments':>11} {'substitutions':>13} {'legacy scan (ms)':>17} {'resolver (ms)':>14} "
+          f"{'speedup':>8} {'full engine (ms)':>17}")
+    for enrollment_count in enrollment_counts:
+        for substitution_count in substitution_counts:
+            enrollments = [_Enrollment(cid) for cid in rng.sample(course_ids, enrollment_count)]
+            enrolled_ids = [enrollment.course_id for enrollment in enrollments]
+            pairs = [(rng.choice(course_ids), rng.choice(course_ids)) for _ in range(substitution_count)]
+            substitution_map = dict(pairs)
+
+            def legacy():
+                for requirement in requirements:
+                    _legacy_credits(requirement, enrollments, substitution_map, credits)
+
+            def resolver():
+                resolved = SubstitutionResolver(pairs)
+                for requirement in requirements:
+                    _resolver_credits(requirement, enrollments, resolved, credits)
+
+            def engine_path():
+                resolved = SubstitutionResolver(pairs)
+                for requirement in requirements:
+                    engine._calculate_requirement_progress(requirement, enrolled_ids, resolved, catalog)
+
+            number = 20
+            legacy_ms = min(timeit.repeat(legacy, number=number, repeat=repeat)) / number * 1000
+            resolver_ms = min(timeit.repeat(resolver, number=number, repeat=repeat)) / number * 1000
+            engine_ms = min(timeit.repeat(engine_path, number=number, repeat=repeat)) / number * 1000
+            print(f"{enrollment_count:>11} {substitution_count:>13} {legacy_ms:>17.3f} {resolver_ms:>14.3f} "
+                  f"{legacy_ms / resolver_ms:>7.1f}x {engine_ms:>17.3f}")
+
+
+if __name__ == "__main__":
+    run()
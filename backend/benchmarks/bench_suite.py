@@ -0,0 +1,345 @@
+"""
+Benchmark suite: audit engine, audit endpoints and PDF rendering at scale.
+
+For each of --scales (student counts) the contents of DATABASE_URL are
+replaced with a generate_data.py dataset (same --seed, so runs are
+comparable), then it measures:
+  - AuditEngine.run_audit latency (p50/p99) and SQL queries per audit
+  - AuditEngine.run_audits throughput and SQL queries per batch
+  - GET /api/audit/{id} (first request, then cached) and
+    GET /api/audit/{id}/pdf p50/p99 through the ASGI app, in process
+  - POST /api/audit/batch over every student in BATCH_SIZE requests:
+    students per second, request p50/p99 and queries per request
+  - generate_audit_pdf pages per second
+With --no-generate the data already in the database is measured instead.
+Since generating wipes the database, it only runs when the database is
+named with --database-url (it must be the configured DATABASE_URL) or
+--wipe-database is passed.
+
+Results can be saved as a JSON baseline and compared against one: a metric
+worse than the baseline by more than --threshold is a regression (query
+counts are deterministic, so any increase is one) and the exit status is 1.
+Timings depend on the machine; compare baselines taken on the same one.
+
+Usage:
+    python -m benchmarks.bench_suite --database-url $DATABASE_URL [--scales 1000,10000] [--samples 200]
+                                     [--save baseline.json]
+    python -m benchmarks.bench_suite --wipe-database --scales 1000,10000 --compare baseline.json [--threshold 0.2]
+    python -m benchmarks.bench_suite --no-generate [--samples 200]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from app.audit_cache import audit_cache
+from app.audit_engine import AuditEngine
+from app.catalog import refresh_catalog
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models import Student
+from app.pdf_generator import generate_audit_pdf
+from app.program_rules import invalidate_program_rules
+from generate_data import generate
+
+BATCH_SIZE = 500
+# ReportLab writes one "/Type /Page" object per page (and "/Type /Pages" for the tree).
+PDF_PAGE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+class QueryCounter:
+    """
+    Counts statements executed on any engine (sync, async and replicas).
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    @contextmanager
+    def counting(self) -> Iterator["QueryCounter"]:
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        try:
+            yield self
+        finally:
+            event.remove(Engine, "before_cursor_execute", self._before_cursor_execute)
+
+
+def _percentiles(prefix: str, seconds: List[float]) -> Dict[str, float]:
+    cuts = statistics.quantiles(seconds, n=100, method="inclusive") if len(seconds) > 1 else seconds * 99
+    return {f"{prefix}_p50_ms": cuts[49] * 1000, f"{prefix}_p99_ms": cuts[98] * 1000}
+
+
+def _timed(fn: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def bench_engine(student_ids: List[int], sample_ids: List[int]) -> Dict[str, float]:
+    db = SessionLocal()
+    try:
+        # Warm the rule and catalog caches outside the measurement.
+        AuditEngine(db).run_audits(sample_ids[:1])
+        latencies = []
+        counter = QueryCounter()
+        with counter.counting():
+            for student_id in sample_ids:
+                latencies.append(_timed(lambda: AuditEngine(db).run_audit(student_id)))
+                db.expunge_all()
+        audit_queries = counter.count / len(sample_ids)
+
+        counter = QueryCounter()
+        batches = 0
+        started = time.perf_counter()
+        with counter.counting():
+            for start in range(0, len(student_ids), BATCH_SIZE):
+                AuditEngine(db).run_audits(student_ids[start:start + BATCH_SIZE])
+                db.expunge_all()
+                batches += 1
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    return {
+        **_percentiles("run_audit", latencies),
+        "run_audit_queries": audit_queries,
+        "run_audits_per_s": len(student_ids) / elapsed,
+        "run_audits_queries_per_batch": counter.count / batches,
+    }
+
+
+async def _bench_endpoints(student_ids: List[int], sample_ids: List[int]) -> Dict[str, float]:
+    first, cached, pdf, batch = [], [], [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def get(url: str, into: List[float]) -> None:
+            started = time.perf_counter()
+            response = await client.get(url)
+            into.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+        await get(f"/api/audit/{sample_ids[0]}", [])
+        audit_cache.clear()
+        for student_id in sample_ids:
+            await get(f"/api/audit/{student_id}", first)
+        for student_id in sample_ids:
+            await get(f"/api/audit/{student_id}", cached)
+        for student_id in sample_ids:
+            await get(f"/api/audit/{student_id}/pdf", pdf)
+
+        # The whole population through the batch endpoint, as a cohort report would.
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with counter.counting():
+            for start in range(0, len(student_ids), BATCH_SIZE):
+                request_started = time.perf_counter()
+                response = await client.post(
+                    "/api/audit/batch", json={"student_ids": student_ids[start:start + BATCH_SIZE]}
+                )
+                batch.append(time.perf_counter() - request_started)
+                response.raise_for_status()
+        elapsed = time.perf_counter() - started
+    return {
+        **_percentiles("get_audit_first", first),
+        **_percentiles("get_audit_cached", cached),
+        **_percentiles("get_audit_pdf", pdf),
+        **_percentiles("post_audit_batch", batch),
+        "post_audit_batch_per_s": len(student_ids) / elapsed,
+        "post_audit_batch_queries": counter.count / len(batch),
+    }
+
+
+def bench_endpoints(student_ids: List[int], sample_ids: List[int]) -> Dict[str, float]:
+    # One request log line per request would drown the report; keep N+1 warnings.
+    logging.getLogger("app.requests").setLevel(logging.WARNING)
+    return asyncio.run(_bench_endpoints(student_ids, sample_ids))
+
+
+def bench_pdf(sample_ids: List[int]) -> Dict[str, float]:
+    db = SessionLocal()
+    try:
+        reports = AuditEngine(db).run_audits(sample_ids)
+    finally:
+        db.close()
+    pages = 0
+    started = time.perf_counter()
+    for report in reports:
+        pages += len(PDF_PAGE.findall(generate_audit_pdf(report)))
+    elapsed = time.perf_counter() - started
+    return {"pdf_pages_per_s": pages / elapsed, "pdf_pages_per_report": pages / len(reports)}
+
+
+def _reset_caches() -> None:
+    # The dataset changed under the in-process caches.
+    audit_cache.clear()
+    invalidate_program_rules()
+    db = SessionLocal()
+    try:
+        refresh_catalog(db)
+    finally:
+        db.close()
+
+
+def run_scale(students: int, samples: int, seed: int, regenerate: bool) -> Dict[str, float]:
+    if regenerate:
+        generate(programs=8, courses=400, students=students, seed=seed)
+    _reset_caches()
+    db = SessionLocal()
+    try:
+        student_ids = [student_id for student_id, in db.query(Student.id).order_by(Student.id)]
+    finally:
+        db.close()
+    if not student_ids:
+        raise SystemExit("No students found; seed the database first.")
+    sample_ids = sorted(random.Random(seed).sample(student_ids, min(samples, len(student_ids))))
+
+    results = {"students": len(student_ids)}
+    results.update(bench_engine(student_ids, sample_ids))
+    results.update(bench_endpoints(student_ids, sample_ids))
+    results.update(bench_pdf(sample_ids))
+    return results
+
+
+def _direction(metric: str) -> int:
+    """
+    +1 if higher is better, -1 if lower is better, 0 if not a performance metric.
+    """
+    if metric in ("students", "pdf_pages_per_report"):
+        return 0
+    return 1 if metric.endswith("_per_s") else -1
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """
+    Print current against baseline per scale and return the regressions.
+    """
+    regressions = []
+    for scale, metrics in current["scales"].items():
+        before = baseline["scales"].get(scale)
+        if before is None:
+            print(f"\n{scale} students: not in baseline")
+            continue
+        print(f"\n{scale} students")
+        print(f"{'metric':<32} {'baseline':>12} {'current':>12} {'change':>9}")
+        for metric, value in metrics.items():
+            direction, old = _direction(metric), before.get(metric)
+            if old is None or direction == 0:
+                continue
+            change = (value - old) / old if old else 0.0
+            # Query counts are exact: any increase is a regression.
+            limit = 0.0 if "queries" in metric else threshold
+            regressed = -direction * change > limit
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{metric:<32} {old:>12.3f} {value:>12.3f} {change:>+8.1%}{flag}")
+            if regressed:
+                regressions.append(f"{scale} students: {metric} {old:.3f} -> {value:.3f} ({change:+.1%})")
+    return regressions
+
+
+def run(
+    scales: List[int],
+    samples: int = 200,
+    seed: int = 42,
+    regenerate: bool = True,
+    save: Optional[str] = None,
+    baseline: Optional[str] = None,
+    threshold: float = 0.2,
+) -> int:
+    results = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "database": engine.dialect.name,
+            "python": platform.python_version(),
+            "machine": platform.node(),
+            "samples": samples,
+            "seed": seed,
+        },
+        "scales": {},
+    }
+    for students in scales:
+        print(f"Benchmarking {students} students", file=sys.stderr)
+        metrics = run_scale(students, samples, seed, regenerate)
+        results["scales"][str(metrics["students"])] = metrics
+
+    for scale, metrics in results["scales"].items():
+        print(f"\n{scale} students")
+        for metric, value in metrics.items():
+            print(f"{metric:<32} {value:>12.3f}")
+
+    if save:
+        with open(save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {save}")
+
+    if baseline:
+        with open(baseline) as f:
+            reference = json.load(f)
+        for key in ("database", "samples", "seed"):
+            if reference["meta"].get(key) != results["meta"][key]:
+                print(f"\nWarning: baseline {key} is {reference['meta'].get(key)!r}, "
+                      f"this run used {results['meta'][key]!r}")
+        regressions = compare(reference, results, threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) (threshold {threshold:.0%}; query counts must not grow):")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+def confirm_wipe(database_url: Optional[str], wipe_database: bool) -> None:
+    """
+    Exit unless the caller has confirmed that DATABASE_URL may be replaced:
+    by naming it with --database-url, or with --wipe-database.
+    """
+    configured = engine.url.render_as_string(hide_password=False)
+    if database_url is not None and make_url(database_url).render_as_string(hide_password=False) != configured:
+        raise SystemExit(
+            f"--database-url does not match DATABASE_URL ({engine.url!r}); "
+            "set DATABASE_URL to the database to benchmark."
+        )
+    if database_url is None and not wipe_database:
+        raise SystemExit(
+            f"Generating a dataset replaces everything in {engine.url!r}. Confirm with "
+            "--database-url <DATABASE_URL> or --wipe-database, or pass --no-generate to "
+            "measure the data already there."
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", default="1000,10000",
+                        help="comma-separated student counts to generate (default 1000,10000)")
+    parser.add_argument("--samples", type=int, default=200, help="students per latency measurement")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-generate", action="store_true",
+                        help="measure the existing data instead of generating each scale")
+    parser.add_argument("--database-url", metavar="URL",
+                        help="the database to replace with generated data; must equal DATABASE_URL")
+    parser.add_argument("--wipe-database", action="store_true",
+                        help="confirm that generating may replace the contents of DATABASE_URL")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default 0.2)")
+    args = parser.parse_args()
+    if not args.no_generate:
+        confirm_wipe(args.database_url, args.wipe_database)
+    scales = [0] if args.no_generate else [int(scale) for scale in args.scales.split(",")]
+    sys.exit(run(scales, args.samples, args.seed, not args.no_generate, args.save, args.compare, args.threshold))
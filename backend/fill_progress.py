@@ -0,0 +1,35 @@
+"""
+Stored audit progress fill.
+Computes and stores progress rows, summaries and analytics counters for every
+student that is missing some, program by program. Demand, unmet, cohort and
+analytics queries only read the store, so run this once on a database loaded
+without it (seed.py and generate_data.py fill what they load, and the API
+fills new students and requirements as they are created).
+
+Usage:
+    python fill_progress.py [--program-id 1 ...]
+"""
+import argparse
+import time
+
+from app.audit_store import fill_all_progress
+from app.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill stored audit progress.")
+    parser.add_argument("--program-id", type=int, action="append",
+                        help="Only fill this program (repeat for several; default all)")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        fill_all_progress(db, args.program_id)
+    finally:
+        db.close()
+    print(f"✓ Stored audit progress filled in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
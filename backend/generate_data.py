@@ -0,0 +1,338 @@
+"""
+Synthetic data generator for performance work.
+Replaces the database contents with N programs, M courses and K students whose
+transcripts follow realistic distributions, deterministically for a given
+--seed. Rows are generated in chunks and bulk loaded (COPY on PostgreSQL with
+psycopg2, multi-row inserts elsewhere), so a million enrollments load in
+seconds and memory stays bounded.
+
+Distributions:
+  - programs differ in size (Zipf-like weights); each has core, major,
+    elective and general-education requirements drawn from the catalog
+  - students are spread over class years, so completion ranges from a few
+    courses to a full degree; grades skew towards A/B, a few courses are
+    failed (not completed) or in progress, and some failed ones are retaken
+  - some students take courses outside their program
+  - a few percent of students have substitutions, most of them approved
+
+Every student's password is "password123". Stored audit progress is filled
+afterwards (see app.audit_store) unless --skip-progress is given.
+
+Usage:
+    python generate_data.py [--programs 5] [--courses 300] [--students 10000] [--seed 42]
+                            [--batch-size 10000] [--skip-progress]
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from itertools import accumulate
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import insert, text
+
+from app.audit_store import fill_all_progress
+from app.auth import get_password_hash
+from app.bitsets import rebuild_transcript_bits
+from app.cache_versions import ALL_KEY, bump_version
+from app.database import SessionLocal
+from app.models import Program, Course, Requirement, RequirementCourse, Student, Enrollment, Substitution, RequirementType
+from seed import migrate_database, clear_database
+
+DEPARTMENTS = ["CS", "MATH", "STATS", "PHYS", "CHEM", "BIO", "ECON", "ENGL", "HIST", "PHIL", "PSYCH", "ART"]
+GEN_ED_DEPARTMENTS = ["ENGL", "HIST", "PHIL", "PSYCH", "ART"]
+COURSE_CREDITS = [(4.0, 80), (3.0, 10), (5.0, 6), (2.0, 4)]
+GRADES = [("A", 35), ("B", 35), ("C", 18), ("D", 4), ("F", 4)]
+GRADE_VALUES = [grade for grade, _ in GRADES]
+GRADE_WEIGHTS = list(accumulate(weight for _, weight in GRADES))
+SEMESTERS = ["Fall", "Winter", "Spring"]
+FIRST_NAMES = [
+    "Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn",
+    "Maria", "Wei", "Aisha", "Diego", "Priya", "Noah", "Yuki", "Omar", "Elena", "Kofi",
+]
+LAST_NAMES = [
+    "Smith", "Garcia", "Nguyen", "Kim", "Patel", "Johnson", "Chen", "Lopez", "Okafor", "Silva",
+    "Brown", "Khan", "Müller", "Rossi", "Ivanova", "Tanaka", "Cohen", "Haddad", "Murphy", "Singh",
+]
+
+# Share of students with substitutions, and of those substitutions approved
+SUBSTITUTION_RATE = 0.04
+APPROVAL_RATE = 0.8
+
+
+def _weighted(rng: random.Random, choices: Sequence[Tuple[object, int]]):
+    return rng.choices([value for value, _ in choices], weights=[weight for _, weight in choices])[0]
+
+
+def generate_courses(rng: random.Random, count: int) -> List[dict]:
+    courses = []
+    numbers: Dict[str, int] = {}
+    for course_id in range(1, count + 1):
+        department = DEPARTMENTS[(course_id - 1) % len(DEPARTMENTS)]
+        numbers[department] = numbers.get(department, 0) + 1
+        number = 10 + numbers[department] * 3 + rng.randint(0, 2)
+        courses.append({
+            "id": course_id,
+            "course_code": f"{department}{number}",
+            "name": f"{department} Topics {number}",
+            "credits": _weighted(rng, COURSE_CREDITS),
+            "description": f"Synthetic {department} course",
+        })
+    return courses
+
+
+def generate_programs(rng: random.Random, count: int, courses: List[dict]):
+    """
+    Return (programs, requirements, requirement_courses), with requirement
+    course lists drawn from the programs' departments.
+    """
+    by_department: Dict[str, List[dict]] = {}
+    for course in courses:
+        by_department.setdefault(course["course_code"].rstrip("0123456789"), []).append(course)
+    gen_ed_pool = [course for department in GEN_ED_DEPARTMENTS for course in by_department.get(department, [])]
+
+    programs, requirements, links = [], [], []
+    for program_id in range(1, count + 1):
+        major, minor = rng.sample(DEPARTMENTS[:7], 2)
+        programs.append({
+            "id": program_id,
+            "name": f"Bachelor of Science in {major} ({program_id})",
+            "code": f"BS-{major}-{program_id}",
+            "total_credits_required": 180.0,
+        })
+        major_pool = by_department.get(major, [])
+        minor_pool = by_department.get(minor, [])
+        core = rng.sample(major_pool, min(len(major_pool), rng.randint(10, 14)))
+        remaining = [course for course in major_pool if course not in core]
+        plans = [
+            ("Core " + major, RequirementType.CORE, core, 1.0),
+            ("Foundation " + minor, RequirementType.MAJOR, rng.sample(minor_pool, min(len(minor_pool), rng.randint(5, 8))), 1.0),
+            (major + " Electives", RequirementType.ELECTIVE, rng.sample(remaining, min(len(remaining), rng.randint(8, 15))), 0.5),
+            ("General Education", RequirementType.GENERAL_ED, rng.sample(gen_ed_pool, min(len(gen_ed_pool), rng.randint(4, 6))), 0.75),
+        ]
+        for name, requirement_type, pool, share in plans:
+            if not pool:
+                continue
+            requirement_id = len(requirements) + 1
+            credits = sum(course["credits"] for course in pool)
+            requirements.append({
+                "id": requirement_id,
+                "program_id": program_id,
+                "name": name,
+                "requirement_type": requirement_type,
+                "credits_required": max(4.0, round(credits * share / 4) * 4) if share < 1 else credits,
+                "description": f"Required credits for {name}",
+            })
+            links.extend({"requirement_id": requirement_id, "course_id": course["id"]} for course in pool)
+    return programs, requirements, links
+
+
+class TranscriptGenerator:
+    """
+    Students and their enrollments/substitutions, chunk by chunk.
+    """
+
+    def __init__(self, rng: random.Random, programs, requirements, links, courses, password_hash: str):
+        self.rng = rng
+        self.password_hash = password_hash
+        self.courses = courses
+        weights = [1 / (rank + 1) for rank in range(len(programs))]
+        self.program_ids = [program["id"] for program in programs]
+        self.program_weights = weights
+        course_ids_by_requirement: Dict[int, List[int]] = {}
+        for link in links:
+            course_ids_by_requirement.setdefault(link["requirement_id"], []).append(link["course_id"])
+        self.program_course_ids: Dict[int, List[List[int]]] = {program_id: [] for program_id in self.program_ids}
+        for requirement in requirements:
+            self.program_course_ids[requirement["program_id"]].append(course_ids_by_requirement.get(requirement["id"], []))
+        self.enrollment_id = 0
+        self.substitution_id = 0
+
+    def chunk(self, first_id: int, last_id: int) -> Tuple[List[dict], List[tuple], List[dict]]:
+        students, enrollments, substitutions = [], [], []
+        rng = self.rng
+        for student_id in range(first_id, last_id + 1):
+            program_id = rng.choices(self.program_ids, weights=self.program_weights)[0]
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            students.append({
+                "id": student_id,
+                "student_id": f"{20000000 + student_id}",
+                "name": f"{first} {last}",
+                "email": f"student{student_id}@example.edu",
+                "password_hash": self.password_hash,
+                "program_id": program_id,
+            })
+            enrollments.extend(self._transcript(student_id, program_id))
+            if rng.random() < SUBSTITUTION_RATE:
+                substitutions.extend(self._substitutions(student_id, program_id))
+        return students, enrollments, substitutions
+
+    def _transcript(self, student_id: int, program_id: int) -> Iterator[tuple]:
+        rng = self.rng
+        # Class standing: share of each requirement already attempted.
+        progress = rng.betavariate(1.6, 1.4)
+        taken: List[int] = []
+        for course_ids in self.program_course_ids[program_id]:
+            taken.extend(rng.sample(course_ids, round(len(course_ids) * progress)))
+        if rng.random() < 0.3:
+            taken.extend(course["id"] for course in rng.sample(self.courses, min(len(self.courses), rng.randint(1, 3))))
+        taken = list(dict.fromkeys(taken))
+        rng.shuffle(taken)
+
+        entry_year = 2025 - int(progress * 4) - rng.randint(0, 1)
+        # Half the students are mid-term: their latest courses have no grade yet.
+        in_progress = rng.randint(1, 4) if rng.random() < 0.5 else 0
+        grades = rng.choices(GRADE_VALUES, cum_weights=GRADE_WEIGHTS, k=len(taken))
+        for index, (course_id, grade) in enumerate(zip(taken, grades)):
+            term = index // 4
+            year, semester = entry_year + term // 3, SEMESTERS[term % 3]
+            if index >= len(taken) - in_progress:
+                yield self._enrollment(student_id, course_id, None, semester, year, False)
+                continue
+            yield self._enrollment(student_id, course_id, grade, semester, year, grade != "F")
+            if grade == "F" and rng.random() < 0.6:
+                # Retaken in a later year and passed.
+                retake = term + 1 + rng.randint(0, 2)
+                yield self._enrollment(
+                    student_id, course_id, rng.choice("AABBC"),
+                    SEMESTERS[retake % 3], entry_year + retake // 3 + 2, True
+                )
+
+    def _enrollment(self, student_id, course_id, grade, semester, year, completed) -> tuple:
+        self.enrollment_id += 1
+        return (self.enrollment_id, student_id, course_id, grade, semester, year, completed)
+
+    def _substitutions(self, student_id: int, program_id: int) -> Iterator[dict]:
+        rng = self.rng
+        required = [course_id for course_ids in self.program_course_ids[program_id] for course_id in course_ids]
+        for _ in range(rng.randint(1, 2)):
+            if not required:
+                return
+            self.substitution_id += 1
+            yield {
+                "id": self.substitution_id,
+                "student_id": student_id,
+                "original_course_id": rng.choice(required),
+                "substitute_course_id": rng.choice(self.courses)["id"],
+                "reason": "Transfer credit",
+                "approved": rng.random() < APPROVAL_RATE,
+            }
+
+
+ENROLLMENT_COLUMNS = ["id", "student_id", "course_id", "grade", "semester", "year", "completed"]
+
+
+def _bulk_insert(connection, table, rows: List[dict], batch_size: int):
+    for start in range(0, len(rows), batch_size):
+        connection.execute(insert(table), rows[start:start + batch_size])
+
+
+def _load_enrollments(connection, rows: List[tuple], batch_size: int):
+    """
+    Enrollments are most of the data, so they skip per-row parameter handling:
+    COPY with psycopg2, executemany on the sqlite3 cursor.
+    """
+    driver_connection = connection.connection.driver_connection
+    columns = ", ".join(ENROLLMENT_COLUMNS)
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["\\N" if value is None else value for value in row])
+        buffer.seek(0)
+        with driver_connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY enrollments ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+        return
+    if connection.dialect.driver == "pysqlite":
+        placeholders = ", ".join("?" * len(ENROLLMENT_COLUMNS))
+        cursor = driver_connection.cursor()
+        try:
+            for start in range(0, len(rows), batch_size):
+                cursor.executemany(
+                    f"INSERT INTO enrollments ({columns}) VALUES ({placeholders})", rows[start:start + batch_size]
+                )
+        finally:
+            cursor.close()
+        return
+    _bulk_insert(connection, Enrollment.__table__, [dict(zip(ENROLLMENT_COLUMNS, row)) for row in rows], batch_size)
+
+
+def _reset_sequences(connection):
+    # Ids were assigned explicitly; move Postgres sequences past them.
+    if connection.dialect.name != "postgresql":
+        return
+    for table in ("programs", "courses", "requirements", "requirement_courses", "students", "enrollments", "substitutions"):
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        ))
+
+
+def generate(
+    programs: int = 5,
+    courses: int = 300,
+    students: int = 10000,
+    seed: int = 42,
+    batch_size: int = 10000,
+    progress: bool = True,
+):
+    rng = random.Random(seed)
+    started = time.monotonic()
+    migrate_database()
+    db = SessionLocal()
+    try:
+        clear_database(db)
+        connection = db.connection()
+
+        course_rows = generate_courses(rng, courses)
+        program_rows, requirement_rows, link_rows = generate_programs(rng, programs, course_rows)
+        _bulk_insert(connection, Program.__table__, program_rows, batch_size)
+        _bulk_insert(connection, Course.__table__, course_rows, batch_size)
+        _bulk_insert(connection, Requirement.__table__, requirement_rows, batch_size)
+        _bulk_insert(connection, RequirementCourse.__table__, [
+            {"id": link_id, **link} for link_id, link in enumerate(link_rows, 1)
+        ], batch_size)
+        print(f"✓ {len(program_rows)} programs, {len(course_rows)} courses, {len(requirement_rows)} requirements")
+
+        transcripts = TranscriptGenerator(
+            rng, program_rows, requirement_rows, link_rows, course_rows, get_password_hash("password123")
+        )
+        # Students per chunk, sized so a chunk carries roughly batch_size enrollments.
+        chunk_size = max(1, batch_size // 20)
+        for first_id in range(1, students + 1, chunk_size):
+            last_id = min(first_id + chunk_size - 1, students)
+            student_rows, enrollment_rows, substitution_rows = transcripts.chunk(first_id, last_id)
+            _bulk_insert(connection, Student.__table__, student_rows, batch_size)
+            _load_enrollments(connection, enrollment_rows, batch_size)
+            _bulk_insert(connection, Substitution.__table__, substitution_rows, batch_size)
+            rebuild_transcript_bits(db, range(first_id, last_id + 1))
+        _reset_sequences(connection)
+        # Caches built while the data was loading are stale now.
+        bump_version(db, ALL_KEY)
+        db.commit()
+        elapsed = time.monotonic() - started
+        print(f"✓ {students} students, {transcripts.enrollment_id} enrollments, "
+              f"{transcripts.substitution_id} substitutions in {elapsed:.1f}s")
+
+        if progress:
+            fill_all_progress(db)
+            print(f"✓ Stored audit progress in {time.monotonic() - started - elapsed:.1f}s")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replace the database contents with generated data.")
+    parser.add_argument("--programs", type=int, default=5)
+    parser.add_argument("--courses", type=int, default=300)
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42, help="Same seed, same dataset")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per insert batch")
+    parser.add_argument("--skip-progress", action="store_true",
+                        help="Leave stored audit progress empty (fill it later with fill_progress.py)")
+    args = parser.parse_args()
+    generate(args.programs, args.courses, args.students, args.seed, args.batch_size, not args.skip_progress)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Registrar transcript import.
+Streams a registrar export (CSV or NDJSON, optionally gzipped, or stdin) into
+enrollments through app.registrar_import, committing one batch at a time.
+Memory use is bounded by the batch size, not the file size, and re-running an
+import is safe: rows are upserted on (student, course, semester, year).
+
+Usage:
+    python import_transcripts.py export.csv.gz [--format csv|ndjson] [--batch-size 5000] [--errors errors.ndjson]
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+from typing import Optional
+
+from app.bulk_enrollments import BATCH_SIZE, LoadReport
+from app.database import SessionLocal
+from app.registrar_import import TranscriptImporter
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def _guess_format(path: str) -> Optional[str]:
+    name = path[:-3] if path.endswith(".gz") else path
+    for suffix, format in FORMATS.items():
+        if name.endswith(suffix):
+            return format
+    return None
+
+
+def _open(path: str):
+    if path == "-":
+        return sys.stdin.buffer
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def run_import(path: str, format: Optional[str] = None, batch_size: int = BATCH_SIZE, errors: Optional[str] = None):
+    format = format or _guess_format(path)
+    if format is None:
+        raise SystemExit(f"Cannot tell the format of {path}; pass --format csv|ndjson")
+
+    started = time.monotonic()
+
+    def report_progress(report: LoadReport):
+        elapsed = time.monotonic() - started
+        rate = report.received / elapsed if elapsed > 0 else 0.0
+        print(f"  {report.received} lines, {report.loaded} loaded, {report.failed} failed ({rate:.0f}/s)",
+              file=sys.stderr)
+
+    importer = TranscriptImporter(format, batch_size, on_batch=report_progress)
+    db = SessionLocal()
+    source = _open(path)
+    try:
+        importer.import_lines(db, enumerate(source, 1))
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        db.close()
+
+    result = importer.result()
+    if errors:
+        with open(errors, "w") as f:
+            for error in result.errors:
+                f.write(json.dumps(error.model_dump()) + "\n")
+    print(f"✓ Loaded {result.loaded} enrollments for {result.students_affected} students; "
+          f"{result.failed} lines failed", file=sys.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a registrar transcript export into enrollments.")
+    parser.add_argument("path", help="CSV/NDJSON file (.gz ok), or - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Lines per committed batch")
+    parser.add_argument("--errors", help="Write failed lines as NDJSON to this file")
+    args = parser.parse_args()
+    result = run_import(args.path, args.format, args.batch_size, args.errors)
+    sys.exit(1 if result.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
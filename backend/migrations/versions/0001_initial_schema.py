@@ -0,0 +1,103 @@
+"""Initial schema: programs, courses, students, requirements, enrollments, substitutions
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+requirement_type = sa.Enum("CORE", "ELECTIVE", "GENERAL_ED", "MAJOR", name="requirementtype")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "programs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("code", sa.String(), nullable=False, unique=True),
+        sa.Column("total_credits_required", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_programs_id", "programs", ["id"])
+
+    op.create_table(
+        "courses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("course_code", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("credits", sa.Float(), nullable=False),
+        sa.Column("description", sa.Text()),
+    )
+    op.create_index("ix_courses_id", "courses", ["id"])
+    op.create_index("ix_courses_course_code", "courses", ["course_code"], unique=True)
+
+    op.create_table(
+        "students",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("program_id", sa.Integer(), sa.ForeignKey("programs.id"), nullable=False),
+    )
+    op.create_index("ix_students_id", "students", ["id"])
+    op.create_index("ix_students_student_id", "students", ["student_id"], unique=True)
+    op.create_index("ix_students_email", "students", ["email"], unique=True)
+
+    op.create_table(
+        "requirements",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("program_id", sa.Integer(), sa.ForeignKey("programs.id"), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("requirement_type", requirement_type, nullable=False),
+        sa.Column("credits_required", sa.Float(), nullable=False),
+        sa.Column("description", sa.Text()),
+    )
+    op.create_index("ix_requirements_id", "requirements", ["id"])
+
+    op.create_table(
+        "requirement_courses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("requirement_id", sa.Integer(), sa.ForeignKey("requirements.id"), nullable=False),
+        sa.Column("course_id", sa.Integer(), sa.ForeignKey("courses.id"), nullable=False),
+    )
+    op.create_index("ix_requirement_courses_id", "requirement_courses", ["id"])
+
+    op.create_table(
+        "enrollments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), nullable=False),
+        sa.Column("course_id", sa.Integer(), sa.ForeignKey("courses.id"), nullable=False),
+        sa.Column("grade", sa.String()),
+        sa.Column("semester", sa.String(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("completed", sa.Boolean()),
+    )
+    op.create_index("ix_enrollments_id", "enrollments", ["id"])
+
+    op.create_table(
+        "substitutions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), nullable=False),
+        sa.Column("original_course_id", sa.Integer(), sa.ForeignKey("courses.id"), nullable=False),
+        sa.Column("substitute_course_id", sa.Integer(), sa.ForeignKey("courses.id"), nullable=False),
+        sa.Column("reason", sa.Text()),
+        sa.Column("approved", sa.Boolean()),
+    )
+    op.create_index("ix_substitutions_id", "substitutions", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("substitutions")
+    op.drop_table("enrollments")
+    op.drop_table("requirement_courses")
+    op.drop_table("requirements")
+    op.drop_table("students")
+    op.drop_table("courses")
+    op.drop_table("programs")
+    requirement_type.drop(op.get_bind(), checkfirst=True)
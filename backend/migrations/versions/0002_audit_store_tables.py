@@ -0,0 +1,91 @@
+"""Audit store tables: stored progress, demand index, summaries, analytics counters, transcript bitsets
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "student_requirement_progress",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), nullable=False),
+        sa.Column("requirement_id", sa.Integer(), sa.ForeignKey("requirements.id"), nullable=False),
+        sa.Column("credits_completed", sa.Float(), nullable=False),
+        sa.Column("percentage", sa.Float(), nullable=False),
+        sa.Column("is_met", sa.Boolean(), nullable=False),
+        sa.Column("completed_course_ids", sa.Text(), nullable=False),
+        sa.Column("missing_course_ids", sa.Text(), nullable=False),
+        sa.UniqueConstraint("student_id", "requirement_id"),
+    )
+    op.create_index("ix_student_requirement_progress_id", "student_requirement_progress", ["id"])
+    op.create_index("ix_student_requirement_progress_student_id", "student_requirement_progress", ["student_id"])
+    op.create_index(
+        "ix_student_requirement_progress_requirement_met",
+        "student_requirement_progress",
+        ["requirement_id", "is_met"],
+    )
+
+    op.create_table(
+        "student_audit_summaries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), nullable=False),
+        sa.Column("program_id", sa.Integer(), sa.ForeignKey("programs.id"), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("total_credits_completed", sa.Float(), nullable=False),
+        sa.Column("requirement_bands", sa.Text(), nullable=False),
+    )
+    op.create_index("ix_student_audit_summaries_id", "student_audit_summaries", ["id"])
+    op.create_index("ix_student_audit_summaries_student_id", "student_audit_summaries", ["student_id"], unique=True)
+    op.create_index(
+        "ix_student_audit_summaries_program_credits",
+        "student_audit_summaries",
+        ["program_id", "total_credits_completed"],
+    )
+
+    op.create_table(
+        "program_analytics_counters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("program_id", sa.Integer(), sa.ForeignKey("programs.id"), nullable=False),
+        sa.Column("metric", sa.String(), nullable=False),
+        sa.Column("bucket", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.UniqueConstraint("program_id", "metric", "bucket"),
+    )
+    op.create_index("ix_program_analytics_counters_id", "program_analytics_counters", ["id"])
+
+    op.create_table(
+        "student_missing_courses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), nullable=False),
+        sa.Column("requirement_id", sa.Integer(), sa.ForeignKey("requirements.id"), nullable=False),
+        sa.Column("course_id", sa.Integer(), sa.ForeignKey("courses.id"), nullable=False),
+        sa.UniqueConstraint("student_id", "requirement_id", "course_id"),
+    )
+    op.create_index("ix_student_missing_courses_id", "student_missing_courses", ["id"])
+    op.create_index("ix_student_missing_courses_course_id", "student_missing_courses", ["course_id"])
+
+    op.create_table(
+        "student_transcript_bits",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), nullable=False),
+        sa.Column("completed_courses", sa.LargeBinary(), nullable=False),
+    )
+    op.create_index("ix_student_transcript_bits_id", "student_transcript_bits", ["id"])
+    op.create_index("ix_student_transcript_bits_student_id", "student_transcript_bits", ["student_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table("student_transcript_bits")
+    op.drop_table("student_missing_courses")
+    op.drop_table("program_analytics_counters")
+    op.drop_table("student_audit_summaries")
+    op.drop_table("student_requirement_progress")
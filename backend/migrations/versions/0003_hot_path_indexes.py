@@ -0,0 +1,28 @@
+"""Composite indexes for the audit hot path
+
+Audits load a student's completed enrollments and approved substitutions and
+the course lists of a program's requirements; without these indexes each of
+those filters scans its whole table.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_enrollments_student_completed", "enrollments", ["student_id", "completed"])
+    op.create_index("ix_substitutions_student_approved", "substitutions", ["student_id", "approved"])
+    op.create_index("ix_requirement_courses_requirement", "requirement_courses", ["requirement_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_requirement_courses_requirement", table_name="requirement_courses")
+    op.drop_index("ix_substitutions_student_approved", table_name="substitutions")
+    op.drop_index("ix_enrollments_student_completed", table_name="enrollments")
@@ -0,0 +1,22 @@
+"""Indexes for keyset pages of the student list
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_students_program_id", "students", ["program_id", "id"])
+    op.create_index("ix_students_name_id", "students", ["name", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_students_name_id", table_name="students")
+    op.drop_index("ix_students_program_id", table_name="students")
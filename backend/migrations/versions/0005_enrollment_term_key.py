@@ -0,0 +1,53 @@
+"""Unique (student, course, semester, year) key on enrollments
+
+Bulk enrollment loads upsert on this key. Existing duplicates are collapsed
+first, keeping the most recently inserted row of each group; every removed
+row is logged (with the row kept in its place) before it is deleted.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+import logging
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT e.id, e.student_id, e.course_id, e.semester, e.year, e.grade, e.completed, kept.id "
+        "FROM enrollments e JOIN ("
+        "SELECT student_id, course_id, semester, year, MAX(id) AS id FROM enrollments "
+        "GROUP BY student_id, course_id, semester, year HAVING COUNT(*) > 1"
+        ") kept ON kept.student_id = e.student_id AND kept.course_id = e.course_id "
+        "AND kept.semester = e.semester AND kept.year = e.year "
+        "WHERE e.id <> kept.id ORDER BY e.id"
+    )).all()
+    for row_id, student_id, course_id, semester, year, grade, completed, kept_id in duplicates:
+        logger.warning(
+            "Removing duplicate enrollment %s (student %s, course %s, %s %s, grade %s, completed %s); keeping %s",
+            row_id, student_id, course_id, semester, year, grade, completed, kept_id,
+        )
+    if duplicates:
+        logger.warning("Removing %d duplicate enrollments", len(duplicates))
+        op.execute(
+            "DELETE FROM enrollments WHERE id NOT IN ("
+            "SELECT MAX(id) FROM enrollments GROUP BY student_id, course_id, semester, year)"
+        )
+    with op.batch_alter_table("enrollments") as batch:
+        batch.create_unique_constraint(
+            "uq_enrollments_student_course_term", ["student_id", "course_id", "semester", "year"]
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("enrollments") as batch:
+        batch.drop_constraint("uq_enrollments_student_course_term", type_="unique")
@@ -0,0 +1,31 @@
+"""Completed-credits histogram in the analytics counters
+
+Program analytics derive credit quantiles from a "credits" counter (completed
+credits in hundredths -> students) instead of ORDER BY ... OFFSET scans of
+student_audit_summaries. Existing summaries are counted into it here; the
+progress store maintains it by delta afterwards.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+BUCKET = "CAST(CAST(ROUND(total_credits_completed * 100) AS INTEGER) AS VARCHAR)"
+
+
+def upgrade() -> None:
+    op.execute(
+        "INSERT INTO program_analytics_counters (program_id, metric, bucket, count) "
+        f"SELECT program_id, 'credits', {BUCKET}, COUNT(*) FROM student_audit_summaries "
+        f"GROUP BY program_id, {BUCKET}"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM program_analytics_counters WHERE metric = 'credits'")
@@ -2,31 +2,54 @@
 Seed script to populate database with mock data.
 Creates 1 BS Computer Science program, 30 courses, and 20 students.
 """
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine, Base
+from app.database import SessionLocal
 from app.models import (
     Program, Course, Requirement, RequirementCourse,
-    Student, Enrollment, Substitution, RequirementType
+    Student, Enrollment, Substitution, RequirementType, StudentRequirementProgress,
+    StudentTranscriptBits, StudentMissingCourse, StudentAuditSummary, ProgramAnalyticsCounter
 )
 from app.auth import get_password_hash
+from app.audit_store import fill_all_progress
+from app.bitsets import rebuild_transcript_bits
+from app.cache_versions import ALL_KEY, bump_version
+
+
+def migrate_database():
+    """
+    Bring the schema up to date (equivalent to `alembic upgrade head`).
+    """
+    command.upgrade(Config(str(Path(__file__).with_name("alembic.ini"))), "head")
+
+
+def clear_database(db: Session):
+    """
+    Delete all rows, dependents first, and commit. Running processes drop
+    their compiled rules and catalog snapshot (see app.cache_versions).
+    """
+    for model in (
+        StudentRequirementProgress, StudentTranscriptBits, StudentMissingCourse, StudentAuditSummary,
+        ProgramAnalyticsCounter, Substitution, Enrollment, RequirementCourse, Requirement, Student,
+        Course, Program,
+    ):
+        db.query(model).delete()
+    bump_version(db, ALL_KEY)
+    db.commit()
 
 
 def seed_database():
-    # Create tables
-    Base.metadata.create_all(bind=engine)
+    # Create/upgrade tables
+    migrate_database()
     
     db = SessionLocal()
     
     try:
         # Clear existing data
-        db.query(Substitution).delete()
-        db.query(Enrollment).delete()
-        db.query(RequirementCourse).delete()
-        db.query(Requirement).delete()
-        db.query(Student).delete()
-        db.query(Course).delete()
-        db.query(Program).delete()
-        db.commit()
+        clear_database(db)
         
         # Create BS Computer Science Program
         program = Program(
@@ -134,8 +157,7 @@ def seed_database():
                 description=f"Required credits for {req_data['name']}"
             )
             db.add(requirement)
-            db.commit()
-            db.refresh(requirement)
+            db.flush()
             
             # Link courses to requirement
             for course_code in req_data["courses"]:
@@ -148,8 +170,8 @@ def seed_database():
                     db.add(req_course)
             
             requirements.append(requirement)
-            db.commit()
         
+        db.commit()
         print(f"✓ Created {len(requirements)} requirements")
         
         # Create demo admin
@@ -242,6 +264,8 @@ def seed_database():
                 )
                 db.add(enrollment)
         
+        db.flush()
+        rebuild_transcript_bits(db, [student.id for student in students])
         db.commit()
         print("✓ Created enrollments for all students")
         
@@ -265,9 +289,13 @@ def seed_database():
             approved=False
         )
         db.add(substitution2)
-        
+        # Caches built while the data was loading are stale now.
+        bump_version(db, ALL_KEY)
         db.commit()
         print("✓ Created sample substitutions")
+
+        fill_all_progress(db)
+        print("✓ Stored audit progress")
         
         print("\n" + "="*50)
         print("Database seeded successfully!")
@@ -8,9 +8,16 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import SessionLocal
+import json
+
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
 from app.models import Student, Program, Course, Requirement, Enrollment
 from app.audit_engine import AuditEngine
+from app.vectorized_engine import VectorizedAuditEngine
+from app.bitsets import iter_bits, query_cohort
+from app.program_rules import invalidate_program_rules
 from app.auth import verify_password
 
 
@@ -189,6 +196,1411 @@ def test_status_determination():
         db.close()
 
 
+def test_vectorized_engine():
+    """Test that the vectorized engine matches the per-student engine exactly"""
+    db = SessionLocal()
+    
+    try:
+        program = db.query(Program).first()
+        reports = VectorizedAuditEngine(db).run_program(program.id)
+        assert len(reports) >= 20, f"Expected at least 20 reports, found {len(reports)}"
+        
+        engine = AuditEngine(db)
+        for report in reports:
+            expected = engine.run_audit(report.student.id)
+            assert report.model_dump() == expected.model_dump(), \
+                f"Vectorized report differs for student {report.student.id}"
+        
+        print(f"✓ Vectorized engine matched {len(reports)} per-student audits")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Vectorized engine test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+
+
+def test_bitset_cohorts():
+    """Test that bitset cohort queries agree with per-student audits"""
+    db = SessionLocal()
+    
+    try:
+        program = db.query(Program).first()
+        requirements = db.query(Requirement).filter(
+            Requirement.program_id == program.id
+        ).order_by(Requirement.id).all()
+        reports = [AuditEngine(db).run_audit(student.id) for student in
+                   db.query(Student).filter(Student.program_id == program.id).order_by(Student.id)]
+        course_id = requirements[0].courses[0].course_id
+        first, second = requirements[0].id, requirements[1].id
+        
+        missing = list(iter_bits(query_cohort(db, program.id, missing=[course_id])))
+        expected = [
+            report.student.id for report in reports
+            if not db.query(Enrollment).filter(
+                Enrollment.student_id == report.student.id,
+                Enrollment.course_id == course_id,
+                Enrollment.completed == True
+            ).first()
+        ]
+        assert missing == expected, f"Missing course {course_id}: {missing} != {expected}"
+        
+        met_not = list(iter_bits(query_cohort(db, program.id, met=[first], unmet=[second])))
+        expected = [
+            report.student.id for report in reports
+            if report.requirements[0].is_met and not report.requirements[1].is_met
+        ]
+        assert met_not == expected, f"Met {first} not {second}: {met_not} != {expected}"
+
+        # Seeding stores every bitset; a missing one is built in memory, not written by the read.
+        from app.bitsets import rebuild_transcript_bits
+        from app.models import StudentTranscriptBits
+        stored = {student_id for student_id, in db.query(StudentTranscriptBits.student_id)}
+        assert {report.student.id for report in reports} <= stored, "Seeding left students without a bitset"
+        dropped = missing[0] if missing else reports[0].student.id
+        db.query(StudentTranscriptBits).filter(StudentTranscriptBits.student_id == dropped).delete()
+        db.commit()
+        try:
+            again = list(iter_bits(query_cohort(db, program.id, missing=[course_id])))
+            assert again == missing, f"Cohort changed without a stored bitset: {again} != {missing}"
+            assert not db.query(StudentTranscriptBits).filter(StudentTranscriptBits.student_id == dropped).count(), \
+                "Cohort read stored a bitset"
+        finally:
+            db.rollback()
+            rebuild_transcript_bits(db, [dropped])
+            db.commit()
+
+        import random
+        from app.bitsets import page_of_bits, popcount, to_mask
+        rng = random.Random(14)
+        for size in (0, 1, 7, 8, 9, 1000, 200000):
+            ids = sorted(rng.sample(range(size * 2 + 1), size))
+            mask = to_mask(ids)
+            expected = bytearray(size // 4 + 1)
+            for i in ids:
+                expected[i >> 3] |= 1 << (i & 7)
+            assert mask == int.from_bytes(expected, "little") and list(iter_bits(mask)) == ids and popcount(mask) == size, \
+                f"Bit helpers disagree for {size} ids"
+            paged, after = [], None
+            while True:
+                page, after = page_of_bits(mask, after, 997)
+                paged.extend(page)
+                if after is None:
+                    break
+            assert paged == ids, f"Paging {size} ids lost or repeated some"
+
+        print(f"✓ {len(missing)} students missing course {course_id}")
+        print(f"✓ {len(met_not)} students met requirement {first} but not {second}")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Bitset cohort test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+
+
+# Dataset the audit query plans are checked on: with seed.py's 20 students
+# every table fits in a page and a full scan is the planner's right choice.
+PLAN_DATASET = {"programs": 100, "courses": 2000, "students": 20000}
+
+
+def _plan_engine():
+    """
+    Engine on a generate_data.py dataset of PLAN_DATASET's size: PLAN_DATABASE_URL,
+    or a scratch database beside the test database (a temporary SQLite file, or
+    "<name>_plans" on the same server). Generated on first use, then reused.
+    """
+    import subprocess
+    import tempfile
+    from sqlalchemy import create_engine, func
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.orm import Session
+
+    url = os.environ.get("PLAN_DATABASE_URL")
+    if url is None and engine.dialect.name == "sqlite":
+        url = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'ironclad_plans.db')}"
+    elif url is None:
+        url = engine.url.set(database=f"{engine.url.database}_plans").render_as_string(hide_password=False)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            exists = connection.exec_driver_sql(
+                "SELECT 1 FROM pg_database WHERE datname = %(name)s", {"name": make_url(url).database}
+            ).scalar()
+            if not exists:
+                connection.exec_driver_sql(f'CREATE DATABASE "{make_url(url).database}"')
+    plan_engine = create_engine(url)
+    assert plan_engine.dialect.name == engine.dialect.name, "PLAN_DATABASE_URL must use the test database's dialect"
+
+    try:
+        with Session(plan_engine) as session:
+            students = session.query(func.count(Student.id)).scalar()
+    except Exception:
+        students = None
+    if students != PLAN_DATASET["students"]:
+        arguments = [f"--{name}={value}" for name, value in PLAN_DATASET.items()]
+        subprocess.run(
+            [sys.executable, "generate_data.py", *arguments, "--skip-progress"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), env={**os.environ, "DATABASE_URL": url},
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+    # Fresh statistics, so the plans are the ones production would get.
+    with plan_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("ANALYZE")
+    return plan_engine
+
+
+def _plan_uses_index(connection, statement, parameters):
+    """EXPLAIN a captured statement and report whether it avoids full scans"""
+    if connection.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        nodes, stack = [], [plan[0]["Plan"]]
+        while stack:
+            node = stack.pop()
+            nodes.append(node["Node Type"])
+            stack.extend(node.get("Plans", []))
+        uses_index = "Seq Scan" not in nodes and any("Index" in node or "Bitmap" in node for node in nodes)
+        return uses_index, nodes
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    details = [row[-1] for row in rows]
+    uses_index = all(not detail.startswith("SCAN") for detail in details) and \
+        any("USING INDEX" in detail or "USING COVERING INDEX" in detail for detail in details)
+    return uses_index, details
+
+
+def test_audit_query_plans():
+    """Test that the audit's enrollment, substitution and requirement-course queries use indexes at scale"""
+    db = SessionLocal()
+    captured = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+    
+    try:
+        student = db.query(Student).first()
+        invalidate_program_rules()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            AuditEngine(db).run_audit(student.id)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        
+        # The statements are the same whatever the data; plan them on the large dataset.
+        plan_engine = _plan_engine()
+        checked = []
+        with plan_engine.connect() as connection:
+            for table in ("enrollments", "substitutions", "requirement_courses"):
+                queries = [(statement, parameters) for statement, parameters in captured
+                           if f"FROM {table}" in " ".join(statement.split())]
+                assert queries, f"No audit query on {table} was captured"
+                for statement, parameters in queries:
+                    uses_index, plan = _plan_uses_index(connection, statement, parameters)
+                    assert uses_index, f"Query on {table} does not use an index: {plan}"
+                    checked.append(table)
+        
+        plan_engine.dispose()
+        for table in checked:
+            print(f"✓ Audit query on {table} uses an index with {PLAN_DATASET['students']} students")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Audit query plan test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+
+
+def test_request_instrumentation():
+    """Test per-request query counts, Server-Timing and per-route aggregates"""
+    import logging
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.instrumentation import REPEATED_QUERY_THRESHOLD, RequestStats
+
+    logging.getLogger("app.requests").setLevel(logging.ERROR)
+    db = SessionLocal()
+    try:
+        student_ids = [student.id for student in db.query(Student).order_by(Student.id).limit(3)]
+        client = TestClient(app)
+
+        response = client.post("/api/audit/batch", json={"student_ids": student_ids})
+        assert response.status_code == 200, f"Batch audit returned {response.status_code}"
+        timing = {
+            metric.split(";")[0]: metric for metric in response.headers["Server-Timing"].split(", ")
+        }
+        for name in ("db", "load", "evaluate", "serialize", "total"):
+            assert name in timing, f"Server-Timing has no {name!r} metric: {timing}"
+        queries = int(timing["db"].split('desc="')[1].split(" ")[0])
+        assert 0 < queries <= 5, f"Batch audit of {len(student_ids)} students ran {queries} queries"
+
+        from app.schemas import MAX_BATCH_AUDIT_SIZE
+        response = client.post("/api/audit/batch", json={"student_ids": list(range(1, MAX_BATCH_AUDIT_SIZE + 2))})
+        assert response.status_code == 422, f"Oversized batch audit returned {response.status_code}"
+
+        # Loading in IN lists of LOAD_CHUNK_SIZE ids gives the same reports as one list.
+        from app import audit_loader
+        all_ids = [student.id for student in db.query(Student).order_by(Student.id)]
+        whole = [report.model_dump_json() for report in AuditEngine(db).run_audits(all_ids)]
+        chunk_size, audit_loader.LOAD_CHUNK_SIZE = audit_loader.LOAD_CHUNK_SIZE, 3
+        try:
+            chunked = [report.model_dump_json() for report in AuditEngine(db).run_audits(all_ids)]
+        finally:
+            audit_loader.LOAD_CHUNK_SIZE = chunk_size
+        assert chunked == whole, "Chunked loading changed the reports"
+
+        routes = {(row["method"], row["route"]): row for row in client.get("/api/metrics/routes").json()}
+        batch = routes.get(("POST", "/api/audit/batch"))
+        assert batch and batch["requests"] >= 1 and batch["max_queries"] >= queries, \
+            f"Route aggregates missing the batch request: {batch}"
+
+        stats = RequestStats()
+        for _ in range(REPEATED_QUERY_THRESHOLD):
+            stats.add_query("SELECT 1 WHERE id = ?", 0.0)
+        stats.add_query("SELECT 2", 0.0)
+        assert list(stats.repeated_statements()) == ["SELECT 1 WHERE id = ?"], "Repeated query not flagged"
+
+        print(f"✓ Batch audit: {queries} queries, Server-Timing {', '.join(timing)}")
+        return True
+
+    except Exception as e:
+        print(f"✗ Request instrumentation test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+
+
+def test_rules_shared_invalidation():
+    """Test that compiled rules follow requirement changes made by another process"""
+    from app.cache_versions import bump_version, expire_versions, program_key
+    from app.models import RequirementType
+    from app.program_rules import get_program_rules
+
+    db = SessionLocal()
+    try:
+        program = db.query(Program).first()
+        before = get_program_rules(db, program.id)
+
+        # Another worker adds a requirement and bumps the version; this
+        # process never calls invalidate_program_rules.
+        requirement = Requirement(
+            program_id=program.id, name="Shared Invalidation Probe",
+            requirement_type=RequirementType.ELECTIVE, credits_required=4.0
+        )
+        db.add(requirement)
+        db.flush()
+        assert get_program_rules(db, program.id) is before, "Rules recompiled before the version changed"
+        bump_version(db, program_key(program.id))
+        expire_versions()  # as if CACHE_VERSION_CHECK_SECONDS had passed
+
+        after = get_program_rules(db, program.id)
+        assert after.version == before.version + 1, f"Version {before.version} -> {after.version}"
+        assert requirement.id in {r.id for r in after.requirements}, "New requirement not compiled in"
+        print(f"✓ Rules version {before.version} -> {after.version} picked up without local invalidation")
+        return True
+
+    except Exception as e:
+        print(f"✗ Shared rules invalidation test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.rollback()
+        expire_versions()
+        invalidate_program_rules()
+        db.close()
+
+
+def test_audit_encoding():
+    """Test that encode_audit_report is byte-identical to AuditReport.model_dump_json()"""
+    from app.audit_store import get_stored_report
+    from app.cache_versions import bump_version, expire_versions, program_key
+    from app.models import RequirementType, Substitution
+    from app.serialization import encode_audit_report, encode_audit_reports
+
+    db = SessionLocal()
+    try:
+        program = db.query(Program).first()
+        # Requirements with no courses, one of them with nothing required,
+        # and a second approved substitution; all rolled back afterwards.
+        for name, credits_required in (("Encoding Probe", 4.0), ("Encoding Probe (none required)", 0.0)):
+            db.add(Requirement(
+                program_id=program.id, name=name,
+                requirement_type=RequirementType.ELECTIVE, credits_required=credits_required
+            ))
+        db.query(Substitution).update({Substitution.approved: True})
+        db.flush()
+        bump_version(db, program_key(program.id))
+        expire_versions()
+
+        student_ids = [student_id for student_id, in db.query(Student.id).order_by(Student.id)]
+        reports = AuditEngine(db).run_audits(student_ids)
+        substituted = {student_id for student_id, in db.query(Substitution.student_id)}
+        assert len(substituted) >= 2 and substituted <= set(student_ids), "Seed has too few substitutions"
+        assert all(
+            any(not r.completed_courses and not r.missing_courses for r in report.requirements) for report in reports
+        ), "Probe requirements missing from the reports"
+
+        # Stored reports, and reports whose courses are not the catalog's own objects.
+        reports += [get_stored_report(db, student_id) for student_id in student_ids[:3]]
+        reports += [report.model_copy(deep=True) for report in reports[:3]]
+        for report in reports:
+            assert encode_audit_report(report) == report.model_dump_json().encode(), \
+                f"Encoded report for student {report.student.id} differs from model_dump_json"
+        expected = b"[" + b",".join(report.model_dump_json().encode() for report in reports) + b"]"
+        assert encode_audit_reports(reports) == expected, "Encoded report list differs from model_dump_json"
+
+        print(f"✓ {len(reports)} encoded reports byte-identical to model_dump_json")
+        return True
+
+    except Exception as e:
+        print(f"✗ Audit encoding test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.rollback()
+        expire_versions()
+        invalidate_program_rules()
+        db.close()
+
+
+def test_audit_job_resume():
+    """Test that resuming an audit job after out-of-order chunks writes each student once"""
+    import tempfile
+    from audit_job import run_job, _save_checkpoint
+
+    workdir = tempfile.mkdtemp()
+    try:
+        reference = os.path.join(workdir, "reference.ndjson")
+        run_job(reference, workers=2, chunk_size=4)
+        with open(reference) as f:
+            lines_by_student = {json.loads(line)["student"]["id"]: line for line in f}
+
+        # Interrupted run: chunks 2 and 4 finished (out of order), nothing else.
+        ids = sorted(lines_by_student)
+        chunks = [ids[i:i + 4] for i in range(0, len(ids), 4)]
+        finished = [chunks[3], chunks[1]]
+        output = os.path.join(workdir, "resumed.ndjson")
+        with open(output, "w") as f:
+            for chunk in finished:
+                f.writelines(lines_by_student[student_id] for student_id in chunk)
+            # A partial line written after the last checkpoint
+            size = f.tell()
+            f.write('{"student": ')
+        _save_checkpoint(f"{output}.checkpoint", [(c[0], c[-1]) for c in finished], size)
+
+        run_job(output, workers=2, chunk_size=3, resume=True)
+        with open(output) as f:
+            student_ids = [json.loads(line)["student"]["id"] for line in f]
+        duplicates = len(student_ids) - len(set(student_ids))
+        assert duplicates == 0, f"{duplicates} students written twice"
+        assert sorted(student_ids) == sorted(lines_by_student), "Resumed output is missing students"
+        print(f"✓ Resumed job wrote {len(student_ids)} audits, no duplicates")
+        return True
+
+    except Exception as e:
+        print(f"✗ Audit job resume test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        import shutil
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_audit_job_vectorized():
+    """Test that audit_job --engine vectorized writes the same reports as the standard engine"""
+    import tempfile
+    from audit_job import run_job
+
+    workdir = tempfile.mkdtemp()
+    try:
+        outputs = {}
+        for engine_name in ("standard", "vectorized"):
+            output = os.path.join(workdir, f"{engine_name}.ndjson")
+            run_job(output, workers=2, chunk_size=3, engine_name=engine_name)
+            with open(output) as f:
+                outputs[engine_name] = {json.loads(line)["student"]["id"]: line for line in f}
+        standard, vectorized = outputs["standard"], outputs["vectorized"]
+        assert vectorized.keys() == standard.keys(), "Engines audited different students"
+        differing = [student_id for student_id in standard if vectorized[student_id] != standard[student_id]]
+        assert not differing, f"Vectorized reports differ for students {differing}"
+        print(f"✓ --engine vectorized wrote the same {len(vectorized)} reports byte for byte")
+        return True
+
+    except Exception as e:
+        print(f"✗ Vectorized audit job test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        import shutil
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_stored_report_matches_audit():
+    """Test that audits assembled from stored progress equal a full engine run"""
+    from app.audit_store import fill_progress, get_stored_report
+    from app.models import StudentRequirementProgress
+
+    db = SessionLocal()
+    try:
+        student_ids = [student_id for student_id, in db.query(Student.id).order_by(Student.id)]
+        expected = {
+            report.student.id: report.model_dump() for report in AuditEngine(db).run_audits(student_ids)
+        }
+
+        # Unstored requirements are computed in memory; the read never writes.
+        db.query(StudentRequirementProgress).filter(
+            StudentRequirementProgress.student_id == student_ids[0]
+        ).delete()
+        db.commit()
+        stored_before = db.query(StudentRequirementProgress).count()
+        for student_id in student_ids[:3]:
+            assert get_stored_report(db, student_id).model_dump() == expected[student_id], \
+                f"Report for unstored student {student_id} differs from run_audit"
+        assert db.query(StudentRequirementProgress).count() == stored_before, "Read path stored progress rows"
+
+        fill_progress(db, student_ids)
+        for student_id in student_ids:
+            assert get_stored_report(db, student_id).model_dump() == expected[student_id], \
+                f"Stored report for student {student_id} differs from run_audit"
+        print(f"✓ {len(student_ids)} stored reports equal run_audit, before and after the fill")
+        return True
+
+    except Exception as e:
+        print(f"✗ Stored report test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+
+
+def test_audit_etag():
+    """Test the audit ETag/304 round trip and that an enrollment change invalidates it"""
+    import logging
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.audit_store import refresh_progress
+    from app.bitsets import refresh_transcript_bits
+
+    logging.getLogger("app.requests").setLevel(logging.ERROR)
+    db = SessionLocal()
+    enrollment_id = None
+    try:
+        student = db.query(Student).order_by(Student.id).first()
+        before = AuditEngine(db).run_audit(student.id)
+        course = next(r.missing_courses[0] for r in before.requirements if r.missing_courses)
+        client = TestClient(app)
+        url = f"/api/audit/{student.id}"
+
+        first = client.get(url)
+        etag = first.headers["ETag"]
+        assert first.status_code == 200 and etag, f"First GET returned {first.status_code}"
+        repeat = client.get(url, headers={"If-None-Match": etag})
+        assert repeat.status_code == 304 and not repeat.content, f"Matching ETag returned {repeat.status_code}"
+        assert repeat.headers["ETag"] == etag, "304 carries a different ETag"
+        weak = client.get(url, headers={"If-None-Match": f'"other", W/{etag}'})
+        assert weak.status_code == 304, f"Weak ETag in a list returned {weak.status_code}"
+
+        response = client.post("/api/enrollments", json={
+            "student_id": student.id, "course_id": course.id,
+            "semester": "Fall", "year": 2099, "grade": "A", "completed": True,
+        })
+        assert response.status_code == 200, f"Enrollment returned {response.status_code}"
+        enrollment_id = response.json()["id"]
+
+        changed = client.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == 200, f"Stale ETag returned {changed.status_code} after an enrollment"
+        assert changed.headers["ETag"] != etag, "ETag unchanged after an enrollment"
+        assert changed.json()["total_credits_completed"] > before.total_credits_completed, \
+            "Completed course not counted"
+        assert changed.json() == AuditEngine(db).run_audit(student.id).model_dump(mode="json"), \
+            "Audit after the enrollment differs from run_audit"
+        print(f"✓ 304 on a matching ETag; new ETag and fresh audit after enrolling in {course.course_code}")
+        return True
+
+    except Exception as e:
+        print(f"✗ Audit ETag test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if enrollment_id is not None:
+            enrollment = db.get(Enrollment, enrollment_id)
+            db.delete(enrollment)
+            db.flush()
+            refresh_progress(db, enrollment.student_id, {enrollment.course_id})
+            refresh_transcript_bits(db, enrollment.student_id)
+            db.commit()
+        db.close()
+
+
+def test_audit_routes_off_loop():
+    """Test that a new student's audit routes load in run_sync and build the report in a worker thread"""
+    import logging
+    import threading
+    from fastapi.testclient import TestClient
+    from app import audit_cache
+    from app.main import app
+    from app.models import (
+        StudentRequirementProgress, StudentMissingCourse, StudentAuditSummary,
+        StudentTranscriptBits, ProgramAnalyticsCounter
+    )
+
+    logging.getLogger("app.requests").setLevel(logging.ERROR)
+    db = SessionLocal()
+    student_id = None
+    counters = [
+        (row.program_id, row.metric, row.bucket, row.count) for row in db.query(ProgramAnalyticsCounter)
+    ]
+    load_stored_report, build_stored_report = audit_cache.load_stored_report, audit_cache.build_stored_report
+    threads = {}
+    try:
+        program = db.query(Program).first()
+        client = TestClient(app)
+        response = client.post("/api/students", json={
+            "student_id": "ROUTE-TEST", "name": "Route Test", "email": "route.test@example.edu",
+            "password": "password123", "program_id": program.id,
+        })
+        assert response.status_code == 200, f"Create student returned {response.status_code}"
+        student_id = response.json()["id"]
+
+        requirement_count = db.query(Requirement).filter(Requirement.program_id == program.id).count()
+        stored = db.query(StudentRequirementProgress).filter(StudentRequirementProgress.student_id == student_id).count()
+        assert stored == requirement_count, f"New student has {stored} of {requirement_count} progress rows"
+        assert db.query(StudentAuditSummary).filter(StudentAuditSummary.student_id == student_id).count() == 1, \
+            "New student has no summary"
+        assert db.query(StudentTranscriptBits).filter(StudentTranscriptBits.student_id == student_id).count() == 1, \
+            "New student has no transcript bitset"
+
+        def load(*args):
+            threads["load"] = threading.get_ident()
+            return load_stored_report(*args)
+
+        def build(*args):
+            threads["build"] = threading.get_ident()
+            return build_stored_report(*args)
+
+        audit_cache.load_stored_report, audit_cache.build_stored_report = load, build
+        response = client.get(f"/api/audit/{student_id}")
+        assert response.status_code == 200, f"Audit returned {response.status_code}"
+        assert response.json() == AuditEngine(db).run_audit(student_id).model_dump(mode="json"), \
+            "Audit of the new student differs from run_audit"
+        assert threads.keys() == {"load", "build"} and threads["load"] != threads["build"], \
+            f"Report built on the loading thread: {threads}"
+
+        pdf = client.get(f"/api/audit/{student_id}/pdf")
+        assert pdf.status_code == 200 and pdf.content.startswith(b"%PDF"), f"PDF returned {pdf.status_code}"
+        plan = client.get(f"/api/audit/{student_id}/plan")
+        assert plan.status_code == 200, f"Plan returned {plan.status_code}"
+        assert client.get("/api/audit/999999").status_code == 404, "Unknown student not a 404"
+
+        print(f"✓ New student {student_id} stored on create; report built off the loading thread")
+        return True
+
+    except Exception as e:
+        print(f"✗ Audit routes test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        audit_cache.load_stored_report, audit_cache.build_stored_report = load_stored_report, build_stored_report
+        db.rollback()
+        if student_id is not None:
+            for model in (StudentRequirementProgress, StudentMissingCourse, StudentAuditSummary, StudentTranscriptBits):
+                db.query(model).filter(model.student_id == student_id).delete()
+            db.query(Student).filter(Student.id == student_id).delete()
+            db.query(ProgramAnalyticsCounter).delete()
+            db.add_all(
+                ProgramAnalyticsCounter(program_id=program_id, metric=metric, bucket=bucket, count=count)
+                for program_id, metric, bucket, count in counters
+            )
+            db.commit()
+        db.close()
+
+
+def test_simulation_matches_audit():
+    """Test that a simulated scenario equals a real audit after making the change"""
+    from app.models import Substitution
+    from app.schemas import AuditSimulationRequest, SimulatedSubstitution
+
+    db = SessionLocal()
+    try:
+        student = db.query(Student).order_by(Student.id.desc()).first()
+        before = AuditEngine(db).run_audit(student.id)
+        missing = [course.id for r in before.requirements for course in r.missing_courses]
+        completed = db.query(Enrollment).filter(
+            Enrollment.student_id == student.id, Enrollment.completed == True
+        ).order_by(Enrollment.id).first()
+        outside = db.query(Course).filter(Course.id.notin_(missing)).order_by(Course.id.desc()).first()
+        # Add two missing courses and a completed substitute for a third; drop a completed course.
+        scenario = AuditSimulationRequest(
+            add_course_ids=missing[:2] + [outside.id],
+            drop_course_ids=[completed.course_id],
+            add_substitutions=[SimulatedSubstitution(original_course_id=missing[2], substitute_course_id=outside.id)],
+        )
+
+        queries = []
+        listener = lambda *args: queries.append(1)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            simulated = AuditEngine(db).simulate_audit(student.id, scenario)
+            single_queries = len(queries)
+            queries.clear()
+            many = AuditEngine(db).simulate_audits(student.id, [scenario] * 25)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert len(queries) == single_queries, f"25 scenarios ran {len(queries)} queries, one ran {single_queries}"
+        assert all(report == simulated for report in many), "Batch scenario differs from the single one"
+
+        try:
+            AuditEngine(db).simulate_audit(student.id, AuditSimulationRequest(add_course_ids=[987654]))
+            raise AssertionError("Unknown course accepted")
+        except ValueError as e:
+            assert "987654" in str(e), f"Unexpected error: {e}"
+
+        # Make the same change for real, audit, then roll it back.
+        for course_id in missing[:2] + [outside.id]:
+            db.add(Enrollment(student_id=student.id, course_id=course_id, semester="Fall", year=2099,
+                              grade="A", completed=True))
+        db.add(Substitution(student_id=student.id, original_course_id=missing[2],
+                            substitute_course_id=outside.id, approved=True))
+        db.query(Enrollment).filter(
+            Enrollment.student_id == student.id, Enrollment.course_id == completed.course_id
+        ).delete()
+        db.flush()
+        actual = AuditEngine(db).run_audit(student.id)
+        db.rollback()
+        assert simulated.model_dump() == actual.model_dump(), "Simulated audit differs from the real change"
+        assert db.query(Enrollment).filter(Enrollment.year == 2099).count() == 0, "Simulation wrote enrollments"
+        print(f"✓ Simulation equals the real audit ({simulated.total_credits_completed} credits); "
+              f"25 scenarios in {single_queries} queries; unknown course rejected")
+        return True
+
+    except Exception as e:
+        print(f"✗ Simulation test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.rollback()
+        db.close()
+
+
+def test_planner_optimal():
+    """Test the graduation planner against brute force on random instances"""
+    import itertools
+    import random
+    from app.planner import EPSILON, plan_remaining_courses
+    from app.schemas import (
+        AuditReport, AuditSimulationRequest, Course as CourseSchema, Program as ProgramSchema,
+        RequirementProgress, Student as StudentSchema
+    )
+
+    rng = random.Random(8)
+    student = StudentSchema(id=1, student_id="S1", name="Planner", email="planner@example.edu", program_id=1)
+    program = ProgramSchema(id=1, name="Planner", code="PLN", total_credits_required=120.0)
+
+    def covers(plan, requirements):
+        return all(
+            req.credits_completed + sum(c.credits for c in plan if c in req.missing_courses)
+            >= req.credits_required - EPSILON
+            for req in requirements
+        )
+
+    db = SessionLocal()
+    try:
+        instances = 0
+        for _ in range(150):
+            courses = [
+                CourseSchema(
+                    id=i + 1, course_code=f"P{i}", name=f"Course {i}", credits=rng.choice([1.0, 2.0, 3.0, 4.0, 4.5])
+                )
+                for i in range(rng.randint(3, 10))
+            ]
+            requirements = []
+            for r in range(rng.randint(1, 4)):
+                missing = rng.sample(courses, rng.randint(1, len(courses)))
+                completed = rng.choice([0.0, 0.0, 2.0])
+                required = completed + rng.uniform(0.5, sum(c.credits for c in missing) + 1.0)
+                requirements.append(RequirementProgress(
+                    requirement_id=r + 1, requirement_name=f"R{r}", requirement_type="CORE",
+                    credits_required=round(required, 1), credits_completed=completed, percentage=0.0,
+                    is_met=False, completed_courses=[], missing_courses=missing
+                ))
+            report = AuditReport(
+                student=student, program=program, total_credits_required=120.0, total_credits_completed=0.0,
+                overall_percentage=0.0, status="at_risk", requirements=requirements, graduation_eligible=False
+            )
+            for objective in ("credits", "courses"):
+                cost = (lambda plan: sum(c.credits for c in plan)) if objective == "credits" else len
+                feasible = [
+                    cost(plan)
+                    for k in range(len(courses) + 1)
+                    for plan in itertools.combinations(courses, k)
+                    if covers(plan, requirements)
+                ]
+                result = plan_remaining_courses(report, objective, time_budget=5.0)
+                assert result.feasible == bool(feasible), f"Feasibility {result.feasible} on instance {instances}"
+                if feasible:
+                    assert result.optimal, f"Not proven optimal on instance {instances}"
+                    assert covers(result.courses, requirements), f"Plan leaves a requirement unmet ({instances})"
+                    assert abs(cost(result.courses) - min(feasible)) < 1e-6, \
+                        f"{objective}: plan costs {cost(result.courses)}, best is {min(feasible)} ({instances})"
+                instances += 1
+
+        # On real audits, adding the planned courses makes the student eligible.
+        for student_id, in db.query(Student.id).order_by(Student.id):
+            report = AuditEngine(db).run_audit(student_id)
+            plan = plan_remaining_courses(report)
+            if plan.feasible and plan.courses:
+                simulated = AuditEngine(db).simulate_audit(
+                    student_id, AuditSimulationRequest(add_course_ids=[c.id for c in plan.courses])
+                )
+                assert simulated.graduation_eligible, f"Plan for student {student_id} does not graduate them"
+        print(f"✓ Planner matched brute force on {instances} random instances")
+        return True
+
+    except Exception as e:
+        print(f"✗ Planner test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+
+
+def test_catalog_versioning():
+    """Test that unknown course ids never rebuild the catalog or change its version"""
+    from app.cache_versions import CATALOG_KEY, bump_version, expire_versions
+    from app.catalog import get_catalog, refresh_catalog
+
+    db = SessionLocal()
+    try:
+        snapshot = get_catalog(db)
+        assert get_catalog(db, [424242, 999999]) is snapshot, "Unknown ids rebuilt the catalog"
+        queries = []
+        listener = lambda *args: queries.append(1)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            get_catalog(db, [424242])
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert len(queries) <= 1, f"Known-missing id ran {len(queries)} queries"  # at most the version check
+        assert refresh_catalog(db).version == snapshot.version, "Rebuild of an unchanged catalog bumped the version"
+
+        course = Course(course_code="CAT999", name="Catalog Probe", credits=3.0)
+        db.add(course)
+        db.flush()
+        bump_version(db, CATALOG_KEY)
+        expire_versions()
+        changed = get_catalog(db, [course.id])
+        assert course.id in changed.courses and changed.version != snapshot.version, "New course not picked up"
+
+        db.rollback()
+        expire_versions()
+        assert get_catalog(db).version == snapshot.version, "Same contents, different version"
+        print(f"✓ Catalog version {snapshot.version} stable across unknown ids and rebuilds; "
+              f"{changed.version} with a new course")
+        return True
+
+    except Exception as e:
+        print(f"✗ Catalog versioning test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.rollback()
+        expire_versions()
+        db.close()
+
+
+def test_substitution_resolver():
+    """Test one-to-many and many-to-one substitution semantics"""
+    from app.program_rules import CompiledRequirement
+    from app.schemas import Course as CourseSchema
+    from app.substitutions import SubstitutionResolver
+
+    try:
+        # 1 -> 10 and 1 -> 11 (one-to-many, plus a duplicate); 20 -> 2 and 20 -> 3 (many-to-one)
+        resolver = SubstitutionResolver([(1, 10), (1, 11), (1, 10), (2, 20), (3, 20)])
+        assert resolver.substitutes_for(1) == (10, 11), f"Forward map {resolver.forward}"
+        assert resolver.originals_for(20) == (2, 3) and resolver.originals_for(10) == (1,), \
+            f"Reverse map {resolver.reverse}"
+        assert resolver.substitutes_for(99) == () and resolver.originals_for(99) == (), "Unknown course mapped"
+        assert not SubstitutionResolver() and resolver, "Truthiness does not reflect substitutions"
+
+        # A substitute for several originals fills a missing one first.
+        assert resolver.credited_original(20, {2, 3}, set()) == 2
+        assert resolver.credited_original(20, {2, 3}, {2}) == 3
+        assert resolver.credited_original(20, {2, 3}, {2, 3}) == 2
+        assert resolver.credited_original(20, {3}, set()) == 3
+        assert resolver.credited_original(20, {4}, set()) is None, "Credited an original the requirement lacks"
+
+        courses = {
+            cid: CourseSchema(id=cid, course_code=f"S{cid}", name=f"Course {cid}", credits=4.0)
+            for cid in (1, 2, 3, 10, 11, 20)
+        }
+        requirement = CompiledRequirement(
+            id=1, name="Core", requirement_type="CORE", credits_required=12.0, course_ids=frozenset({1, 2, 3})
+        )
+        engine = AuditEngine(None)
+        # Both substitutes approved for course 1 are credited; course 1 is no longer missing.
+        progress = engine._calculate_requirement_progress(requirement, [10, 11], resolver, courses)
+        assert progress.credits_completed == 8.0 and [c.id for c in progress.missing_courses] == [2, 3], \
+            f"One-to-many: {progress.credits_completed} credits, missing {progress.missing_courses}"
+        progress = engine._calculate_requirement_progress(requirement, [11], resolver, courses)
+        assert progress.credits_completed == 4.0, "Second substitute for the same original ignored"
+        # Substitute 20 stands in for 2 or 3; with 2 completed it fills 3.
+        progress = engine._calculate_requirement_progress(requirement, [2, 20, 10], resolver, courses)
+        assert progress.is_met and not progress.missing_courses, \
+            f"Many-to-one: {progress.credits_completed} credits, missing {progress.missing_courses}"
+        print("✓ Forward/reverse maps, preference for missing originals, one-to-many and many-to-one credit")
+        return True
+
+    except Exception as e:
+        print(f"✗ Substitution resolver test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_demand_from_store():
+    """Test that demand and unmet-student queries follow writes without filling on read"""
+    import logging
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.audit_store import recompute_progress, refresh_progress
+    from app.bitsets import refresh_transcript_bits
+    from app.cache_versions import bump_version, program_key
+    from app.demand import course_demand, unmet_students
+    from app.models import RequirementCourse, StudentMissingCourse, StudentRequirementProgress
+
+    def expected_demand(reports, course_id):
+        return sorted(
+            report.student.id for report in reports
+            if any(not r.is_met and course_id in {c.id for c in r.missing_courses} for r in report.requirements)
+        )
+
+    logging.getLogger("app.requests").setLevel(logging.ERROR)
+    db = SessionLocal()
+    enrollment_id = requirement_id = None
+    try:
+        student_ids = [student_id for student_id, in db.query(Student.id).order_by(Student.id)]
+        reports = AuditEngine(db).run_audits(student_ids)
+        course_id = max(
+            {c.id for report in reports for r in report.requirements if not r.is_met for c in r.missing_courses},
+            key=lambda cid: len(expected_demand(reports, cid)),
+        )
+        requirement = reports[0].requirements[0]
+
+        queries = []
+        listener = lambda *args: queries.append(1)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            demand = course_demand(db, course_id)
+            unmet = unmet_students(db, requirement.requirement_id)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert demand == expected_demand(reports, course_id), f"Demand for {course_id}: {demand}"
+        assert unmet == [
+            report.student.id for report in reports
+            if not next(r for r in report.requirements if r.requirement_id == requirement.requirement_id).is_met
+        ], f"Unmet students of requirement {requirement.requirement_id}: {unmet}"
+        assert len(queries) <= 4, f"Demand and unmet reads ran {len(queries)} queries"
+
+        # Completing the course takes the student out of its demand.
+        client = TestClient(app)
+        student_id = demand[0]
+        response = client.post("/api/enrollments", json={
+            "student_id": student_id, "course_id": course_id,
+            "semester": "Fall", "year": 2099, "grade": "A", "completed": True,
+        })
+        enrollment_id = response.json()["id"]
+        after = client.get(f"/api/courses/{course_id}/demand").json()
+        assert student_id not in after["student_ids"] and after["count"] == len(demand) - 1, \
+            f"Demand after enrollment: {after}"
+
+        # A new requirement is filled in the background; its demand appears.
+        response = client.post("/api/requirements", json={
+            "program_id": reports[0].program.id, "name": "Demand Probe", "requirement_type": "ELECTIVE",
+            "credits_required": 400.0, "course_ids": [course_id],
+        })
+        requirement_id = response.json()["id"]
+        unmet = client.get(f"/api/requirements/{requirement_id}/unmet-students").json()
+        assert unmet["student_ids"] == student_ids, f"New requirement not filled: {unmet}"
+        db.expire_all()
+        reports = AuditEngine(db).run_audits(student_ids)
+        after = client.get(f"/api/courses/{course_id}/demand").json()
+        assert after["student_ids"] == expected_demand(reports, course_id), \
+            f"Demand does not include the new requirement: {after}"
+        assert client.get("/api/courses/987654/demand").status_code == 404, "Unknown course not rejected"
+        print(f"✓ Demand for course {course_id} and unmet students follow enrollments and new requirements")
+        return True
+
+    except Exception as e:
+        print(f"✗ Demand test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.rollback()
+        if requirement_id is not None:
+            for model in (StudentMissingCourse, StudentRequirementProgress, RequirementCourse):
+                db.query(model).filter(model.requirement_id == requirement_id).delete()
+            db.query(Requirement).filter(Requirement.id == requirement_id).delete()
+            bump_version(db, program_key(reports[0].program.id))
+            db.commit()
+            invalidate_program_rules()
+            recompute_progress(db, student_ids)
+            db.commit()
+        if enrollment_id is not None:
+            enrollment = db.get(Enrollment, enrollment_id)
+            db.delete(enrollment)
+            db.flush()
+            refresh_progress(db, enrollment.student_id, {enrollment.course_id})
+            refresh_transcript_bits(db, enrollment.student_id)
+            db.commit()
+        db.close()
+
+
+def test_analytics_counters():
+    """Test that analytics counters equal a recompute after audits and enrollment changes"""
+    import logging
+    from collections import Counter
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.audit_store import completion_band, credits_bucket, recompute_progress
+    from app.bitsets import refresh_transcript_bits
+    from app.models import ProgramAnalyticsCounter
+
+    logging.getLogger("app.requests").setLevel(logging.ERROR)
+    db = SessionLocal()
+    client = TestClient(app)
+    student_ids = []
+
+    def check_counters(when):
+        db.expire_all()
+        reports = AuditEngine(db).run_audits(student_ids)
+        expected = Counter()
+        for report in reports:
+            program_id = report.program.id
+            expected[(program_id, "status", report.status)] += 1
+            expected[(program_id, "credits", credits_bucket(report.total_credits_completed))] += 1
+            for progress in report.requirements:
+                band = completion_band(progress.percentage, progress.is_met)
+                expected[(program_id, f"requirement:{progress.requirement_id}", band)] += 1
+        stored = {
+            (program_id, metric, bucket): count
+            for program_id, metric, bucket, count in db.query(
+                ProgramAnalyticsCounter.program_id, ProgramAnalyticsCounter.metric,
+                ProgramAnalyticsCounter.bucket, ProgramAnalyticsCounter.count
+            ) if count
+        }
+        assert stored == dict(expected), f"Counters differ from a recompute {when}: " \
+            f"{set(stored.items()) ^ set(expected.items())}"
+
+        for program_id in {report.program.id for report in reports}:
+            response = client.get(f"/api/programs/{program_id}/analytics")
+            timing = response.headers["Server-Timing"].split(", ")[0]
+            queries = int(timing.split('desc="')[1].split(" ")[0])
+            assert queries <= 2, f"Analytics of program {program_id} ran {queries} queries"
+            credits = sorted(r.total_credits_completed for r in reports if r.program.id == program_id)
+            quantiles = {
+                name: credits[round(fraction * (len(credits) - 1))] for name, fraction in
+                {"min": 0.0, "p25": 0.25, "median": 0.5, "p75": 0.75, "p90": 0.9, "max": 1.0}.items()
+            }
+            analytics = response.json()
+            assert analytics["credit_quantiles"] == quantiles and analytics["student_count"] == len(credits), \
+                f"Analytics of program {program_id} {when}: {analytics['credit_quantiles']} != {quantiles}"
+
+    enrollment_ids = []
+    try:
+        student_ids = [student_id for student_id, in db.query(Student.id).order_by(Student.id)]
+        course_ids = [course_id for course_id, in db.query(Course.id).order_by(Course.id)]
+        check_counters("after seeding")
+
+        # Bulk load: new completions for several students, one of them twice.
+        records = [
+            {"student_id": student_id, "course_id": course_ids[(index * 7) % len(course_ids)],
+             "semester": "Spring", "year": 2099, "grade": "A", "completed": True}
+            for index, student_id in enumerate(student_ids[::3])
+        ]
+        records.append(dict(records[0], grade="B"))
+        response = client.post(
+            "/api/enrollments/bulk", content="\n".join(json.dumps(record) for record in records),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200 and response.json()["failed"] == 0, f"Bulk load: {response.text}"
+        enrollment_ids += [
+            enrollment_id for enrollment_id, in db.query(Enrollment.id).filter(Enrollment.year == 2099)
+        ]
+        check_counters("after a bulk load")
+
+        response = client.post("/api/enrollments", json={
+            "student_id": student_ids[1], "course_id": course_ids[-1],
+            "semester": "Fall", "year": 2099, "grade": "A", "completed": True,
+        })
+        enrollment_ids.append(response.json()["id"])
+        check_counters("after an enrollment")
+
+        affected = {
+            student_id for student_id, in db.query(Enrollment.student_id).filter(Enrollment.id.in_(enrollment_ids))
+        }
+        db.query(Enrollment).filter(Enrollment.id.in_(enrollment_ids)).delete(synchronize_session=False)
+        recompute_progress(db, sorted(affected))
+        for student_id in affected:
+            refresh_transcript_bits(db, student_id)
+        db.commit()
+        enrollment_ids = []
+        check_counters("after removing the enrollments")
+
+        print(f"✓ Counters and credit quantiles of {len(student_ids)} students match a recompute")
+        return True
+
+    except Exception as e:
+        print(f"✗ Analytics counters test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if enrollment_ids:
+            db.rollback()
+            db.query(Enrollment).filter(Enrollment.id.in_(enrollment_ids)).delete(synchronize_session=False)
+            recompute_progress(db, student_ids)
+            for student_id in student_ids:
+                refresh_transcript_bits(db, student_id)
+            db.commit()
+        db.close()
+
+
+def test_cursor_pagination():
+    """Test keyset pagination: page walks, sort orders, filters and bad cursors"""
+    import logging
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    logging.getLogger("app.requests").setLevel(logging.ERROR)
+    db = SessionLocal()
+    try:
+        client = TestClient(app)
+
+        def walk(url, **params):
+            items, cursor, pages = [], None, 0
+            while True:
+                page = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+                assert page.status_code == 200, f"{url} {params}: {page.status_code} {page.text}"
+                body = page.json()
+                assert len(body["items"]) <= params["limit"], f"Page larger than the limit: {body}"
+                items += body["items"]
+                pages += 1
+                cursor = body["next_cursor"]
+                if cursor is None:
+                    return items, pages
+
+        students = db.query(Student).all()
+        courses = db.query(Course).all()
+        cases = [
+            ("/api/students", "id", [s.id for s in sorted(students, key=lambda s: s.id)]),
+            ("/api/students", "name", [s.id for s in sorted(students, key=lambda s: (s.name, s.id))]),
+            ("/api/students", "-name", [s.id for s in sorted(students, key=lambda s: (s.name, s.id), reverse=True)]),
+            ("/api/courses", "credits", [c.id for c in sorted(courses, key=lambda c: (c.credits, c.id))]),
+            ("/api/courses", "-credits", [c.id for c in sorted(courses, key=lambda c: (c.credits, c.id), reverse=True)]),
+        ]
+        for url, sort, expected in cases:
+            items, pages = walk(url, limit=3, sort=sort)
+            assert [item["id"] for item in items] == expected, f"{url} sort={sort} walked out of order"
+            # The last page is known without an extra, empty request.
+            assert pages == -(-len(expected) // 3), f"{url} sort={sort}: {pages} pages for {len(expected)} rows"
+
+        # Filters compose with paging and the total counts every match.
+        program_id = students[0].program_id
+        in_program = sorted(s.id for s in students if s.program_id == program_id)
+        items, _ = walk("/api/students", limit=2, program_id=program_id)
+        assert [item["id"] for item in items] == in_program, "program_id filter lost rows across pages"
+        page = client.get("/api/students", params={"limit": 2, "include_total": True, "ids": in_program[:3]}).json()
+        assert page["total"] == 3 and [item["id"] for item in page["items"]] == in_program[:2], \
+            f"ids filter or total wrong: {page}"
+
+        # Bad cursors, a cursor from another sort and an unknown sort are 400s.
+        name_cursor = client.get("/api/students", params={"limit": 1, "sort": "name"}).json()["next_cursor"]
+        for params in (
+            {"cursor": "not-a-cursor"},
+            {"cursor": "bm90IGpzb24"},  # base64 of "not json"
+            {"cursor": name_cursor, "sort": "-name"},
+            {"cursor": name_cursor},
+            {"sort": "password_hash"},
+        ):
+            response = client.get("/api/students", params=params)
+            assert response.status_code == 400, f"{params} returned {response.status_code}, expected 400"
+        assert client.get("/api/students", params={"limit": 0}).status_code == 422, "limit=0 accepted"
+
+        print(f"✓ {len(cases)} sorted walks in pages of 3, filters, totals and bad cursors")
+        return True
+
+    except Exception as e:
+        print(f"✗ Cursor pagination test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+
+
+def test_bulk_progress_writes():
+    """Test that bulk progress writes are set-based and bulk loads count distinct rows"""
+    from app.audit_store import recompute_progress
+    from app.bulk_enrollments import EnrollmentBulkLoader
+    from app.models import StudentAuditSummary, StudentMissingCourse, StudentRequirementProgress
+
+    def snapshot():
+        return (
+            sorted(db.query(
+                StudentRequirementProgress.student_id, StudentRequirementProgress.requirement_id,
+                StudentRequirementProgress.percentage, StudentRequirementProgress.missing_course_ids
+            )),
+            sorted(db.query(StudentMissingCourse.student_id, StudentMissingCourse.requirement_id,
+                            StudentMissingCourse.course_id)),
+            sorted(db.query(StudentAuditSummary.student_id, StudentAuditSummary.status,
+                            StudentAuditSummary.total_credits_completed)),
+        )
+
+    db = SessionLocal()
+    queries = []
+    listener = lambda *args: queries.append(1)
+    try:
+        student_ids = [student_id for student_id, in db.query(Student.id).order_by(Student.id)]
+        before = snapshot()
+        counts = {}
+        for chunk in (student_ids[:1], student_ids):
+            queries.clear()
+            event.listen(engine, "before_cursor_execute", listener)
+            try:
+                recompute_progress(db, chunk)
+            finally:
+                event.remove(engine, "before_cursor_execute", listener)
+            counts[len(chunk)] = len(queries)
+        assert counts[len(student_ids)] == counts[1], f"Statements grow with the students recomputed: {counts}"
+        assert snapshot() == before, "Recomputing unchanged students changed the store"
+
+        # A key twice in one batch is one row; repeated in a later batch it is written again.
+        course_id = db.query(Course.id).order_by(Course.id).first()[0]
+        line = json.dumps({"student_id": student_ids[0], "course_id": course_id,
+                           "semester": "Winter", "year": 2099, "grade": "B", "completed": False}).encode()
+        loader = EnrollmentBulkLoader("ndjson")
+        loader.load_lines(db, [(1, line), (2, line)])
+        loader.load_lines(db, [(3, line)])
+        result = loader.finish(db)
+        assert (result.received, result.loaded, result.failed) == (3, 2, 0), f"Bulk load counts: {result}"
+        db.rollback()
+
+        print(f"✓ Recompute of 1 and {len(student_ids)} students both ran {counts[1]} statements; "
+              f"duplicate lines in a batch load once")
+        return True
+
+    except Exception as e:
+        print(f"✗ Bulk progress write test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.rollback()
+        db.close()
+
+
+def test_transcript_import_idempotent():
+    """Test that re-importing a registrar export changes nothing and stored progress stays correct"""
+    import io
+    import logging
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.audit_store import get_stored_report, recompute_progress
+    from app.bitsets import rebuild_transcript_bits
+    from app.models import ProgramAnalyticsCounter, StudentMissingCourse
+    from app.registrar_import import TranscriptImporter
+
+    logging.getLogger("app.requests").setLevel(logging.ERROR)
+    db = SessionLocal()
+    affected = []
+
+    def state():
+        db.expire_all()
+        return (
+            sorted(db.query(Enrollment.id, Enrollment.student_id, Enrollment.course_id, Enrollment.semester,
+                            Enrollment.year, Enrollment.grade, Enrollment.completed)),
+            sorted(db.query(StudentMissingCourse.student_id, StudentMissingCourse.requirement_id,
+                            StudentMissingCourse.course_id)),
+            sorted((p, m, b, c) for p, m, b, c in db.query(
+                ProgramAnalyticsCounter.program_id, ProgramAnalyticsCounter.metric,
+                ProgramAnalyticsCounter.bucket, ProgramAnalyticsCounter.count
+            ) if c),
+        )
+
+    try:
+        reports = {
+            report.student.id: report
+            for report in AuditEngine(db).run_audits([student_id for student_id, in db.query(Student.id)])
+        }
+        lines = ["student_id,course_code,semester,year,grade"]
+        for report in reports.values():
+            missing = [c for r in report.requirements if not r.is_met for c in r.missing_courses]
+            if missing and len(affected) < 6:
+                for course in missing[:2]:
+                    lines.append(f"{report.student.student_id},{course.course_code},Fall,2099,A")
+                affected.append(report.student.id)
+        students = [db.get(Student, student_id) for student_id in affected]
+        # A failed attempt (not completing), a line repeated and two bad lines
+        first_missing = lines[1].split(",")[1]
+        lines.append(f"{students[0].student_id},{first_missing},Spring,2099,F")
+        lines.append(lines[1])
+        lines.append(f"{students[0].student_id},NOPE 999,Fall,2099,A")
+        lines.append(f"X-{students[0].student_id},{first_missing},Fall,2099,A")
+        export = "\n".join(lines) + "\n"
+        distinct = len(set(lines[1:-2]))
+
+        client = TestClient(app)
+        results, states = [], []
+        for _ in range(2):
+            response = client.post("/api/enrollments/import?format=csv", content=export)
+            assert response.status_code == 200, f"Import returned {response.status_code}: {response.text}"
+            results.append(response.json())
+            states.append(state())
+        # Once more in batches of two lines, committed one by one
+        importer = TranscriptImporter("csv", batch_size=2)
+        importer.import_lines(db, [
+            (number, line.encode()) for number, line in enumerate(export.splitlines(), start=1)
+        ])
+        results.append(importer.result().model_dump())
+        states.append(state())
+
+        first = results[0]
+        assert (first["received"], first["loaded"], first["failed"]) == (len(lines) - 1, distinct, 2), \
+            f"Import counts: {first}"
+        # Rows are counted batch by batch: the repeated line lands in a later
+        # two-line batch than the line it repeats, so it is written twice there.
+        assert results[1] == first and results[2] == dict(first, loaded=distinct + 1), \
+            f"Re-imports reported differently: {results}"
+        assert states[1] == states[0] and states[2] == states[0], "Re-importing the export changed the store"
+
+        expected = AuditEngine(db).run_audits(affected)
+        assert any(report.model_dump() != reports[report.student.id].model_dump() for report in expected), \
+            "The import changed no audit"
+        for report in expected:
+            assert get_stored_report(db, report.student.id).model_dump() == report.model_dump(), \
+                f"Stored progress of student {report.student.id} differs from run_audit after re-imports"
+        print(f"✓ {len(lines) - 1} lines imported three times: {distinct} rows, identical store, "
+              f"stored progress equal to run_audit")
+        return True
+
+    except Exception as e:
+        print(f"✗ Transcript import test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.rollback()
+        db.query(Enrollment).filter(Enrollment.year == 2099).delete(synchronize_session=False)
+        recompute_progress(db, affected)
+        rebuild_transcript_bits(db, affected)
+        db.commit()
+        db.close()
+
+
+def test_audit_export_contents():
+    """Test the NDJSON and CSV audit exports row by row against the engine"""
+    import asyncio
+    import csv
+    import logging
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.audit_export import EXPORT_COLUMNS, stream_audit_export
+
+    logging.getLogger("app.requests").setLevel(logging.ERROR)
+    db = SessionLocal()
+    renamed = None
+    try:
+        # A name that needs CSV quoting
+        renamed = db.query(Student).order_by(Student.id).first()
+        original_name, renamed.name = renamed.name, 'Doe, "Jr"\tSmith'
+        db.commit()
+
+        students = db.query(Student).order_by(Student.id).all()
+        expected = []
+        for report in AuditEngine(db).run_audits([student.id for student in students]):
+            expected.append({
+                "student_id": report.student.id,
+                "student_number": report.student.student_id,
+                "name": report.student.name,
+                "email": report.student.email,
+                "program_code": report.program.code,
+                "status": report.status,
+                "total_credits_completed": report.total_credits_completed,
+                "total_credits_required": report.total_credits_required,
+                "overall_percentage": report.overall_percentage,
+                "requirements_met": sum(1 for progress in report.requirements if progress.is_met),
+                "requirements_total": len(report.requirements),
+                "graduation_eligible": report.graduation_eligible,
+            })
+        client = TestClient(app)
+
+        response = client.get("/api/audit/export")
+        assert response.status_code == 200 and response.headers["content-type"] == "application/x-ndjson", \
+            f"NDJSON export: {response.status_code} {response.headers.get('content-type')}"
+        assert 'filename="audits-all.ndjson"' in response.headers["content-disposition"], "No NDJSON filename"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert rows == expected, "NDJSON export differs from run_audits"
+
+        response = client.get("/api/audit/export", params={"format": "csv"})
+        assert response.headers["content-type"].startswith("text/csv"), "CSV export content type"
+        reader = csv.reader(response.text.splitlines(keepends=True))
+        header, *lines = list(reader)
+        assert tuple(header) == EXPORT_COLUMNS, f"CSV header {header}"
+        assert lines == [[str(row[column]) for column in EXPORT_COLUMNS] for row in expected], \
+            "CSV export differs from run_audits"
+        assert any(line[2] == renamed.name for line in lines), "Quoted name did not round-trip"
+
+        program_id = students[0].program_id
+        response = client.get("/api/audit/export", params={"program_id": program_id})
+        assert [json.loads(line) for line in response.text.splitlines()] == [
+            row for row, student in zip(expected, students) if student.program_id == program_id
+        ], f"Export of program {program_id} differs"
+        assert client.get("/api/audit/export", params={"program_id": 987654}).status_code == 404, \
+            "Unknown program not rejected"
+
+        # Chunk boundaries do not drop, repeat or reorder rows.
+        async def collect():
+            return b"".join([chunk async for chunk in stream_audit_export(None, "ndjson", chunk_size=4)])
+        chunked = [json.loads(line) for line in asyncio.run(collect()).splitlines()]
+        assert chunked == expected, "Export in chunks of 4 differs"
+
+        print(f"✓ NDJSON and CSV exports of {len(expected)} students match run_audits")
+        return True
+
+    except Exception as e:
+        print(f"✗ Audit export test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if renamed is not None:
+            db.rollback()
+            renamed.name = original_name
+            db.commit()
+        db.close()
+
+
 def run_all_tests():
     """Run all tests"""
     print("="*60)
@@ -202,6 +1614,27 @@ def run_all_tests():
         ("Audit Engine", test_audit_engine),
         ("Multiple Students", test_multiple_students),
         ("Status Determination", test_status_determination),
+        ("Vectorized Engine", test_vectorized_engine),
+        ("Bitset Cohorts", test_bitset_cohorts),
+        ("Audit Query Plans", test_audit_query_plans),
+        ("Request Instrumentation", test_request_instrumentation),
+        ("Shared Rules Invalidation", test_rules_shared_invalidation),
+        ("Audit Encoding", test_audit_encoding),
+        ("Audit Job Resume", test_audit_job_resume),
+        ("Vectorized Audit Job", test_audit_job_vectorized),
+        ("Stored Report", test_stored_report_matches_audit),
+        ("Audit ETag", test_audit_etag),
+        ("Audit Routes", test_audit_routes_off_loop),
+        ("What-If Simulation", test_simulation_matches_audit),
+        ("Graduation Planner", test_planner_optimal),
+        ("Catalog Versioning", test_catalog_versioning),
+        ("Substitution Resolver", test_substitution_resolver),
+        ("Course Demand", test_demand_from_store),
+        ("Analytics Counters", test_analytics_counters),
+        ("Cursor Pagination", test_cursor_pagination),
+        ("Bulk Progress Writes", test_bulk_progress_writes),
+        ("Transcript Import", test_transcript_import_idempotent),
+        ("Audit Export", test_audit_export_contents),
     ]
     
     results = []
@@ -4,13 +4,24 @@ import { useEffect, useState } from 'react';
 import { useRouter } from 'next/navigation';
 import { Substitution, Course, Student } from '@/types';
 import { substitutionApi, courseApi, studentApi } from '@/lib/api';
+import PagedSelect from '@/components/PagedSelect';
+
+const PAGE_SIZE = 50;
+const FIELD_CLASS =
+  'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-primary-500 focus:border-primary-500';
+
+const courseLabel = (course: Course) => `${course.course_code} - ${course.name}`;
+const studentLabel = (student: Student) => `${student.name} (${student.student_id})`;
 
 export default function AdminPage() {
   const router = useRouter();
   const [substitutions, setSubstitutions] = useState<Substitution[]>([]);
-  const [courses, setCourses] = useState<Course[]>([]);
-  const [students, setStudents] = useState<Student[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  // Labels of the students and courses referenced by the loaded substitutions
+  const [studentLabels, setStudentLabels] = useState<Record<number, string>>({});
+  const [courseLabels, setCourseLabels] = useState<Record<number, string>>({});
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [showCreateForm, setShowCreateForm] = useState(false);
 
   // Form state
@@ -26,19 +37,34 @@ export default function AdminPage() {
     loadData();
   }, []);
 
+  // One request per kind for the ids a page of substitutions references.
+  const loadLabels = async (subs: Substitution[]) => {
+    const studentIds = Array.from(new Set(subs.map((sub) => sub.student_id)));
+    const courseIds = Array.from(new Set(subs.flatMap((sub) => [sub.original_course_id, sub.substitute_course_id])));
+    const [studentsPage, coursesPage] = await Promise.all([
+      studentIds.length ? studentApi.page({ ids: studentIds }, { limit: studentIds.length }) : null,
+      courseIds.length ? courseApi.page({ ids: courseIds }, { limit: courseIds.length }) : null,
+    ]);
+    if (studentsPage) {
+      setStudentLabels((prev) => ({
+        ...prev,
+        ...Object.fromEntries(studentsPage.items.map((s) => [s.id, studentLabel(s)])),
+      }));
+    }
+    if (coursesPage) {
+      setCourseLabels((prev) => ({
+        ...prev,
+        ...Object.fromEntries(coursesPage.items.map((c) => [c.id, courseLabel(c)])),
+      }));
+    }
+  };
+
   const loadData = async () => {
     try {
-      const [subsData, coursesData, studentsData] = await Promise.all([
-        substitutionApi.list(),
-        courseApi.list(),
-        studentApi.list(),
-      ]);
-      setSubstitutions(subsData);
-      setCourses(coursesData);
-      setStudents(studentsData);
-      if (studentsData.length && formData.student_id === 0) {
-        setFormData((prev) => ({ ...prev, student_id: studentsData[0].id }));
-      }
+      const page = await substitutionApi.page({}, { limit: PAGE_SIZE, sort: '-id' });
+      setSubstitutions(page.items);
+      setNextCursor(page.next_cursor);
+      await loadLabels(page.items);
     } catch (err) {
       console.error('Failed to load data:', err);
     } finally {
@@ -46,13 +72,32 @@ export default function AdminPage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await substitutionApi.page({}, { limit: PAGE_SIZE, sort: '-id', cursor: nextCursor });
+      setSubstitutions((prev) => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+      await loadLabels(page.items);
+    } catch (err) {
+      console.error('Failed to load more substitutions:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleCreate = async (e: React.FormEvent) => {
     e.preventDefault();
+    if (!formData.student_id || !formData.original_course_id || !formData.substitute_course_id) {
+      alert('Select a student and both courses');
+      return;
+    }
     try {
       await substitutionApi.create(formData);
       setShowCreateForm(false);
       setFormData({
-        student_id: students[0]?.id ?? 1,
+        student_id: 0,
         original_course_id: 0,
         substitute_course_id: 0,
         reason: '',
@@ -84,15 +129,9 @@ export default function AdminPage() {
     }
   };
 
-  const getCourseCode = (courseId: number) => {
-    const course = courses.find((c) => c.id === courseId);
-    return course ? `${course.course_code} - ${course.name}` : 'Unknown';
-  };
+  const getCourseCode = (courseId: number) => courseLabels[courseId] ?? 'Unknown';
 
-  const getStudentLabel = (studentDbId: number) => {
-    const s = students.find((st) => st.id === studentDbId);
-    return s ? `${s.name} (${s.student_id})` : String(studentDbId);
-  };
+  const getStudentLabel = (studentDbId: number) => studentLabels[studentDbId] ?? String(studentDbId);
 
   if (loading) {
     return (
@@ -140,57 +179,42 @@ export default function AdminPage() {
                 <label className="block text-sm font-medium text-gray-700 mb-1">
                   Student
                 </label>
-                <select
+                <PagedSelect<Student>
+                  fetchPage={studentApi.search}
+                  label={studentLabel}
                   value={formData.student_id}
-                  onChange={(e) => setFormData({ ...formData, student_id: parseInt(e.target.value) })}
-                  className="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-primary-500 focus:border-primary-500"
-                  required
-                >
-                  <option value={0}>Select a student</option>
-                  {students.map((s) => (
-                    <option key={s.id} value={s.id}>
-                      {s.name} ({s.student_id})
-                    </option>
-                  ))}
-                </select>
+                  onChange={(id) => setFormData((prev) => ({ ...prev, student_id: id }))}
+                  placeholder="Select a student"
+                  className={FIELD_CLASS}
+                />
               </div>
 
               <div>
                 <label className="block text-sm font-medium text-gray-700 mb-1">
                   Original Course
                 </label>
-                <select
+                <PagedSelect<Course>
+                  fetchPage={courseApi.search}
+                  label={courseLabel}
                   value={formData.original_course_id}
-                  onChange={(e) => setFormData({ ...formData, original_course_id: parseInt(e.target.value) })}
-                  className="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-primary-500 focus:border-primary-500"
-                  required
-                >
-                  <option value={0}>Select a course</option>
-                  {courses.map((course) => (
-                    <option key={course.id} value={course.id}>
-                      {course.course_code} - {course.name}
-                    </option>
-                  ))}
-                </select>
+                  onChange={(id) => setFormData((prev) => ({ ...prev, original_course_id: id }))}
+                  placeholder="Select a course"
+                  className={FIELD_CLASS}
+                />
               </div>
 
               <div>
                 <label className="block text-sm font-medium text-gray-700 mb-1">
                   Substitute Course
                 </label>
-                <select
+                <PagedSelect<Course>
+                  fetchPage={courseApi.search}
+                  label={courseLabel}
                   value={formData.substitute_course_id}
-                  onChange={(e) => setFormData({ ...formData, substitute_course_id: parseInt(e.target.value) })}
-                  className="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-primary-500 focus:border-primary-500"
-                  required
-                >
-                  <option value={0}>Select a course</option>
-                  {courses.map((course) => (
-                    <option key={course.id} value={course.id}>
-                      {course.course_code} - {course.name}
-                    </option>
-                  ))}
-                </select>
+                  onChange={(id) => setFormData((prev) => ({ ...prev, substitute_course_id: id }))}
+                  placeholder="Select a course"
+                  className={FIELD_CLASS}
+                />
               </div>
 
               <div>
@@ -325,6 +349,18 @@ export default function AdminPage() {
             </tbody>
           </table>
         </div>
+
+        {nextCursor && (
+          <div className="mt-4 flex justify-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </main>
     </div>
   );
@@ -4,13 +4,13 @@ import { useEffect, useState } from 'react';
 import { useRouter } from 'next/navigation';
 import { AuditReport, Student } from '@/types';
 import { auditApi, studentApi } from '@/lib/api';
+import PagedSelect from '@/components/PagedSelect';
 
 const STORAGE_KEY = 'ironclad_selected_student_id';
 
 export default function DashboardPage() {
   const router = useRouter();
   const [report, setReport] = useState<AuditReport | null>(null);
-  const [students, setStudents] = useState<Student[]>([]);
   const [selectedStudentId, setSelectedStudentId] = useState<number | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
@@ -18,11 +18,12 @@ export default function DashboardPage() {
   useEffect(() => {
     const fetchAuditReport = async () => {
       try {
-        const all = await studentApi.list();
-        setStudents(all);
         const saved = localStorage.getItem(STORAGE_KEY);
         const savedId = saved ? Number(saved) : NaN;
-        const initialId = Number.isFinite(savedId) ? savedId : all[0]?.id ?? null;
+        // Without a saved student, start with the first one: a single one-row page.
+        const initialId = Number.isFinite(savedId)
+          ? savedId
+          : (await studentApi.page({}, { limit: 1 })).items[0]?.id ?? null;
         setSelectedStudentId(initialId);
         if (!initialId) {
           setError('No students found. Run the seed script to generate mock data.');
@@ -161,17 +162,15 @@ export default function DashboardPage() {
               <h2 className="text-sm font-semibold text-gray-900">View audit as</h2>
               <p className="text-xs text-gray-500">Login is disabled; select a seeded student.</p>
             </div>
-            <select
-              className="w-full md:w-[28rem] border border-gray-300 rounded-md px-3 py-2 text-sm"
-              value={selectedStudentId ?? ''}
-              onChange={(e) => handleStudentChange(Number(e.target.value))}
-            >
-              {students.map((s) => (
-                <option key={s.id} value={s.id}>
-                  {s.name} ({s.student_id})
-                </option>
-              ))}
-            </select>
+            <div className="w-full md:w-[28rem]">
+              <PagedSelect<Student>
+                fetchPage={studentApi.search}
+                label={(s) => `${s.name} (${s.student_id})`}
+                value={selectedStudentId}
+                onChange={handleStudentChange}
+                selectedLabel={`${report.student.name} (${report.student.student_id})`}
+              />
+            </div>
           </div>
         </div>
 
@@ -3,6 +3,7 @@
 import { useEffect, useState } from 'react';
 import { useRouter } from 'next/navigation';
 
+import PagedSelect from '@/components/PagedSelect';
 import { studentApi } from '@/lib/api';
 import type { Student } from '@/types';
 
@@ -10,24 +11,24 @@ const STORAGE_KEY = 'ironclad_selected_student_id';
 
 export default function HomePage() {
   const router = useRouter();
-  const [students, setStudents] = useState<Student[]>([]);
   const [selected, setSelected] = useState<number | null>(null);
-  const [error, setError] = useState<string | null>(null);
+  const [selectedStudent, setSelectedStudent] = useState<Student | null>(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     (async () => {
       setLoading(true);
-      setError(null);
       try {
-        const all = await studentApi.list();
-        setStudents(all);
         const saved = window.localStorage.getItem(STORAGE_KEY);
         const savedId = saved ? Number(saved) : NaN;
-        const initial = Number.isFinite(savedId) ? savedId : all[0]?.id ?? null;
-        setSelected(initial);
-      } catch (e) {
-        setError(e instanceof Error ? e.message : 'Failed to load students. Is the backend running on http://localhost:8000?');
+        if (Number.isFinite(savedId)) {
+          // The saved student may be on any page; fetch it on its own for the label.
+          setSelectedStudent(await studentApi.get(savedId));
+          setSelected(savedId);
+        }
+      } catch {
+        // Gone since it was saved: fall back to the first student.
+        window.localStorage.removeItem(STORAGE_KEY);
       } finally {
         setLoading(false);
       }
@@ -48,23 +49,18 @@ export default function HomePage() {
 
         {loading ? (
           <div className="mt-6 text-center text-sm text-gray-600">Loading students…</div>
-        ) : error ? (
-          <div className="mt-6 rounded-md bg-red-50 p-4 text-sm text-red-800">{error}</div>
         ) : (
           <div className="mt-6 space-y-4">
             <div>
               <label className="block text-sm font-medium text-gray-700 mb-1">Student</label>
-              <select
-                className="w-full rounded-md border border-gray-300 px-3 py-2 text-sm"
-                value={selected ?? ''}
-                onChange={(e) => setSelected(Number(e.target.value))}
-              >
-                {students.map((s) => (
-                  <option key={s.id} value={s.id}>
-                    {s.name} ({s.student_id})
-                  </option>
-                ))}
-              </select>
+              <PagedSelect<Student>
+                fetchPage={studentApi.search}
+                label={(s) => `${s.name} (${s.student_id})`}
+                value={selected}
+                onChange={setSelected}
+                selectedLabel={selectedStudent ? `${selectedStudent.name} (${selectedStudent.student_id})` : undefined}
+                selectFirst
+              />
             </div>
 
             <button
@@ -0,0 +1,111 @@
+'use client';
+
+import { useEffect, useState } from 'react';
+import type { Page } from '@/types';
+
+const PAGE_SIZE = 50;
+const SEARCH_DELAY_MS = 250;
+
+interface PagedSelectProps<T extends { id: number }> {
+  // One page of matches for a search term, continuing after `cursor`.
+  fetchPage: (search: string, cursor: string | null, limit: number) => Promise<Page<T>>;
+  label: (item: T) => string;
+  value: number | null;
+  onChange: (id: number) => void;
+  // Shown for a value that is not among the loaded options (e.g. a saved selection).
+  selectedLabel?: string;
+  placeholder?: string;
+  // Select the first option when nothing is selected yet.
+  selectFirst?: boolean;
+  className?: string;
+}
+
+/**
+ * A search box over a <select> that holds only the pages loaded so far: typing
+ * fetches the first page of matches, "Load more" fetches the next one.
+ */
+export default function PagedSelect<T extends { id: number }>({
+  fetchPage,
+  label,
+  value,
+  onChange,
+  selectedLabel,
+  placeholder,
+  selectFirst = false,
+  className = 'w-full rounded-md border border-gray-300 px-3 py-2 text-sm',
+}: PagedSelectProps<T>) {
+  const [search, setSearch] = useState('');
+  const [items, setItems] = useState<T[]>([]);
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      setLoading(true);
+      setError(null);
+      try {
+        const page = await fetchPage(search.trim(), null, PAGE_SIZE);
+        if (cancelled) return;
+        setItems(page.items);
+        setCursor(page.next_cursor);
+        if (selectFirst && value === null && page.items.length) onChange(page.items[0].id);
+      } catch (e) {
+        if (!cancelled) setError(e instanceof Error ? e.message : 'Failed to load options');
+      } finally {
+        if (!cancelled) setLoading(false);
+      }
+    }, search ? SEARCH_DELAY_MS : 0);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+    // fetchPage and onChange are re-created by every parent render; only the search matters.
+  }, [search]);
+
+  const loadMore = async () => {
+    if (!cursor) return;
+    setLoading(true);
+    try {
+      const page = await fetchPage(search.trim(), cursor, PAGE_SIZE);
+      setItems((prev) => [...prev, ...page.items]);
+      setCursor(page.next_cursor);
+    } catch (e) {
+      setError(e instanceof Error ? e.message : 'Failed to load options');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const selectedMissing = value !== null && value !== 0 && !items.some((item) => item.id === value);
+
+  return (
+    <div className="space-y-2">
+      <input
+        type="search"
+        value={search}
+        onChange={(e) => setSearch(e.target.value)}
+        placeholder="Search…"
+        className={className}
+      />
+      <select className={className} value={value ?? 0} onChange={(e) => onChange(Number(e.target.value))}>
+        {placeholder && <option value={0}>{placeholder}</option>}
+        {selectedMissing && <option value={value ?? 0}>{selectedLabel ?? `#${value}`}</option>}
+        {items.map((item) => (
+          <option key={item.id} value={item.id}>
+            {label(item)}
+          </option>
+        ))}
+      </select>
+      <div className="flex items-center justify-between text-xs text-gray-500">
+        <span>{error ?? (loading ? 'Loading…' : `${items.length}${cursor ? '+' : ''} shown`)}</span>
+        {cursor && (
+          <button type="button" onClick={loadMore} disabled={loading} className="text-primary-600 hover:text-primary-700 disabled:opacity-50">
+            Load more
+          </button>
+        )}
+      </div>
+    </div>
+  );
+}
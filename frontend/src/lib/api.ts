@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { AuditReport, Substitution, Course, Student } from '@/types';
+import { AuditReport, Substitution, Course, Student, Page, PageParams } from '@/types';
 
 const api = axios.create({
   // IMPORTANT: use same-origin so this works in port-forwarded/cloud dev.
@@ -10,6 +10,18 @@ const api = axios.create({
   },
 });
 
+// List endpoints are keyset-paginated: each page carries a `next_cursor` to
+// pass back for the next one, null on the last page. Views fetch one page at a
+// time (search, "load more"), never the whole collection.
+const getPage = async <T>(url: string, params: object = {}): Promise<Page<T>> => {
+  const response = await api.get<Page<T>>(url, {
+    params,
+    // Repeat array params (`ids=1&ids=2`), as FastAPI expects.
+    paramsSerializer: { indexes: null },
+  });
+  return response.data;
+};
+
 export const auditApi = {
   getAuditReport: async (studentId: number): Promise<AuditReport> => {
     const response = await api.get<AuditReport>(`/api/audit/${studentId}`);
@@ -23,12 +35,15 @@ export const auditApi = {
   },
 };
 
+export interface SubstitutionFilters {
+  student_id?: number;
+  approved?: boolean;
+  course_id?: number;
+}
+
 export const substitutionApi = {
-  list: async (studentId?: number): Promise<Substitution[]> => {
-    const url = studentId ? `/api/substitutions?student_id=${studentId}` : '/api/substitutions';
-    const response = await api.get<Substitution[]>(url);
-    return response.data;
-  },
+  page: (filters: SubstitutionFilters = {}, params: PageParams = {}): Promise<Page<Substitution>> =>
+    getPage<Substitution>('/api/substitutions', { ...filters, ...params }),
   create: async (substitution: Omit<Substitution, 'id'>): Promise<Substitution> => {
     const response = await api.post<Substitution>('/api/substitutions', substitution);
     return response.data;
@@ -42,16 +57,33 @@ export const substitutionApi = {
   },
 };
 
+export interface CourseFilters {
+  search?: string;
+  ids?: number[];
+}
+
 export const courseApi = {
-  list: async (): Promise<Course[]> => {
-    const response = await api.get<Course[]>('/api/courses');
-    return response.data;
-  },
+  page: (filters: CourseFilters = {}, params: PageParams = {}): Promise<Page<Course>> =>
+    getPage<Course>('/api/courses', { ...filters, ...params }),
+  // Picker pages: matches of a search term by course code.
+  search: (search: string, cursor: string | null, limit: number): Promise<Page<Course>> =>
+    getPage<Course>('/api/courses', { search: search || undefined, cursor, limit, sort: 'course_code' }),
 };
 
+export interface StudentFilters {
+  program_id?: number;
+  search?: string;
+  ids?: number[];
+}
+
 export const studentApi = {
-  list: async (): Promise<Student[]> => {
-    const response = await api.get<Student[]>('/api/students');
+  page: (filters: StudentFilters = {}, params: PageParams = {}): Promise<Page<Student>> =>
+    getPage<Student>('/api/students', { ...filters, ...params }),
+  // Picker pages: matches of a search term by name.
+  search: (search: string, cursor: string | null, limit: number): Promise<Page<Student>> =>
+    getPage<Student>('/api/students', { search: search || undefined, cursor, limit, sort: 'name' }),
+  get: async (id: number): Promise<Student> => {
+    const response = await api.get<Student>(`/api/students/${id}`);
     return response.data;
   },
 };
@@ -66,3 +66,16 @@ export interface AuthResponse {
   student_name: string;
   is_admin: boolean;
 }
+
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+  total: number | null;
+}
+
+export interface PageParams {
+  limit?: number;
+  cursor?: string | null;
+  sort?: string;
+  include_total?: boolean;
+}
@@ -48,6 +48,13 @@ pip install -q -r requirements.txt
 
 echo "✓ Backend dependencies installed"
 
+# Apply migrations
+echo ""
+echo "Applying database migrations..."
+alembic upgrade head
+
+echo "✓ Database schema up to date"
+
 # Seed database
 echo ""
 echo "Seeding database with mock data..."
@@ -26,6 +26,9 @@ fi
 source venv/bin/activate
 pip install -q -r requirements.txt
 
+# Apply pending migrations
+alembic upgrade head
+
 # Check if database is seeded
 if ! python3 -c "from app.database import SessionLocal; from app.models import Student; db = SessionLocal(); students = db.query(Student).count(); db.close(); exit(0 if students > 0 else 1)" 2>/dev/null; then
     echo "Seeding database..."